@@ -1,155 +1,146 @@
-from flask import Flask, render_template, redirect, url_for, session, request, flash
-from flask_sqlalchemy import SQLAlchemy
-from flask_login import LoginManager, login_user, login_required, logout_user, current_user
-from flask_mail import Mail, Message
-from flask_cors import CORS
+import os
+import click
+from flask import Flask
 from config import Config
-
-# Initialize the Flask application
-app = Flask(__name__)
-
-# Enable CORS for handling cross-origin requests
-CORS(app)
-
-# Configure the app (using environment variables)
-app.config.from_object(Config)
-
-# Initialize extensions
-db = SQLAlchemy(app)
-login_manager = LoginManager(app)
-mail = Mail(app)
-
-# User loader for Flask-Login
-@login_manager.user_loader
-def load_user(user_id):
-    from models.user import User
-    return User.query.get(int(user_id))
-
-# Home route
-@app.route('/')
-def index():
-    return render_template('index.html')
-
-# Profile route
-@app.route('/profile')
-@login_required
-def profile():
-    from models.user import User
-    # Get the user data from the database
-    user = User.query.filter_by(id=current_user.id).first()
-    return render_template('profile.html', user=user)
-
-# Feed route - to show posts of the users they follow
-@app.route('/feed')
-@login_required
-def feed():
-    from models.post import Post
-    posts = Post.query.all()  # Retrieve posts from the database
-    return render_template('feed.html', posts=posts)
-
-# Explore route - search posts, hashtags, and users
-@app.route('/explore')
-@login_required
-def explore():
-    from models.hashtag import Hashtag
-    hashtags = Hashtag.query.all()  # Retrieve all hashtags
-    return render_template('explore.html', hashtags=hashtags)
-
-# Direct Messages (DM) route
-@app.route('/messages')
-@login_required
-def messages():
-    from models.message import Message
-    # Fetch the user messages
-    messages = Message.query.filter_by(recipient_id=current_user.id).all()
-    return render_template('dm.html', messages=messages)
-
-# Settings route for user preferences
-@app.route('/settings')
-@login_required
-def settings():
-    return render_template('settings.html')
-
-# Logout route
-@app.route('/logout')
-@login_required
-def logout():
-    logout_user()
-    flash("You have been logged out", "info")
-    return redirect(url_for('index'))
-
-# Login route
-@app.route('/login', methods=['GET', 'POST'])
-def login():
-    from models.user import User
-    if request.method == 'POST':
-        username = request.form['username']
-        password = request.form['password']
-        user = User.query.filter_by(username=username).first()
-
-        if user and user.check_password(password):
-            login_user(user)
-            flash("Logged in successfully!", "success")
-            return redirect(url_for('index'))
-        else:
-            flash("Invalid username or password.", "danger")
-
-    return render_template('login.html')
-
-# Register route
-@app.route('/register', methods=['GET', 'POST'])
-def register():
-    from models.user import User
-    if request.method == 'POST':
-        username = request.form['username']
-        email = request.form['email']
-        password = request.form['password']
-        user = User(username=username, email=email)
-        user.set_password(password)
-        db.session.add(user)
-        db.session.commit()
-        flash("You have successfully registered", "success")
-        return redirect(url_for('login'))
-
-    return render_template('register.html')
-
-# Reset Password route (send reset link)
-@app.route('/reset_password', methods=['GET', 'POST'])
-def reset_password():
-    from models.user import User
-    if request.method == 'POST':
-        email = request.form['email']
-        user = User.query.filter_by(email=email).first()
-        if user:
-            # Send email with reset link (use Flask-Mail)
-            token = user.get_reset_token()
-            msg = Message("Password Reset Request", recipients=[email])
-            msg.body = f"To reset your password, visit the following link: {url_for('reset_token', token=token, _external=True)}"
-            mail.send(msg)
-            flash("A password reset link has been sent to your email", "info")
-        else:
-            flash("Email address not found.", "danger")
-
-    return render_template('reset_password.html')
-
-# Token route for resetting password
-@app.route('/reset_password/<token>', methods=['GET', 'POST'])
-def reset_token(token):
-    from models.user import User
-    user = User.verify_reset_token(token)
-    if not user:
-        flash("The token is invalid or expired", "danger")
-        return redirect(url_for('reset_password'))
-
-    if request.method == 'POST':
-        password = request.form['password']
-        user.set_password(password)
-        db.session.commit()
-        flash("Your password has been updated!", "success")
-        return redirect(url_for('login'))
-
-    return render_template('reset_token.html')
+from database import db, close_db
+from extensions import cors, login_manager, mail, migrate
+from utils.cache import init_cache
+
+# Blueprints registered by create_app(), as (module, attribute). Modules are imported only
+# when an app is built, so importing this file stays cheap.
+BLUEPRINTS = (
+    ('controllers.main_controller', 'main_bp'),
+    ('controllers.auth_controller', 'auth_bp'),
+    ('controllers.post_controller', 'post_bp'),
+    ('controllers.story_controller', 'story_bp'),
+    ('controllers.message_controller', 'message_bp'),
+    ('controllers.notification_controller', 'notification_bp'),
+    ('controllers.explore_controller', 'explore_bp'),
+    ('controllers.settings_controller', 'settings_bp'),
+    ('controllers.media_controller', 'media_bp'),
+    ('controllers.upload_controller', 'upload_bp'),
+    ('models.reel', 'reel_bp'),  # Reels have no controller of their own
+)
+
+# ---------------------- Application Factory ---------------------- #
+def create_app(config=Config):
+    """
+    Build and configure the Flask application.
+
+    Every extension binds to the one app built here and every model shares the single `db`
+    from database.py. Run under gunicorn with `--preload 'app:create_app()'` so models and
+    routes are imported once in the master and shared copy-on-write by forked workers.
+    """
+    # Imported here: both load the models, which importing this file must not do
+    from utils.media import register_template_helpers
+    from utils.uploads import UploadRequest
+
+    app = Flask(__name__, template_folder='app/templates', static_folder='app/static')
+    app.request_class = UploadRequest  # Multipart media is parsed straight into the staging area
+    app.config.from_object(config)
+
+    # Media lives outside the static folder, so unprocessed uploads are never served as static files
+    app.config['MEDIA_ROOT'] = app.config.get('MEDIA_ROOT') or os.path.join(app.instance_path, 'media')
+    app.config['MEDIA_STAGING_DIR'] = app.config.get('MEDIA_STAGING_DIR') or os.path.join(app.instance_path, 'staging')
+
+    # Initialize extensions
+    cors.init_app(app)  # Enable CORS for handling cross-origin requests
+    db.init_app(app)
+    migrate.init_app(app, db, render_as_batch=True)  # Batch mode lets SQLite ALTER tables
+    login_manager.init_app(app)
+    login_manager.login_view = 'auth.login'
+    mail.init_app(app)
+    init_cache(app)
+    register_template_helpers(app)
+
+    # Return pooled raw-SQL connections at the end of every request
+    app.teardown_appcontext(close_db)
+
+    register_blueprints(app)
+    register_commands(app)
+    return app
+
+# ---------------------- Blueprint Registration ---------------------- #
+def register_blueprints(app):
+    """Import each route module and register its blueprint on the app."""
+    import importlib
+    import models  # Registers every model table on db.metadata for migrations
+    for module_name, attribute in BLUEPRINTS:
+        app.register_blueprint(getattr(importlib.import_module(module_name), attribute))
+
+# ---------------------- CLI Commands ---------------------- #
+def register_commands(app):
+    """Attach the maintenance commands to `flask`."""
+
+    # Recompute denormalized like/comment counters (run after imports or to repair drift)
+    @app.cli.command('reconcile-counters')
+    def reconcile_counters_command():
+        from utils.counters import reconcile_counters
+        reconcile_counters()
+        print("Like and comment counters reconciled.")
+
+    # Rebuild the trending-hashtag buckets from existing posts (after deploying or to repair drift)
+    @app.cli.command('rebuild-trending')
+    def rebuild_trending_command():
+        from utils.trending import rebuild_buckets
+        print(f"Rebuilt {rebuild_buckets()} trending buckets.")
+
+    # Drop trending-hashtag buckets older than the longest window (run periodically, e.g. from cron)
+    @app.cli.command('prune-trending')
+    def prune_trending_command():
+        from utils.trending import prune_buckets
+        print(f"Pruned {prune_buckets()} trending buckets.")
+
+    # Re-index post, reel and message text for full-text search (after bulk imports)
+    @app.cli.command('rebuild-search')
+    def rebuild_search_command():
+        from utils.search import rebuild_search_index
+        rebuild_search_index()
+        print("Search index rebuilt.")
+
+    # Delete media files no record has used for MEDIA_GC_GRACE_SECONDS (run periodically, e.g. from cron)
+    @app.cli.command('gc-media')
+    def gc_media_command():
+        from utils.media_store import collect_garbage
+        print(f"Removed {collect_garbage()} unused media blobs.")
+
+    # Delete expired stories in bounded batches (long-lived with STORY_REAP_INTERVAL, or --once from cron)
+    @app.cli.command('reap-stories')
+    @click.option('--interval', type=int, default=None, help='Seconds between runs (default STORY_REAP_INTERVAL).')
+    @click.option('--once', is_flag=True, help='Reap once and exit.')
+    def reap_stories_command(interval, once):
+        from utils.stories import run_reaper
+        print(f"Reaped {run_reaper(interval, once)} expired stories.")
+
+    # Transcode queued reel and story videos (run as a long-lived process next to the web workers)
+    @app.cli.command('transcode-worker')
+    @click.option('--workers', type=int, default=None, help='Encoder processes (default TRANSCODE_WORKERS; 0 runs inline).')
+    @click.option('--once', is_flag=True, help='Exit once no jobs are due.')
+    def transcode_worker_command(workers, once):
+        from utils.transcoding import run_worker
+        print(f"Finished {run_worker(workers, once)} transcode jobs.")
+
+    # Queue videos that are not fully transcoded, e.g. those uploaded before HLS packaging was enabled
+    @app.cli.command('transcode-backfill')
+    def transcode_backfill_command():
+        from utils.transcoding import backfill_transcodes
+        print(f"Queued {backfill_transcodes()} transcode jobs.")
+
+    # Show transcode job counts and average timings per status
+    @app.cli.command('transcode-stats')
+    def transcode_stats_command():
+        from utils.transcoding import transcode_metrics
+        for status, metrics in transcode_metrics().items():
+            print(status, ', '.join(f"{name}={value:.1f}" if isinstance(value, float) else f"{name}={value}" for name, value in metrics.items()))
+
+    # Export posts, messages and notifications as JSON lines, streaming rows in batches
+    @app.cli.command('export-data')
+    @click.argument('directory')
+    def export_data_command(directory):
+        from utils.exports import export_all
+        for name, count in export_all(directory).items():
+            print(f"Exported {count} {name}.")
 
 # Running the app
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    create_app().run(debug=True)
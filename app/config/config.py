@@ -1,4 +1,5 @@
 import os
+import tempfile
 
 # ---------------------- General App Settings ---------------------- #
 
@@ -15,9 +16,12 @@ DEBUG = ENV == 'development'
 
 # ---------------------- Database Configuration ---------------------- #
 
+# Single SQLite file shared by every model and by the raw helpers in database.py
+DATABASE_PATH = os.environ.get('DATABASE_PATH', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'database', 'app.db'))
+
 # Database URI (can be SQLite, PostgreSQL, MySQL, etc.)
 # Here we're using SQLite as an example. In production, you'd typically use something more robust.
-DATABASE_URI = os.environ.get('DATABASE_URI', 'sqlite:///app.db')
+DATABASE_URI = os.environ.get('DATABASE_URI', 'sqlite:///' + DATABASE_PATH)
 
 # Database echo flag - set to True to log all SQL statements
 SQLALCHEMY_ECHO = ENV == 'development'
@@ -38,9 +42,18 @@ MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER', 'no-reply@example.co
 # ---------------------- Caching Configuration ---------------------- #
 
 # Caching configuration for performance optimization (optional)
-CACHE_TYPE = os.environ.get('CACHE_TYPE', 'simple')  # Options: 'simple', 'redis', 'memcached'
+CACHE_TYPE = os.environ.get('CACHE_TYPE', 'simple')  # Options: 'simple', 'redis', 'filesystem'
 CACHE_DEFAULT_TIMEOUT = 300
 
+# Redis server used when CACHE_TYPE is 'redis'
+CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+
+# Directory used when CACHE_TYPE is 'filesystem' (handy for testing offline)
+CACHE_DIR = os.environ.get('CACHE_DIR', os.path.join(tempfile.gettempdir(), 'instaclone-cache'))
+
+# Prefix for every cache key, so several apps can share one Redis
+CACHE_KEY_PREFIX = os.environ.get('CACHE_KEY_PREFIX', 'instaclone:')
+
 # ---------------------- Session and Security Settings ---------------------- #
 
 # Session timeout (in seconds)
@@ -54,12 +67,112 @@ CSRF_SESSION_KEY = os.environ.get('CSRF_SESSION_KEY', 'mycsrfsecretkey')
 
 # ---------------------- Other Custom Configurations ---------------------- #
 
-# Maximum file upload size (in bytes)
+# Maximum file upload size (in bytes); larger files use resumable uploads (see utils/uploads.py)
 MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16 MB
 
 # Allowed file extensions for uploads (e.g., images, videos)
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'mp4', 'mkv', 'mov'}
 
+# ---------------------- Media Pipeline Configuration ---------------------- #
+
+# Stored uploads, content-addressed: each file is named by its SHA-256 and sharded into ab/cd/
+# folders by hash prefix, whatever record uses it. Records store paths relative to MEDIA_ROOT.
+# Defaults to `media` in the app's instance folder (set by create_app()). Keep it out of the static
+# folder: media is served by the media endpoint, which never serves the staging area.
+MEDIA_ROOT = os.environ.get('MEDIA_ROOT')
+
+# Where uploads are streamed before processing (default: `staging` in the instance folder). Raw
+# uploads are not EXIF-stripped yet, so it must not be publicly served; keep it on the same disk
+# as MEDIA_ROOT so files move without copying.
+MEDIA_STAGING_DIR = os.environ.get('MEDIA_STAGING_DIR')
+
+# Processes resizing images per web worker; 0 processes uploads inside the request
+MEDIA_WORKERS = int(os.environ.get('MEDIA_WORKERS', 2))
+
+# Uploads a web worker accepts while earlier ones are still waiting or being processed
+MEDIA_QUEUE_SIZE = 32
+
+# URL prefix processed media is served under: the app's own media endpoint, which supports range
+# requests and conditional GETs, or a CDN/web server mapped onto MEDIA_ROOT
+MEDIA_URL = os.environ.get('MEDIA_URL', '/media')
+
+# Browser cache lifetime of media files that are not content-addressed (those are cached for a year)
+MEDIA_CACHE_SECONDS = 3600
+
+# Widths of the stored copies of every image; the largest also caps the main image
+MEDIA_IMAGE_WIDTHS = (150, 320, 640, 1080)
+
+# Formats written for every image size. JPEG is always written as the fallback; 'avif' is
+# skipped unless Pillow was built with AVIF support.
+MEDIA_IMAGE_FORMATS = ('webp', 'jpeg')
+
+# Encoder quality of processed images, for every format
+MEDIA_JPEG_QUALITY = 85
+
+# Largest chunk accepted per request by a resumable upload, and largest file it may announce
+MEDIA_UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024  # 8 MB
+MEDIA_UPLOAD_MAX_SIZE = 1024 * 1024 * 1024  # 1 GB
+
+# Resumable uploads a user may have open at once; finished, cancelled or expired ones free a slot
+MEDIA_UPLOAD_MAX_OPEN = 5
+
+# Seconds an unreferenced media file (and an abandoned staged upload) is kept before `flask gc-media` deletes it
+MEDIA_GC_GRACE_SECONDS = 3600
+
+# ---------------------- Video Transcoding Configuration ---------------------- #
+
+# Encoder run by `flask transcode-worker`: 'ffmpeg', 'stub' (copies the upload; for development
+# and tests), or 'auto' to use ffmpeg when it is installed
+TRANSCODE_ENCODER = os.environ.get('TRANSCODE_ENCODER', 'auto')
+
+# Encoder processes per transcode worker (0 transcodes inline)
+TRANSCODE_WORKERS = int(os.environ.get('TRANSCODE_WORKERS', 2))
+
+# H.264 renditions as (height, video kbps); sources are never upscaled
+TRANSCODE_LADDER = ((1080, 5000), (720, 2800), (480, 1400), (360, 800))
+
+# Attempts per job, and the delay before the first retry (doubled after each further failure)
+TRANSCODE_MAX_ATTEMPTS = 3
+TRANSCODE_RETRY_SECONDS = 60
+
+# Seconds one ffmpeg run may take before it is killed. A job runs ffmpeg several times (the
+# ladder, then one HLS segmenting pass per rendition), so this is not the job's lease.
+TRANSCODE_JOB_TIMEOUT = 1800
+
+# Workers renew the lease of their running jobs every third of this; a job whose lease has not
+# been renewed for this long (its worker died) is claimed by another worker
+TRANSCODE_LEASE_SECONDS = 300
+
+# Seconds the worker waits between checks for new jobs
+TRANSCODE_POLL_SECONDS = 2
+
+# Package transcoded videos for HLS (segments plus playlists), in segments of this many seconds
+# (a multiple of the 2-second keyframe interval). Playlists use relative URIs, so MEDIA_URL may
+# point at the app's media endpoint or at a static directory/CDN serving MEDIA_ROOT.
+HLS_ENABLED = os.environ.get('HLS_ENABLED', 'True') == 'True'
+HLS_SEGMENT_SECONDS = 4
+
+# ---------------------- Reels Feed Configuration ---------------------- #
+
+# Reels per feed page, and how far back (days) the feed looks for candidates
+REELS_PER_PAGE = 10
+REELS_FEED_WINDOW_DAYS = 14
+
+# Ranking points per like, per comment, for a followed creator, and per hour of recency
+REELS_FEED_WEIGHTS = {'like': 1.0, 'comment': 3.0, 'follow': 50.0, 'hour': 2.0}
+
+# Candidate batches (of two pages each) read per request at most, skipping watched reels
+REELS_FEED_MAX_BATCHES = 5
+
+# Seconds a feed session's prefetched candidates and already-served reels are kept
+REELS_PREFETCH_SECONDS = 300
+
+# ---------------------- Story Expiry Configuration ---------------------- #
+
+# Expired stories deleted per reaper transaction, and seconds between reaper runs
+STORY_REAP_BATCH_SIZE = 500
+STORY_REAP_INTERVAL = 60
+
 # ---------------------- Logging Configuration ---------------------- #
 
 # Enable logging in production environment
@@ -79,6 +192,57 @@ POSTS_PER_PAGE = 20
 # Maximum number of users to fetch for search results
 USER_SEARCH_LIMIT = 10
 
+# Seconds between full rebuilds of each worker's hashtag/username autocomplete index, which run
+# in the background while the old index keeps answering
+AUTOCOMPLETE_REBUILD_SECONDS = 600
+
+# Full-text search backend: 'fts5' (SQLite, tables from migration 0003), 'like' (table scans),
+# or 'auto' to use fts5 whenever its tables exist
+SEARCH_BACKEND = os.environ.get('SEARCH_BACKEND', 'auto')
+
+# ---------------------- Timeline (Fan-out) Configuration ---------------------- #
+
+# Push new posts into each follower's materialized timeline instead of joining follows and posts on read
+TIMELINE_ENABLED = os.environ.get('TIMELINE_ENABLED', 'False') == 'True'
+
+# Redis URL for timeline storage, shared by all workers. Without it the feed uses the pull path
+# even when TIMELINE_ENABLED is set, since per-worker timelines would miss other workers' posts
+TIMELINE_REDIS_URL = os.environ.get('TIMELINE_REDIS_URL')
+
+# Keep timelines in this process's memory when there is no Redis; only for a single worker
+# (e.g. the development server), as each worker would otherwise see only its own fan-outs
+TIMELINE_MEMORY_STORE = os.environ.get('TIMELINE_MEMORY_STORE', 'False') == 'True'
+
+# Maximum number of post ids kept per timeline; older pages fall back to the pull feed
+TIMELINE_MAX_LENGTH = 800
+
+# Authors with more followers than this are not fanned out; their posts are pulled at read time
+CELEBRITY_FOLLOWER_THRESHOLD = 10000
+
+# Number of follower ids pushed per round trip during fan-out
+TIMELINE_FANOUT_BATCH_SIZE = 1000
+
+# ---------------------- Like Buffer Configuration ---------------------- #
+
+# Seconds between batched like/unlike flushes. Unflushed likes are held in worker memory, so a
+# crashed worker loses at most this many seconds of likes. Set to 0 to write every like through.
+LIKE_BUFFER_FLUSH_INTERVAL = float(os.environ.get('LIKE_BUFFER_FLUSH_INTERVAL', 1.0))
+
+# Pending like/unlike intents per worker that force an immediate flush; new likes are refused
+# beyond this while flushes are failing
+LIKE_BUFFER_MAX_PENDING = 5000
+
+# ---------------------- Trending Hashtags Configuration ---------------------- #
+
+# Width of each hashtag usage bucket, in seconds
+TRENDING_BUCKET_SECONDS = 300
+
+# Seconds a computed trending list is served before it is recomputed from the buckets
+TRENDING_REFRESH_SECONDS = 60
+
+# Window used when none is requested: '1h', '24h' or '7d'
+TRENDING_DEFAULT_WINDOW = os.environ.get('TRENDING_DEFAULT_WINDOW', '24h')
+
 # ---------------------- Setup for Flask-Extensions ---------------------- #
 
 # Flask extensions (e.g., SQLAlchemy, Mail, Cache, etc.)
@@ -95,15 +259,61 @@ class Config:
     MAIL_DEFAULT_SENDER = MAIL_DEFAULT_SENDER
     CACHE_TYPE = CACHE_TYPE
     CACHE_DEFAULT_TIMEOUT = CACHE_DEFAULT_TIMEOUT
+    CACHE_REDIS_URL = CACHE_REDIS_URL
+    CACHE_DIR = CACHE_DIR
+    CACHE_KEY_PREFIX = CACHE_KEY_PREFIX
     CSRF_ENABLED = CSRF_ENABLED
     CSRF_SESSION_KEY = CSRF_SESSION_KEY
     MAX_CONTENT_LENGTH = MAX_CONTENT_LENGTH
     ALLOWED_EXTENSIONS = ALLOWED_EXTENSIONS
+    MEDIA_ROOT = MEDIA_ROOT
+    MEDIA_STAGING_DIR = MEDIA_STAGING_DIR
+    MEDIA_WORKERS = MEDIA_WORKERS
+    MEDIA_QUEUE_SIZE = MEDIA_QUEUE_SIZE
+    MEDIA_URL = MEDIA_URL
+    MEDIA_CACHE_SECONDS = MEDIA_CACHE_SECONDS
+    MEDIA_IMAGE_WIDTHS = MEDIA_IMAGE_WIDTHS
+    MEDIA_IMAGE_FORMATS = MEDIA_IMAGE_FORMATS
+    MEDIA_JPEG_QUALITY = MEDIA_JPEG_QUALITY
+    MEDIA_GC_GRACE_SECONDS = MEDIA_GC_GRACE_SECONDS
+    MEDIA_UPLOAD_CHUNK_SIZE = MEDIA_UPLOAD_CHUNK_SIZE
+    MEDIA_UPLOAD_MAX_SIZE = MEDIA_UPLOAD_MAX_SIZE
+    MEDIA_UPLOAD_MAX_OPEN = MEDIA_UPLOAD_MAX_OPEN
+    TRANSCODE_ENCODER = TRANSCODE_ENCODER
+    TRANSCODE_WORKERS = TRANSCODE_WORKERS
+    TRANSCODE_LADDER = TRANSCODE_LADDER
+    TRANSCODE_MAX_ATTEMPTS = TRANSCODE_MAX_ATTEMPTS
+    TRANSCODE_RETRY_SECONDS = TRANSCODE_RETRY_SECONDS
+    TRANSCODE_JOB_TIMEOUT = TRANSCODE_JOB_TIMEOUT
+    TRANSCODE_LEASE_SECONDS = TRANSCODE_LEASE_SECONDS
+    TRANSCODE_POLL_SECONDS = TRANSCODE_POLL_SECONDS
+    HLS_ENABLED = HLS_ENABLED
+    HLS_SEGMENT_SECONDS = HLS_SEGMENT_SECONDS
+    REELS_PER_PAGE = REELS_PER_PAGE
+    REELS_FEED_WINDOW_DAYS = REELS_FEED_WINDOW_DAYS
+    REELS_FEED_WEIGHTS = REELS_FEED_WEIGHTS
+    REELS_FEED_MAX_BATCHES = REELS_FEED_MAX_BATCHES
+    REELS_PREFETCH_SECONDS = REELS_PREFETCH_SECONDS
+    STORY_REAP_BATCH_SIZE = STORY_REAP_BATCH_SIZE
+    STORY_REAP_INTERVAL = STORY_REAP_INTERVAL
     LOGGING_LEVEL = LOGGING_LEVEL
     LOGGING_FORMAT = LOGGING_FORMAT
     LOGGING_FILE = LOGGING_FILE
     POSTS_PER_PAGE = POSTS_PER_PAGE
     USER_SEARCH_LIMIT = USER_SEARCH_LIMIT
+    AUTOCOMPLETE_REBUILD_SECONDS = AUTOCOMPLETE_REBUILD_SECONDS
+    SEARCH_BACKEND = SEARCH_BACKEND
+    TIMELINE_ENABLED = TIMELINE_ENABLED
+    TIMELINE_REDIS_URL = TIMELINE_REDIS_URL
+    TIMELINE_MEMORY_STORE = TIMELINE_MEMORY_STORE
+    TIMELINE_MAX_LENGTH = TIMELINE_MAX_LENGTH
+    CELEBRITY_FOLLOWER_THRESHOLD = CELEBRITY_FOLLOWER_THRESHOLD
+    TIMELINE_FANOUT_BATCH_SIZE = TIMELINE_FANOUT_BATCH_SIZE
+    LIKE_BUFFER_FLUSH_INTERVAL = LIKE_BUFFER_FLUSH_INTERVAL
+    LIKE_BUFFER_MAX_PENDING = LIKE_BUFFER_MAX_PENDING
+    TRENDING_BUCKET_SECONDS = TRENDING_BUCKET_SECONDS
+    TRENDING_REFRESH_SECONDS = TRENDING_REFRESH_SECONDS
+    TRENDING_DEFAULT_WINDOW = TRENDING_DEFAULT_WINDOW
     PERMANENT_SESSION_LIFETIME = PERMANENT_SESSION_LIFETIME
 
 
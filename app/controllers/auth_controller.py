@@ -1,14 +1,14 @@
-from flask import Flask, render_template, request, redirect, url_for, session, flash
+from flask import Blueprint, render_template, request, redirect, url_for, session, flash
 from werkzeug.security import generate_password_hash, check_password_hash
-from flask_login import LoginManager, login_user, login_required, logout_user, current_user
+from flask_login import login_user, login_required, logout_user, current_user
 from models import User  # Assume User model is defined in user.py
 from database import db  # Assuming database.py handles the DB session
+from extensions import login_manager
+from utils.cache import cached_view, viewer_key
+from utils.autocomplete import note_user_created
 
-# Initialize Flask app and Flask-Login
-app = Flask(__name__)
-app.config['SECRET_KEY'] = 'your_secret_key'
-login_manager = LoginManager()
-login_manager.init_app(app)
+# Authentication routes
+auth_bp = Blueprint('auth', __name__)
 
 # ---------------------- User Loader ---------------------- #
 @login_manager.user_loader
@@ -17,7 +17,7 @@ def load_user(user_id):
     return User.query.get(int(user_id))
 
 # ---------------------- Sign Up Route ---------------------- #
-@app.route('/signup', methods=['GET', 'POST'])
+@auth_bp.route('/signup', methods=['GET', 'POST'])
 def signup():
     """Route for new user registration."""
     if request.method == 'POST':
@@ -29,13 +29,13 @@ def signup():
         # Validate password match
         if password != password_confirm:
             flash("Passwords do not match.", 'danger')
-            return redirect(url_for('signup'))
+            return redirect(url_for('.signup'))
         
         # Check if username or email already exists
         existing_user = User.query.filter((User.username == username) | (User.email == email)).first()
         if existing_user:
             flash("Username or Email already exists.", 'danger')
-            return redirect(url_for('signup'))
+            return redirect(url_for('.signup'))
         
         # Create a new user and hash the password
         hashed_password = generate_password_hash(password, method='sha256')
@@ -44,14 +44,15 @@ def signup():
         # Add the new user to the database
         db.session.add(new_user)
         db.session.commit()
+        note_user_created(new_user)
 
         flash("Registration successful! Please log in.", 'success')
-        return redirect(url_for('login'))
+        return redirect(url_for('.login'))
     
     return render_template('signup.html')
 
 # ---------------------- Login Route ---------------------- #
-@app.route('/login', methods=['GET', 'POST'])
+@auth_bp.route('/login', methods=['GET', 'POST'])
 def login():
     """Route for user login."""
     if request.method == 'POST':
@@ -65,31 +66,32 @@ def login():
             # Log in the user
             login_user(user)
             flash("Login successful!", 'success')
-            return redirect(url_for('feed'))  # Redirect to the feed page after successful login
+            return redirect(url_for('post.feed'))  # Redirect to the feed page after successful login
         else:
             flash("Invalid credentials. Please try again.", 'danger')
-            return redirect(url_for('login'))
+            return redirect(url_for('.login'))
     
     return render_template('login.html')
 
 # ---------------------- Logout Route ---------------------- #
-@app.route('/logout')
+@auth_bp.route('/logout')
 @login_required
 def logout():
     """Route for user logout."""
     logout_user()
     flash("You have been logged out.", 'info')
-    return redirect(url_for('login'))
+    return redirect(url_for('.login'))
 
 # ---------------------- User Profile Route ---------------------- #
-@app.route('/profile')
+@auth_bp.route('/profile')
 @login_required
+@cached_view('profile', scope=lambda: viewer_key())
 def profile():
     """Route for viewing and editing the user's profile."""
     return render_template('profile.html', user=current_user)
 
 # ---------------------- Password Reset Request ---------------------- #
-@app.route('/reset-password', methods=['GET', 'POST'])
+@auth_bp.route('/reset-password', methods=['GET', 'POST'])
 def reset_password():
     """Route for requesting a password reset."""
     if request.method == 'POST':
@@ -102,19 +104,19 @@ def reset_password():
         else:
             flash("Email not found.", 'danger')
         
-        return redirect(url_for('login'))
+        return redirect(url_for('.login'))
     
     return render_template('reset_password.html')
 
 # ---------------------- Password Reset Route ---------------------- #
-@app.route('/reset-password/<token>', methods=['GET', 'POST'])
+@auth_bp.route('/reset-password/<token>', methods=['GET', 'POST'])
 def reset_password_token(token):
     """Route for resetting the password using the token sent via email."""
     # Verify token (this would require JWT or another token-based method)
     user = verify_reset_token(token)  # Implement the token verification logic
     if user is None:
         flash("Invalid or expired token.", 'danger')
-        return redirect(url_for('login'))
+        return redirect(url_for('.login'))
 
     if request.method == 'POST':
         password = request.form['password']
@@ -122,7 +124,7 @@ def reset_password_token(token):
 
         if password != password_confirm:
             flash("Passwords do not match.", 'danger')
-            return redirect(url_for('reset_password_token', token=token))
+            return redirect(url_for('.reset_password_token', token=token))
         
         # Update the user's password
         hashed_password = generate_password_hash(password, method='sha256')
@@ -130,7 +132,7 @@ def reset_password_token(token):
         db.session.commit()
 
         flash("Password has been reset successfully.", 'success')
-        return redirect(url_for('login'))
+        return redirect(url_for('.login'))
 
     return render_template('reset_password_token.html', token=token)
 
@@ -140,7 +142,3 @@ def verify_reset_token(token):
     # In practice, you would decode the token here and return the user if valid.
     # Here, it's just a placeholder.
     return None  # Replace with real verification logic.
-
-# ---------------------- Run Application ---------------------- #
-if __name__ == '__main__':
-    app.run(debug=True)
@@ -1,74 +1,138 @@
-from flask import Flask, render_template, request, redirect, url_for, flash
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
 from flask_login import login_required, current_user
 from models import Post, Hashtag, User  # Assuming the Post and Hashtag models are defined in post.py and hashtag.py
+from models.hashtag import normalize_hashtags
 from database import db  # Assuming database.py handles the DB session
 from sqlalchemy import func
-
-# Initialize Flask app
-app = Flask(__name__)
-app.config['SECRET_KEY'] = 'your_secret_key'
+from utils.cache import get_or_set
+from utils.feed import followed_ids_query, paginate_posts
+from utils.filters import FilterSpec
+from utils.query_options import load_post_stats, post_list_options, posts_by_ids
+from utils.trending import get_trending_hashtags
+from utils.autocomplete import autocomplete, search_hashtags_by_prefix
+from utils.search import search
+
+# Explore and discovery routes
+explore_bp = Blueprint('explore', __name__)
+
+# Seconds a cached ranking may lag behind new likes and comments
+RANKING_CACHE_TIMEOUT = 60
+
+# ---------------------- Cached Rankings ---------------------- #
+# Rankings are shared by every viewer, so only ids are cached; liked state is added per viewer.
+def trending_post_ids(limit):
+    """Ids of the most engaged posts."""
+    return get_or_set('trending', [limit], lambda: [row[0] for row in db.session.query(Post.id).filter(Post.media_status == 'ready').order_by(
+        Post.like_count.desc(), Post.comment_count.desc()).limit(limit)], timeout=RANKING_CACHE_TIMEOUT)
+
+def hashtag_page(hashtag_name, cursor=None):
+    """
+    One newest-first page of the posts tagged with a hashtag, as (posts, next_cursor). Only the
+    first page's ids are cached, so a popular tag costs one page however many posts use it.
+    """
+    names = normalize_hashtags([hashtag_name])
+    if not names:
+        return [], None
+    spec = FilterSpec().add('hashtags', names)
+    query = Post.query.options(*post_list_options())
+    if cursor:
+        return spec.page(query, cursor)
+
+    def first_page():
+        posts, next_cursor = spec.page(query)
+        return [post.id for post in posts], next_cursor
+
+    ids, next_cursor = get_or_set('hashtag', [], first_page, scope=names[0])
+    return posts_by_ids(ids), next_cursor
 
 # ---------------------- Explore Page Route ---------------------- #
-@app.route('/explore', methods=['GET'])
+@explore_bp.route('/explore', methods=['GET'])
 @login_required
 def explore():
     """Route to display the explore page, featuring trending posts, hashtags, and recommended content."""
     
-    # Fetch trending posts - Sorted by the number of likes and comments
-    trending_posts = Post.query.outerjoin(Post.likes).outerjoin(Post.comments).group_by(Post.id).order_by(
-        func.count(Post.likes).desc(), func.count(Post.comments).desc()).limit(20).all()
+    # Fetch trending posts - Sorted by the denormalized like and comment counters
+    trending_posts = posts_by_ids(trending_post_ids(20))
 
-    # Fetch trending hashtags - Sorted by usage frequency
-    trending_hashtags = Hashtag.query.join(Post).group_by(Hashtag.id).order_by(func.count(Post.id).desc()).limit(10).all()
+    # Fetch trending hashtags - Precomputed from recent usage buckets (window: 1h, 24h or 7d)
+    trending_hashtags = get_trending_hashtags(request.args.get('window'), 10)
 
-    # Personalized recommendations - Posts liked by people you follow
-    following_posts = db.session.query(Post).join(User.following).filter(User.id == current_user.id).all()
+    # Personalized recommendations - Posts by people you follow, one page per cursor
+    following_posts, following_cursor = paginate_posts(
+        Post.query.options(*post_list_options()).filter(Post.user_id.in_(followed_ids_query(current_user.id))),
+        request.args.get('cursor'))
 
     # Discover posts from hashtags (optional)
     hashtag = request.args.get('hashtag')
     if hashtag:
-        posts_by_hashtag = Post.query.join(Post.hashtags).filter(Hashtag.name == hashtag).all()
+        posts_by_hashtag, hashtag_cursor = hashtag_page(hashtag, request.args.get('hashtag_cursor'))
     else:
-        posts_by_hashtag = []
+        posts_by_hashtag, hashtag_cursor = [], None
+
+    # Batch-load engagement for every post on the page in one pass
+    load_post_stats(trending_posts + following_posts + posts_by_hashtag, current_user.id)
 
     return render_template(
         'explore.html',
         trending_posts=trending_posts,
         trending_hashtags=trending_hashtags,
         following_posts=following_posts,
+        following_cursor=following_cursor,
         posts_by_hashtag=posts_by_hashtag,
+        hashtag_cursor=hashtag_cursor,
         hashtag=hashtag
     )
 
 # ---------------------- Search Hashtags ---------------------- #
-@app.route('/search_hashtags', methods=['GET'])
+@explore_bp.route('/search_hashtags', methods=['GET'])
 @login_required
 def search_hashtags():
     """Route to search for posts by hashtags."""
     
     hashtag_query = request.args.get('q', '').strip()
 
-    if hashtag_query:
-        hashtags = Hashtag.query.filter(Hashtag.name.ilike(f'%{hashtag_query}%')).all()
-    else:
-        hashtags = []
+    # Prefix matches from the in-memory index, most used first
+    hashtags = search_hashtags_by_prefix(hashtag_query)
 
     return render_template('search_hashtags.html', hashtags=hashtags, hashtag_query=hashtag_query)
 
+# ---------------------- Full-Text Search ---------------------- #
+@explore_bp.route('/search', methods=['GET'])
+@login_required
+def search_content():
+    """Search post text or reel captions (?q=..&type=posts|reels), one page per cursor."""
+    query = request.args.get('q', '').strip()
+    kind = 'reels' if request.args.get('type') == 'reels' else 'posts'
+    results, next_cursor = search(kind, query, cursor=request.args.get('cursor'))
+    if kind == 'posts':
+        load_post_stats(results, current_user.id)
+
+    return render_template('search.html', results=results, kind=kind, query=query, next_cursor=next_cursor)
+
+# ---------------------- Autocomplete ---------------------- #
+@explore_bp.route('/autocomplete', methods=['GET'])
+@login_required
+def autocomplete_suggestions():
+    """Typeahead suggestions for hashtags and usernames (?q=prefix&type=hashtags|users|all) as JSON."""
+    kind = request.args.get('type', 'all')
+    if kind not in ('hashtags', 'users', 'all'):
+        kind = 'all'
+    return jsonify(autocomplete(request.args.get('q', ''), kind))
+
 # ---------------------- Explore Trending Posts ---------------------- #
-@app.route('/trending', methods=['GET'])
+@explore_bp.route('/trending', methods=['GET'])
 @login_required
 def trending():
     """Route to view the most popular or trending posts globally."""
     
     # Get posts with the most engagement (likes/comments)
-    trending_posts = Post.query.outerjoin(Post.likes).outerjoin(Post.comments).group_by(Post.id).order_by(
-        func.count(Post.likes).desc(), func.count(Post.comments).desc()).limit(10).all()
+    trending_posts = posts_by_ids(trending_post_ids(10))
+    load_post_stats(trending_posts, current_user.id)
 
     return render_template('trending_posts.html', trending_posts=trending_posts)
 
 # ---------------------- Follow Recommendations ---------------------- #
-@app.route('/follow_recommendations', methods=['GET'])
+@explore_bp.route('/follow_recommendations', methods=['GET'])
 @login_required
 def follow_recommendations():
     """Route to show user follow recommendations based on interests."""
@@ -79,7 +143,7 @@ def follow_recommendations():
     return render_template('follow_recommendations.html', recommended_users=recommended_users)
 
 # ---------------------- Like a Post ---------------------- #
-@app.route('/like_post/<int:post_id>', methods=['POST'])
+@explore_bp.route('/explore/like_post/<int:post_id>', methods=['POST'])
 @login_required
 def like_post(post_id):
     """Route to like a post."""
@@ -87,7 +151,7 @@ def like_post(post_id):
     post = Post.query.get(post_id)
     if not post:
         flash("Post not found.", 'danger')
-        return redirect(url_for('explore'))
+        return redirect(url_for('.explore'))
 
     if post not in current_user.liked_posts:
         current_user.liked_posts.append(post)
@@ -96,10 +160,10 @@ def like_post(post_id):
     else:
         flash("You already liked this post.", 'warning')
 
-    return redirect(url_for('explore'))
+    return redirect(url_for('.explore'))
 
 # ---------------------- Save Post ---------------------- #
-@app.route('/save_post/<int:post_id>', methods=['POST'])
+@explore_bp.route('/save_post/<int:post_id>', methods=['POST'])
 @login_required
 def save_post(post_id):
     """Route to save a post for later viewing."""
@@ -107,7 +171,7 @@ def save_post(post_id):
     post = Post.query.get(post_id)
     if not post:
         flash("Post not found.", 'danger')
-        return redirect(url_for('explore'))
+        return redirect(url_for('.explore'))
 
     if post not in current_user.saved_posts:
         current_user.saved_posts.append(post)
@@ -116,23 +180,20 @@ def save_post(post_id):
     else:
         flash("This post is already saved.", 'warning')
 
-    return redirect(url_for('explore'))
+    return redirect(url_for('.explore'))
 
 # ---------------------- Discover Posts by Hashtags ---------------------- #
-@app.route('/hashtag/<string:hashtag_name>', methods=['GET'])
+@explore_bp.route('/hashtag/<string:hashtag_name>', methods=['GET'])
 @login_required
 def discover_by_hashtag(hashtag_name):
     """Route to view posts associated with a specific hashtag."""
     
-    hashtag = Hashtag.query.filter_by(name=hashtag_name).first()
+    hashtag = Hashtag.query.filter_by(hashtag=hashtag_name).first()
     if not hashtag:
         flash(f"Hashtag #{hashtag_name} not found.", 'danger')
-        return redirect(url_for('explore'))
-
-    posts_with_hashtag = Post.query.join(Post.hashtags).filter(Hashtag.name == hashtag_name).all()
+        return redirect(url_for('.explore'))
 
-    return render_template('hashtag_posts.html', posts=posts_with_hashtag, hashtag=hashtag_name)
+    posts_with_hashtag, next_cursor = hashtag_page(hashtag_name, request.args.get('cursor'))
+    load_post_stats(posts_with_hashtag, current_user.id)
 
-# ---------------------- Run the Application ---------------------- #
-if __name__ == '__main__':
-    app.run(debug=True)
+    return render_template('hashtag_posts.html', posts=posts_with_hashtag, hashtag=hashtag_name, next_cursor=next_cursor)
@@ -0,0 +1,90 @@
+from flask import Blueprint, render_template, redirect, url_for, request, flash, jsonify
+from flask_login import login_required, current_user
+from flask_mail import Message as MailMessage
+from models import User, Message
+from database import db, pool_stats
+from extensions import mail
+from utils.cache import cache_stats
+from utils.autocomplete import note_user_created
+
+# Site-wide routes that no other controller owns
+main_bp = Blueprint('main', __name__)
+
+# ---------------------- Home Route ---------------------- #
+@main_bp.route('/')
+def index():
+    return render_template('index.html')
+
+# ---------------------- Direct Messages Route ---------------------- #
+@main_bp.route('/messages')
+@login_required
+def messages():
+    # Fetch the user messages
+    messages = Message.query.filter_by(recipient_id=current_user.id).all()
+    return render_template('dm.html', messages=messages)
+
+# ---------------------- Register Route ---------------------- #
+@main_bp.route('/register', methods=['GET', 'POST'])
+def register():
+    if request.method == 'POST':
+        username = request.form['username']
+        email = request.form['email']
+        password = request.form['password']
+        user = User(username=username, email=email)
+        user.set_password(password)
+        db.session.add(user)
+        db.session.commit()
+        note_user_created(user)
+        flash("You have successfully registered", "success")
+        return redirect(url_for('auth.login'))
+
+    return render_template('register.html')
+
+# ---------------------- Reset Password Route (send reset link) ---------------------- #
+@main_bp.route('/reset_password', methods=['GET', 'POST'])
+def reset_password():
+    if request.method == 'POST':
+        email = request.form['email']
+        user = User.query.filter_by(email=email).first()
+        if user:
+            # Send email with reset link (use Flask-Mail)
+            token = user.get_reset_token()
+            msg = MailMessage("Password Reset Request", recipients=[email])
+            msg.body = f"To reset your password, visit the following link: {url_for('.reset_token', token=token, _external=True)}"
+            mail.send(msg)
+            flash("A password reset link has been sent to your email", "info")
+        else:
+            flash("Email address not found.", "danger")
+
+    return render_template('reset_password.html')
+
+# ---------------------- Reset Token Route ---------------------- #
+@main_bp.route('/reset_password/<token>', methods=['GET', 'POST'])
+def reset_token(token):
+    user = User.verify_reset_token(token)
+    if not user:
+        flash("The token is invalid or expired", "danger")
+        return redirect(url_for('.reset_password'))
+
+    if request.method == 'POST':
+        password = request.form['password']
+        user.set_password(password)
+        db.session.commit()
+        flash("Your password has been updated!", "success")
+        return redirect(url_for('auth.login'))
+
+    return render_template('reset_token.html')
+
+# ---------------------- Pool Metrics Route ---------------------- #
+@main_bp.route('/metrics/db_pool')
+@login_required
+def db_pool_metrics():
+    """Connection pool statistics (checkouts, waits, wait time) for dashboards."""
+    return jsonify(pool_stats())
+
+# ---------------------- Cache Metrics Route ---------------------- #
+@main_bp.route('/metrics/cache')
+@login_required
+def cache_metrics():
+    """Cache hits, misses and hit ratio per key family for dashboards."""
+    return jsonify(cache_stats())
@@ -0,0 +1,18 @@
+import os
+from flask import Blueprint, abort, current_app
+from werkzeug.security import safe_join
+from utils.media import send_media
+
+# Serves uploaded media from MEDIA_ROOT (MEDIA_URL points here)
+media_bp = Blueprint('media', __name__)
+
+# ---------------------- Serve Media ---------------------- #
+@media_bp.route('/media/<path:path>')
+def serve_media(path):
+    """Route to serve a processed media file, with range requests and long-lived caching."""
+    full_path = safe_join(current_app.config['MEDIA_ROOT'], path)
+    staging_dir = os.path.join(os.path.abspath(current_app.config['MEDIA_STAGING_DIR']), '')
+    # Staged uploads are unprocessed and may still carry metadata; never serve them
+    if full_path is None or os.path.abspath(full_path).startswith(staging_dir) or not os.path.isfile(full_path):
+        abort(404)
+    return send_media(full_path, path)
@@ -1,15 +1,15 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, session
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session
 from flask_login import login_required, current_user
 from models import Message, User  # Assuming Message model is defined in message.py
 from database import db  # Assuming database.py handles the DB session
 from datetime import datetime
+from utils.search import search
 
-# Initialize Flask app
-app = Flask(__name__)
-app.config['SECRET_KEY'] = 'your_secret_key'
+# Direct message routes
+message_bp = Blueprint('message', __name__)
 
 # ---------------------- Send Message Route ---------------------- #
-@app.route('/send_message/<int:recipient_id>', methods=['GET', 'POST'])
+@message_bp.route('/send_message/<int:recipient_id>', methods=['GET', 'POST'])
 @login_required
 def send_message(recipient_id):
     """Route to send a message to another user."""
@@ -19,7 +19,7 @@ def send_message(recipient_id):
         content = request.form['content']
         if not content:
             flash("Please enter a message.", 'danger')
-            return redirect(url_for('send_message', recipient_id=recipient.id))
+            return redirect(url_for('.send_message', recipient_id=recipient.id))
 
         # Create a new message
         new_message = Message(sender_id=current_user.id, recipient_id=recipient.id, content=content, timestamp=datetime.utcnow())
@@ -27,12 +27,12 @@ def send_message(recipient_id):
         db.session.commit()
 
         flash("Message sent successfully!", 'success')
-        return redirect(url_for('view_conversation', recipient_id=recipient.id))
+        return redirect(url_for('.view_conversation', recipient_id=recipient.id))
 
     return render_template('send_message.html', recipient=recipient)
 
 # ---------------------- View Messages Route ---------------------- #
-@app.route('/messages/<int:recipient_id>')
+@message_bp.route('/messages/<int:recipient_id>')
 @login_required
 def view_conversation(recipient_id):
     """Route to view a conversation with another user."""
@@ -48,7 +48,7 @@ def view_conversation(recipient_id):
     return render_template('view_conversation.html', conversation=conversation, recipient=recipient)
 
 # ---------------------- Delete Message Route ---------------------- #
-@app.route('/delete_message/<int:message_id>', methods=['POST'])
+@message_bp.route('/delete_message/<int:message_id>', methods=['POST'])
 @login_required
 def delete_message(message_id):
     """Route to delete a message."""
@@ -56,7 +56,7 @@ def delete_message(message_id):
 
     if not message:
         flash("Message not found.", 'danger')
-        return redirect(url_for('view_conversation', recipient_id=message.recipient_id))
+        return redirect(url_for('.view_conversation', recipient_id=message.recipient_id))
 
     # Only the sender or recipient of the message can delete it
     if message.sender_id == current_user.id or message.recipient_id == current_user.id:
@@ -66,10 +66,10 @@ def delete_message(message_id):
     else:
         flash("You are not authorized to delete this message.", 'danger')
 
-    return redirect(url_for('view_conversation', recipient_id=message.recipient_id))
+    return redirect(url_for('.view_conversation', recipient_id=message.recipient_id))
 
 # ---------------------- Mark Message as Read ---------------------- #
-@app.route('/mark_as_read/<int:message_id>', methods=['POST'])
+@message_bp.route('/mark_as_read/<int:message_id>', methods=['POST'])
 @login_required
 def mark_as_read(message_id):
     """Route to mark a message as read."""
@@ -82,10 +82,10 @@ def mark_as_read(message_id):
     else:
         flash("Message not found or you are not the recipient.", 'danger')
 
-    return redirect(url_for('view_conversation', recipient_id=message.sender_id))
+    return redirect(url_for('.view_conversation', recipient_id=message.sender_id))
 
 # ---------------------- View All Messages ---------------------- #
-@app.route('/inbox')
+@message_bp.route('/inbox')
 @login_required
 def inbox():
     """Route to view the inbox with all conversations."""
@@ -97,24 +97,17 @@ def inbox():
     return render_template('inbox.html', conversations=conversations)
 
 # ---------------------- Search Messages ---------------------- #
-@app.route('/search_messages', methods=['GET'])
+@message_bp.route('/search_messages', methods=['GET'])
 @login_required
 def search_messages():
-    """Route to search messages."""
+    """Route to search the current user's messages, best match first, one page per cursor."""
     query = request.args.get('q', '').strip()
+    messages, next_cursor = search('messages', query, cursor=request.args.get('cursor'), user_id=current_user.id)
 
-    if query:
-        messages = Message.query.filter(
-            (Message.sender_id == current_user.id) | (Message.recipient_id == current_user.id),
-            Message.content.ilike(f'%{query}%')
-        ).order_by(Message.timestamp.desc()).all()
-    else:
-        messages = []
-
-    return render_template('search_messages.html', messages=messages, query=query)
+    return render_template('search_messages.html', messages=messages, query=query, next_cursor=next_cursor)
 
 # ---------------------- Notifications for New Messages ---------------------- #
-@app.route('/check_notifications')
+@message_bp.route('/check_notifications')
 @login_required
 def check_notifications():
     """Route to check for new messages."""
@@ -124,14 +117,10 @@ def check_notifications():
     if unread_messages:
         flash(f"You have {len(unread_messages)} new messages.", 'info')
 
-    return redirect(url_for('inbox'))
+    return redirect(url_for('.inbox'))
 
 # ---------------------- Helper Function for Real-time Notifications ---------------------- #
 def send_message_notification(sender_id, recipient_id, message_content):
     """Helper function to send real-time notifications when a message is received."""
     # Here you can implement the code to send notifications (e.g., email, app notifications, etc.)
     pass
-
-# ---------------------- Run the Application ---------------------- #
-if __name__ == '__main__':
-    app.run(debug=True)
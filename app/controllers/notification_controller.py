@@ -1,10 +1,18 @@
-from flask import render_template, redirect, url_for, request, flash
+from flask import Blueprint, render_template, redirect, url_for, request, flash
 from flask_login import login_required, current_user
-from models import Notification, User
+from models import Notification, User, Post, Comment
 from database import db  # Assuming database.py handles the DB session
+from itertools import islice
+from sqlalchemy import insert
+from utils.cache import on_post_engagement
+from utils.counters import increment_counter
+from utils.like_buffer import LikeBufferFull, get_post_like_buffer
+
+# Notification routes
+notification_bp = Blueprint('notification', __name__)
 
 # ---------------------- Notification Center Route ---------------------- #
-@app.route('/notifications')
+@notification_bp.route('/notifications')
 @login_required
 def notifications():
     """Route to display all notifications for the logged-in user."""
@@ -14,14 +22,14 @@ def notifications():
     
     # Mark notifications as read (optional: only unread notifications)
     for notification in notifications:
-        if not notification.read:
-            notification.read = True
+        if not notification.is_read:
+            notification.is_read = True
     db.session.commit()
 
     return render_template('notifications.html', notifications=notifications)
 
 # ---------------------- Notification Settings Route ---------------------- #
-@app.route('/settings/notifications', methods=['GET', 'POST'])
+@notification_bp.route('/notifications/settings', methods=['GET', 'POST'])
 @login_required
 def notification_settings():
     """Route to update user's notification preferences."""
@@ -41,28 +49,28 @@ def notification_settings():
         db.session.commit()
 
         flash('Your notification preferences have been updated!', 'success')
-        return redirect(url_for('notifications'))
+        return redirect(url_for('.notifications'))
 
     return render_template('notification_settings.html', user=current_user)
 
 # ---------------------- Mark Notification as Read ---------------------- #
-@app.route('/notifications/mark_read/<int:notification_id>', methods=['POST'])
+@notification_bp.route('/notifications/mark_read/<int:notification_id>', methods=['POST'])
 @login_required
 def mark_notification_as_read(notification_id):
     """Route to mark a notification as read."""
     
     notification = Notification.query.get_or_404(notification_id)
     if notification.user_id == current_user.id:
-        notification.read = True
+        notification.is_read = True
         db.session.commit()
         flash('Notification marked as read.', 'success')
     else:
         flash('You cannot mark this notification as read.', 'danger')
     
-    return redirect(url_for('notifications'))
+    return redirect(url_for('.notifications'))
 
 # ---------------------- Delete Notification ---------------------- #
-@app.route('/notifications/delete/<int:notification_id>', methods=['POST'])
+@notification_bp.route('/notifications/delete/<int:notification_id>', methods=['POST'])
 @login_required
 def delete_notification(notification_id):
     """Route to delete a notification."""
@@ -75,7 +83,7 @@ def delete_notification(notification_id):
     else:
         flash('You cannot delete this notification.', 'danger')
     
-    return redirect(url_for('notifications'))
+    return redirect(url_for('.notifications'))
 
 # ---------------------- Send Notification ---------------------- #
 def send_notification(user_id, notification_type, message):
@@ -86,52 +94,79 @@ def send_notification(user_id, notification_type, message):
         user_id=user_id,
         notification_type=notification_type,
         message=message,
-        read=False
+        is_read=False
     )
     
     # Add to the session and commit to the database
     db.session.add(new_notification)
     db.session.commit()
 
+# ---------------------- Send Notification to Many Users ---------------------- #
+def send_bulk_notification(user_ids, notification_type, message, chunk_size=1000):
+    """Helper function to send the same notification to many users (e.g. all followers) in one transaction."""
+    
+    rows = ({'user_id': user_id, 'notification_type': notification_type, 'message': message, 'is_read': False}
+            for user_id in user_ids)
+
+    # Insert in executemany chunks so large follower lists are streamed, then commit once
+    total = 0
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        db.session.execute(insert(Notification), chunk)
+        total += len(chunk)
+    db.session.commit()
+    return total
+
 # ---------------------- Trigger Notification on Like ---------------------- #
-@app.route('/like/<int:post_id>', methods=['POST'])
+@notification_bp.route('/like/<int:post_id>', methods=['POST'])
 @login_required
 def like_post(post_id):
     """Route to handle liking a post and sending notification."""
     
-    # Like the post (assumed logic)
+    # Like the post through the buffer; the like itself is written with the next batch
     post = Post.query.get_or_404(post_id)
-    post.likes.append(current_user)
-    db.session.commit()
+    try:
+        get_post_like_buffer().set_liked(current_user.id, post.id, True)
+    except LikeBufferFull:
+        flash("Too many likes are being saved. Please try again in a moment.", 'danger')
+        return redirect(url_for('post.feed'))
+    on_post_engagement(post.id)  # The buffer invalidates again once the like is written
 
     # Send notification to the post owner about the like
     send_notification(post.user_id, 'like', f"{current_user.username} liked your post.")
 
     flash('You liked this post!', 'success')
-    return redirect(url_for('feed'))
+    return redirect(url_for('post.feed'))
 
 # ---------------------- Trigger Notification on Comment ---------------------- #
-@app.route('/comment/<int:post_id>', methods=['POST'])
+@notification_bp.route('/comment/<int:post_id>', methods=['POST'])
 @login_required
 def comment_on_post(post_id):
     """Route to handle commenting on a post and sending notification."""
     
     comment_text = request.form.get('comment_text')
     post = Post.query.get_or_404(post_id)
+    if not comment_text:
+        flash("Please enter a comment.", 'danger')
+        return redirect(url_for('post.feed'))
     
-    # Add comment to the post (assumed logic)
-    comment = Comment(user_id=current_user.id, post_id=post.id, text=comment_text)
+    # Add comment to the post and bump its denormalized counter in the same transaction
+    comment = Comment(user_id=current_user.id, post_id=post.id, content=comment_text)
     db.session.add(comment)
+    increment_counter(Post, post.id, 'comment_count')
     db.session.commit()
+    on_post_engagement(post.id)
 
     # Send notification to the post owner about the comment
     send_notification(post.user_id, 'comment', f"{current_user.username} commented on your post.")
 
     flash('Your comment has been posted!', 'success')
-    return redirect(url_for('feed'))
+    return redirect(url_for('post.feed'))
 
 # ---------------------- Trigger Notification on Follow ---------------------- #
-@app.route('/follow/<int:user_id>', methods=['POST'])
+@notification_bp.route('/follow/<int:user_id>', methods=['POST'])
 @login_required
 def follow_user(user_id):
     """Route to handle following a user and sending notification."""
@@ -144,10 +179,7 @@ def follow_user(user_id):
     send_notification(user_to_follow.id, 'follow', f"{current_user.username} followed you.")
 
     flash(f"You are now following {user_to_follow.username}!", 'success')
-    return redirect(url_for('profile', username=user_to_follow.username))
+    return redirect(url_for('auth.profile', username=user_to_follow.username))
 
 # ---------------------- Real-time Notifications (Using WebSockets or Polling) ---------------------- #
 # Implement real-time notifications using WebSockets (e.g., Flask-SocketIO) or polling for instant updates
-
-if __name__ == '__main__':
-    app.run(debug=True)
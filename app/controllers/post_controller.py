@@ -1,16 +1,23 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, session
+from flask import Blueprint, current_app, render_template, request, redirect, url_for, flash, session
 from flask_login import login_required, current_user
 from models import Post, Comment, Like, User  # Assuming Post, Comment, Like models are defined in post.py
 from database import db  # Assuming database.py handles the DB session
-import os
-
-# Initialize Flask app
-app = Flask(__name__)
-app.config['SECRET_KEY'] = 'your_secret_key'
-app.config['UPLOAD_FOLDER'] = 'app/static/images/post_images'
+from utils.feed import get_feed_page
+from utils.filters import FilterSpec
+from utils.timeline import get_timeline_page
+from utils.query_options import load_post_stats, post_list_options
+from utils.counters import increment_counter
+from utils.like_buffer import LikeBufferFull, get_post_like_buffer
+from utils.cache import cached_view, on_post_changed, on_post_created, on_post_deleted, on_post_engagement
+from utils.media_pipeline import MediaQueueFull, accept_upload
+from utils.media_store import release_media
+from sqlalchemy.orm import joinedload
+
+# Post routes
+post_bp = Blueprint('post', __name__)
 
 # ---------------------- Create Post Route ---------------------- #
-@app.route('/create_post', methods=['GET', 'POST'])
+@post_bp.route('/create_post', methods=['GET', 'POST'])
 @login_required
 def create_post():
     """Route for creating a new post."""
@@ -20,144 +27,185 @@ def create_post():
 
         if not media_file:
             flash("Please upload an image or video.", 'danger')
-            return redirect(url_for('create_post'))
-
-        # Save the file to the specified folder
-        media_filename = os.path.join(app.config['UPLOAD_FOLDER'], media_file.filename)
-        media_file.save(media_filename)
-
-        # Create a new post entry in the database
-        new_post = Post(caption=caption, media_url=media_filename, user_id=current_user.id)
-        db.session.add(new_post)
-        db.session.commit()
+            return redirect(url_for('.create_post'))
+
+        def create_record(kind):
+            # Create the post right away; the pipeline attaches its media and marks it ready
+            post = Post(content=caption, user_id=current_user.id, media_status='processing')
+            db.session.add(post)
+            db.session.commit()
+            return post
+
+        # Stream the file to staging and resize it in the background
+        try:
+            new_post = accept_upload(media_file, 'post', create_record)
+        except MediaQueueFull:
+            flash("Too many uploads are being processed. Please try again in a moment.", 'danger')
+            return redirect(url_for('.create_post'))
+        if new_post is None:
+            flash("Unsupported file type.", 'danger')
+            return redirect(url_for('.create_post'))
+        on_post_created(new_post)  # Fanned out to timelines by the pipeline once its media is ready
 
         flash("Post created successfully!", 'success')
-        return redirect(url_for('feed'))
+        return redirect(url_for('.feed'))
 
     return render_template('create_post.html')
 
 # ---------------------- Feed Route ---------------------- #
-@app.route('/feed')
+@post_bp.route('/feed')
 @login_required
 def feed():
-    """Route to display all posts in the user's feed."""
-    posts = Post.query.order_by(Post.created_at.desc()).all()  # Get all posts in descending order
-    return render_template('feed.html', posts=posts)
+    """Route to display the posts of followed accounts, one cursor page at a time."""
+    page_loader = get_timeline_page if current_app.config.get('TIMELINE_ENABLED') else get_feed_page
+    posts, next_cursor = page_loader(current_user.id, request.args.get('cursor'))
+    load_post_stats(posts, current_user.id)
+    return render_template('feed.html', posts=posts, next_cursor=next_cursor)
+
+# ---------------------- User Post History Route ---------------------- #
+@post_bp.route('/user/<int:user_id>/posts')
+@login_required
+def user_posts(user_id):
+    """Route to browse one user's posts, filtered in SQL (media_type, since, until, hashtag, min_likes, min_comments)."""
+    user = User.query.get(user_id)
+    if not user:
+        flash("User not found.", 'danger')
+        return redirect(url_for('.feed'))
+    if user.is_private and user.id != current_user.id and not user.followers.filter_by(id=current_user.id).first():
+        flash("This account is private.", 'danger')
+        return redirect(url_for('.feed'))
+
+    spec = FilterSpec.from_args(request.args).add('user', user_id)
+    posts, next_cursor = spec.page(Post.query.options(*post_list_options()), request.args.get('cursor'))
+    load_post_stats(posts, current_user.id)
+    return render_template('user_posts.html', user=user, posts=posts, next_cursor=next_cursor)
 
 # ---------------------- View Post Route ---------------------- #
-@app.route('/post/<int:post_id>')
+@post_bp.route('/post/<int:post_id>')
 @login_required
+@cached_view('post', scope=lambda post_id: post_id, per_viewer=True)
 def view_post(post_id):
     """Route to view a single post and interact with it."""
-    post = Post.query.get(post_id)
+    post = Post.query.options(*post_list_options()).get(post_id)
     if not post:
         flash("Post not found.", 'danger')
-        return redirect(url_for('feed'))
+        return redirect(url_for('.feed'))
 
     # Get comments and likes for the post
-    comments = Comment.query.filter_by(post_id=post.id).all()
-    is_liked = Like.query.filter_by(post_id=post.id, user_id=current_user.id).first() is not None
+    comments = Comment.query.options(joinedload(Comment.user)).filter_by(post_id=post.id).all()
+    is_liked = get_post_like_buffer().is_liked(current_user.id, post.id)
 
     return render_template('view_post.html', post=post, comments=comments, is_liked=is_liked)
 
 # ---------------------- Like Post Route ---------------------- #
-@app.route('/like_post/<int:post_id>', methods=['POST'])
+@post_bp.route('/like_post/<int:post_id>', methods=['POST'])
 @login_required
 def like_post(post_id):
     """Route to like or unlike a post."""
     post = Post.query.get(post_id)
     if not post:
         flash("Post not found.", 'danger')
-        return redirect(url_for('feed'))
-
-    # Check if the user already liked the post
-    existing_like = Like.query.filter_by(post_id=post_id, user_id=current_user.id).first()
-    if existing_like:
-        db.session.delete(existing_like)
-        db.session.commit()
-        flash("Post unliked.", 'success')
-    else:
-        new_like = Like(post_id=post_id, user_id=current_user.id)
-        db.session.add(new_like)
-        db.session.commit()
+        return redirect(url_for('.feed'))
+
+    # Toggle through the like buffer, which batches writes and dedups repeated toggles
+    try:
+        liked = get_post_like_buffer().toggle(current_user.id, post_id)
+    except LikeBufferFull:
+        flash("Too many likes are being saved. Please try again in a moment.", 'danger')
+        return redirect(url_for('.view_post', post_id=post_id))
+    if liked:
         flash("Post liked.", 'success')
+    else:
+        flash("Post unliked.", 'success')
+    on_post_engagement(post_id)  # The buffer invalidates again once the like is written
 
-    return redirect(url_for('view_post', post_id=post_id))
+    return redirect(url_for('.view_post', post_id=post_id))
 
 # ---------------------- Comment on Post Route ---------------------- #
-@app.route('/comment_post/<int:post_id>', methods=['POST'])
+@post_bp.route('/comment_post/<int:post_id>', methods=['POST'])
 @login_required
 def comment_post(post_id):
     """Route to comment on a post."""
     post = Post.query.get(post_id)
     if not post:
         flash("Post not found.", 'danger')
-        return redirect(url_for('feed'))
+        return redirect(url_for('.feed'))
 
     comment_text = request.form['comment']
     if not comment_text:
         flash("Please enter a comment.", 'danger')
-        return redirect(url_for('view_post', post_id=post_id))
+        return redirect(url_for('.view_post', post_id=post_id))
 
     # Create a new comment and add it to the database
-    new_comment = Comment(post_id=post_id, user_id=current_user.id, text=comment_text)
+    new_comment = Comment(post_id=post_id, user_id=current_user.id, content=comment_text)
     db.session.add(new_comment)
+    increment_counter(Post, post_id, 'comment_count')
     db.session.commit()
+    on_post_engagement(post_id)
 
     flash("Comment added successfully!", 'success')
-    return redirect(url_for('view_post', post_id=post_id))
+    return redirect(url_for('.view_post', post_id=post_id))
 
 # ---------------------- Edit Post Route ---------------------- #
-@app.route('/edit_post/<int:post_id>', methods=['GET', 'POST'])
+@post_bp.route('/edit_post/<int:post_id>', methods=['GET', 'POST'])
 @login_required
 def edit_post(post_id):
     """Route to edit an existing post."""
     post = Post.query.get(post_id)
     if not post or post.user_id != current_user.id:
         flash("Post not found or you are not authorized.", 'danger')
-        return redirect(url_for('feed'))
+        return redirect(url_for('.feed'))
 
     if request.method == 'POST':
         caption = request.form['caption']
         media_file = request.files.get('media')  # File input for media (image/video)
 
-        # If media is uploaded, save it and update the post
-        if media_file:
-            media_filename = os.path.join(app.config['UPLOAD_FOLDER'], media_file.filename)
-            media_file.save(media_filename)
-            post.media_url = media_filename
+        def create_record(kind):
+            # Commit the blob reference before the pipeline, on its own session, processes it
+            db.session.commit()
+            return post
 
-        post.caption = caption
+        # If media is uploaded, queue it; the post shows its old media until the new one is ready
+        if media_file:
+            try:
+                accepted = accept_upload(media_file, 'post', create_record)
+            except MediaQueueFull:
+                flash("Too many uploads are being processed. Please try again in a moment.", 'danger')
+                return redirect(url_for('.edit_post', post_id=post_id))
+            if accepted is None:
+                flash("Unsupported file type.", 'danger')
+                return redirect(url_for('.edit_post', post_id=post_id))
+
+        post.content = caption
         db.session.commit()
+        on_post_changed(post.id, post.user_id)
 
         flash("Post updated successfully!", 'success')
-        return redirect(url_for('view_post', post_id=post_id))
+        return redirect(url_for('.view_post', post_id=post_id))
 
     return render_template('edit_post.html', post=post)
 
 # ---------------------- Delete Post Route ---------------------- #
-@app.route('/delete_post/<int:post_id>', methods=['POST'])
+@post_bp.route('/delete_post/<int:post_id>', methods=['POST'])
 @login_required
 def delete_post(post_id):
     """Route to delete a post."""
     post = Post.query.get(post_id)
     if not post or post.user_id != current_user.id:
         flash("Post not found or you are not authorized.", 'danger')
-        return redirect(url_for('feed'))
+        return redirect(url_for('.feed'))
 
-    # Delete the post and associated likes and comments
+    # Delete the post and associated likes and comments; its files go once no other record uses them
+    release_media(post.image, post.video)
     db.session.delete(post)
     db.session.commit()
+    on_post_deleted(post_id, current_user.id)
 
     flash("Post deleted successfully.", 'success')
-    return redirect(url_for('feed'))
+    return redirect(url_for('.feed'))
 
 # ---------------------- Helper Function for File Management ---------------------- #
 def allowed_file(filename):
     """Helper function to check if the uploaded file is an allowed media type."""
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'mp4', 'mov'}
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
-
-# ---------------------- Run Application ---------------------- #
-if __name__ == '__main__':
-    app.run(debug=True)
@@ -1,15 +1,16 @@
-from flask import Flask, render_template, request, redirect, url_for, flash
+from flask import Blueprint, render_template, request, redirect, url_for, flash
 from flask_login import login_required, current_user
 from models import User  # Assuming the User model is defined in user.py
 from database import db  # Assuming database.py handles the DB session
 from werkzeug.security import generate_password_hash, check_password_hash
+from utils.cache import on_privacy_changed, on_profile_changed
+from utils.media_pipeline import MediaQueueFull, accept_upload
 
-# Initialize Flask app
-app = Flask(__name__)
-app.config['SECRET_KEY'] = 'your_secret_key'
+# Account settings routes
+settings_bp = Blueprint('settings', __name__)
 
 # ---------------------- Settings Page Route ---------------------- #
-@app.route('/settings', methods=['GET', 'POST'])
+@settings_bp.route('/settings', methods=['GET', 'POST'])
 @login_required
 def settings():
     """Route to display and update user settings page."""
@@ -29,20 +30,24 @@ def settings():
         if email and email != current_user.email:
             current_user.email = email
         
-        # Update Profile Picture (Optional: save the file to server and update the database)
+        # Update Profile Picture (Optional: resized in the background, then stored on the user)
         if profile_picture:
-            profile_picture_path = save_profile_picture(profile_picture)
-            current_user.profile_picture = profile_picture_path
+            try:
+                if not save_profile_picture(profile_picture):
+                    flash('Profile pictures must be images.', 'danger')
+            except MediaQueueFull:
+                flash('Too many uploads are being processed. Please try your picture again in a moment.', 'danger')
         
         # Commit the changes to the database
         db.session.commit()
+        on_profile_changed(current_user.id)
         flash('Your profile has been updated!', 'success')
-        return redirect(url_for('settings'))
+        return redirect(url_for('.settings'))
 
     return render_template('settings.html', user=current_user)
 
 # ---------------------- Change Password Route ---------------------- #
-@app.route('/settings/change_password', methods=['GET', 'POST'])
+@settings_bp.route('/settings/change_password', methods=['GET', 'POST'])
 @login_required
 def change_password():
     """Route to change the user's account password."""
@@ -55,24 +60,24 @@ def change_password():
         # Check if current password is correct
         if not check_password_hash(current_user.password, current_password):
             flash('Current password is incorrect.', 'danger')
-            return redirect(url_for('change_password'))
+            return redirect(url_for('.change_password'))
 
         # Check if new passwords match
         if new_password != confirm_new_password:
             flash('New passwords do not match.', 'danger')
-            return redirect(url_for('change_password'))
+            return redirect(url_for('.change_password'))
 
         # Update password (hash the new password before saving)
         hashed_password = generate_password_hash(new_password)
         current_user.password = hashed_password
         db.session.commit()
         flash('Your password has been updated!', 'success')
-        return redirect(url_for('settings'))
+        return redirect(url_for('.settings'))
 
     return render_template('change_password.html')
 
 # ---------------------- Privacy Settings Route ---------------------- #
-@app.route('/settings/privacy', methods=['GET', 'POST'])
+@settings_bp.route('/settings/privacy', methods=['GET', 'POST'])
 @login_required
 def privacy():
     """Route to manage privacy settings (e.g., account visibility, block users)."""
@@ -80,15 +85,16 @@ def privacy():
     if request.method == 'POST':
         # Update Privacy Settings: e.g., Make account private or public
         account_private = request.form.get('account_private') == 'on'
-        current_user.account_private = account_private
+        current_user.is_private = account_private
         db.session.commit()
+        on_privacy_changed(current_user.id)
         flash('Your privacy settings have been updated!', 'success')
-        return redirect(url_for('settings'))
+        return redirect(url_for('.settings'))
 
     return render_template('privacy.html', user=current_user)
 
 # ---------------------- Manage Notifications Route ---------------------- #
-@app.route('/settings/notifications', methods=['GET', 'POST'])
+@settings_bp.route('/settings/notifications', methods=['GET', 'POST'])
 @login_required
 def notifications():
     """Route to manage notification settings."""
@@ -105,12 +111,12 @@ def notifications():
         current_user.message_notifications = message_notifications
         db.session.commit()
         flash('Your notification preferences have been updated!', 'success')
-        return redirect(url_for('settings'))
+        return redirect(url_for('.settings'))
 
     return render_template('notifications.html', user=current_user)
 
 # ---------------------- Account Deactivation Route ---------------------- #
-@app.route('/settings/deactivate_account', methods=['POST'])
+@settings_bp.route('/settings/deactivate_account', methods=['POST'])
 @login_required
 def deactivate_account():
     """Route to deactivate a user account."""
@@ -119,16 +125,14 @@ def deactivate_account():
     current_user.is_active = False
     db.session.commit()
     flash('Your account has been deactivated.', 'info')
-    return redirect(url_for('logout'))
+    return redirect(url_for('auth.logout'))
 
 # ---------------------- Save Profile Picture Helper ---------------------- #
 def save_profile_picture(profile_picture):
-    """Helper function to save profile picture."""
-    
-    picture_filename = f"{current_user.id}_profile.jpg"  # You can change this logic to handle file extensions better
-    profile_picture.save(f"static/images/profile_pictures/{picture_filename}")
-    return f"/static/images/profile_pictures/{picture_filename}"
+    """Helper function to queue a profile picture for resizing. Returns False if it is not an image."""
+    def create_record(kind):
+        # Commit the blob reference before the pipeline, on its own session, processes it
+        db.session.commit()
+        return current_user
 
-# ---------------------- Run the Application ---------------------- #
-if __name__ == '__main__':
-    app.run(debug=True)
+    return accept_upload(profile_picture, 'avatar', create_record) is not None
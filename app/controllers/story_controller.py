@@ -1,120 +1,143 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, session
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify
 from flask_login import login_required, current_user
 from models import Story, User  # Assuming Story model is defined in story.py
 from database import db  # Assuming database.py handles the DB session
-import os
 from datetime import datetime, timedelta
+from utils.media_pipeline import MediaQueueFull, accept_resumable_upload, accept_upload
+from utils.media_store import release_media
+from utils.stories import get_story_tray, reap_expired_stories, story_tray_json
 
-# Initialize Flask app
-app = Flask(__name__)
-app.config['SECRET_KEY'] = 'your_secret_key'
-app.config['UPLOAD_FOLDER'] = 'app/static/images/stories'
+# Story routes
+story_bp = Blueprint('story', __name__)
 
 # ---------------------- Create Story Route ---------------------- #
-@app.route('/create_story', methods=['GET', 'POST'])
+@story_bp.route('/create_story', methods=['GET', 'POST'])
 @login_required
 def create_story():
     """Route for creating a new story."""
     if request.method == 'POST':
         story_text = request.form['story_text']
         media_file = request.files.get('media')  # File input for story media (image/video)
+        upload_id = request.form.get('upload_id')  # Or a finished resumable upload, for large videos
 
-        if not media_file:
+        if not media_file and not upload_id:
             flash("Please upload an image or video for your story.", 'danger')
-            return redirect(url_for('create_story'))
-
-        # Save the file to the specified folder
-        media_filename = os.path.join(app.config['UPLOAD_FOLDER'], media_file.filename)
-        media_file.save(media_filename)
-
-        # Create a new story entry in the database with an expiration time of 24 hours
-        expiration_time = datetime.utcnow() + timedelta(days=1)
-        new_story = Story(user_id=current_user.id, text=story_text, media_url=media_filename, expiration_time=expiration_time)
-        db.session.add(new_story)
-        db.session.commit()
+            return redirect(url_for('.create_story'))
+
+        def create_record(kind):
+            # Create a new story entry in the database with an expiration time of 24 hours
+            expiration_time = datetime.utcnow() + timedelta(days=1)
+            story = Story(user_id=current_user.id, content=story_text, expiration_time=expiration_time, media_status='processing')
+            db.session.add(story)
+            db.session.commit()
+            return story
+
+        # Stream the file to staging and process it in the background
+        try:
+            if upload_id:
+                from utils.uploads import get_upload
+                new_story = accept_resumable_upload(get_upload(upload_id, current_user.id), 'story', create_record)
+            else:
+                new_story = accept_upload(media_file, 'story', create_record)
+        except MediaQueueFull:
+            flash("Too many uploads are being processed. Please try again in a moment.", 'danger')
+            return redirect(url_for('.create_story'))
+        if new_story is None:
+            flash("Unsupported file type.", 'danger')
+            return redirect(url_for('.create_story'))
 
         flash("Story created successfully!", 'success')
-        return redirect(url_for('view_stories'))
+        return redirect(url_for('.view_stories'))
 
     return render_template('create_story.html')
 
 # ---------------------- View Stories Route ---------------------- #
-@app.route('/stories')
+@story_bp.route('/stories')
 @login_required
 def view_stories():
-    """Route to display all active stories."""
-    # Fetch all active stories (those that haven't expired yet)
-    current_time = datetime.utcnow()
-    stories = Story.query.filter(Story.expiration_time > current_time).order_by(Story.created_at.desc()).all()
+    """Route to display the active stories of followed accounts, grouped per author."""
+    tray = get_story_tray(current_user.id)
+    stories = [story for entry in tray for story in entry['stories']]
 
     # Check if there are no active stories
     if not stories:
         flash("No active stories right now.", 'info')
 
-    return render_template('view_stories.html', stories=stories)
+    return render_template('view_stories.html', tray=tray, stories=stories)
+
+# ---------------------- Story Tray API ---------------------- #
+@story_bp.route('/api/stories/tray')
+@login_required
+def story_tray():
+    """The story tray as JSON: one entry per followed author with active stories, the viewer first."""
+    return jsonify(story_tray_json(get_story_tray(current_user.id)))
 
 # ---------------------- Edit Story Route ---------------------- #
-@app.route('/edit_story/<int:story_id>', methods=['GET', 'POST'])
+@story_bp.route('/edit_story/<int:story_id>', methods=['GET', 'POST'])
 @login_required
 def edit_story(story_id):
     """Route to edit an existing story."""
     story = Story.query.get(story_id)
     if not story or story.user_id != current_user.id:
         flash("Story not found or you are not authorized.", 'danger')
-        return redirect(url_for('view_stories'))
+        return redirect(url_for('.view_stories'))
 
     if request.method == 'POST':
         story_text = request.form['story_text']
         media_file = request.files.get('media')  # File input for story media (image/video)
 
-        # If media is uploaded, save it and update the story
-        if media_file:
-            media_filename = os.path.join(app.config['UPLOAD_FOLDER'], media_file.filename)
-            media_file.save(media_filename)
-            story.media_url = media_filename
+        def create_record(kind):
+            # Commit the blob reference before the pipeline, on its own session, processes it
+            db.session.commit()
+            return story
 
-        story.text = story_text
+        # If media is uploaded, queue it; the story keeps its old media until the new one is ready
+        if media_file:
+            try:
+                accepted = accept_upload(media_file, 'story', create_record)
+            except MediaQueueFull:
+                flash("Too many uploads are being processed. Please try again in a moment.", 'danger')
+                return redirect(url_for('.edit_story', story_id=story_id))
+            if accepted is None:
+                flash("Unsupported file type.", 'danger')
+                return redirect(url_for('.edit_story', story_id=story_id))
+
+        story.content = story_text
         db.session.commit()
 
         flash("Story updated successfully!", 'success')
-        return redirect(url_for('view_stories'))
+        return redirect(url_for('.view_stories'))
 
     return render_template('edit_story.html', story=story)
 
 # ---------------------- Delete Story Route ---------------------- #
-@app.route('/delete_story/<int:story_id>', methods=['POST'])
+@story_bp.route('/delete_story/<int:story_id>', methods=['POST'])
 @login_required
 def delete_story(story_id):
     """Route to delete a story."""
     story = Story.query.get(story_id)
     if not story or story.user_id != current_user.id:
         flash("Story not found or you are not authorized.", 'danger')
-        return redirect(url_for('view_stories'))
+        return redirect(url_for('.view_stories'))
 
-    # Delete the story
+    # Delete the story; its files go once no other record uses them (see utils.media_store)
+    release_media(story.image, story.video)
     db.session.delete(story)
     db.session.commit()
 
     flash("Story deleted successfully.", 'success')
-    return redirect(url_for('view_stories'))
+    return redirect(url_for('.view_stories'))
 
 # ---------------------- Story Expiration Cleanup ---------------------- #
 def cleanup_expired_stories():
-    """Helper function to clean up expired stories."""
-    current_time = datetime.utcnow()
-    expired_stories = Story.query.filter(Story.expiration_time < current_time).all()
-
-    for story in expired_stories:
-        db.session.delete(story)
-
-    db.session.commit()
+    """
+    Helper function to clean up expired stories. Expiry runs in the background (`flask
+    reap-stories`), never on a request; the tray hides expired stories until then.
+    """
+    return reap_expired_stories()
 
 # ---------------------- Helper Function for File Management ---------------------- #
 def allowed_file(filename):
     """Helper function to check if the uploaded file is an allowed media type."""
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'mp4', 'mov'}
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
-
-# ---------------------- Run Application ---------------------- #
-if __name__ == '__main__':
-    app.run(debug=True)
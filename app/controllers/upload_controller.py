@@ -0,0 +1,89 @@
+import os
+from flask import Blueprint, current_app, request, jsonify
+from flask_login import login_required, current_user
+from database import db  # Assuming database.py handles the DB session
+from utils.uploads import TooManyUploads, UploadOffsetMismatch, append_chunk, get_upload, part_path, start_upload, upload_offset
+
+# Resumable upload routes: large files are sent in chunks, then attached by submitting the
+# usual form (e.g. /upload_reel) with upload_id instead of the file
+upload_bp = Blueprint('upload', __name__)
+
+def offset_response(upload, status=200):
+    """JSON progress of an upload, with the offset also in the Upload-Offset header."""
+    offset = upload_offset(upload)
+    response = jsonify({'upload_id': upload.id, 'offset': offset, 'size': upload.size,
+                        'chunk_size': current_app.config.get('MEDIA_UPLOAD_CHUNK_SIZE', 8 * 1024 * 1024)})
+    response.status_code = status
+    response.headers['Upload-Offset'] = str(offset)
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+# ---------------------- Start Upload ---------------------- #
+@upload_bp.route('/uploads', methods=['POST'])
+@login_required
+def create_upload():
+    """Route to start a resumable upload, given the file's name and size in bytes."""
+    data = request.get_json(silent=True) or request.form
+    try:
+        size = int(data.get('size', 0))
+    except (TypeError, ValueError):
+        size = 0
+    try:
+        upload = start_upload(current_user.id, data.get('filename', ''), size)
+    except TooManyUploads:
+        return jsonify({'error': 'Too many uploads in progress. Finish or cancel one first.'}), 429
+    if upload is None:
+        return jsonify({'error': 'Unsupported file type or size.'}), 400
+    return offset_response(upload, 201)
+
+# ---------------------- Upload Progress ---------------------- #
+@upload_bp.route('/uploads/<upload_id>', methods=['GET', 'HEAD'])
+@login_required
+def upload_status(upload_id):
+    """Route to get how much of an upload has arrived, to resume it after a failure."""
+    upload = get_upload(upload_id, current_user.id)
+    if upload is None:
+        return jsonify({'error': 'Upload not found.'}), 404
+    return offset_response(upload)
+
+# ---------------------- Append Chunk ---------------------- #
+@upload_bp.route('/uploads/<upload_id>', methods=['PATCH'])
+@login_required
+def append_upload(upload_id):
+    """Route to append the request body to an upload, at the offset given in Upload-Offset."""
+    upload = get_upload(upload_id, current_user.id)
+    if upload is None:
+        return jsonify({'error': 'Upload not found.'}), 404
+
+    length = request.content_length
+    if length is None:
+        return jsonify({'error': 'Content-Length is required.'}), 411
+    if length > current_app.config.get('MEDIA_UPLOAD_CHUNK_SIZE', 8 * 1024 * 1024):
+        return jsonify({'error': 'Chunk too large.'}), 413
+    try:
+        offset = int(request.headers.get('Upload-Offset', ''))
+    except ValueError:
+        return jsonify({'error': 'Upload-Offset is required.'}), 400
+
+    try:
+        # Read from the raw input stream: the body is never buffered in memory or a temp file
+        append_chunk(upload, offset, request.stream, length)
+    except UploadOffsetMismatch:
+        return offset_response(upload, 409)
+    except ValueError as error:
+        return jsonify({'error': str(error)}), 400
+    return offset_response(upload)
+
+# ---------------------- Cancel Upload ---------------------- #
+@upload_bp.route('/uploads/<upload_id>', methods=['DELETE'])
+@login_required
+def cancel_upload(upload_id):
+    """Route to abandon an upload and delete what has arrived."""
+    upload = get_upload(upload_id, current_user.id)
+    if upload is None:
+        return jsonify({'error': 'Upload not found.'}), 404
+    if os.path.exists(part_path(upload.id)):
+        os.remove(part_path(upload.id))
+    db.session.delete(upload)
+    db.session.commit()
+    return '', 204
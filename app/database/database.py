@@ -1,33 +1,245 @@
 import os
+import queue
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from itertools import islice
 from flask import g
-from contextlib import closing
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 
 # ---------------------- Database Configuration ---------------------- #
-DATABASE = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'app.db')
+# The one SQLite file holding every table; config.DATABASE_URI points SQLAlchemy at the same file
+DATABASE = os.environ.get('DATABASE_PATH', os.path.join(os.path.abspath(os.path.dirname(__file__)), 'app.db'))
+
+# Shared SQLAlchemy instance; every model module and the app bind to this one object
+db = SQLAlchemy()
+
+# ---------------------- Connection Pool Configuration ---------------------- #
+
+# Read connections kept per process. Writes always go through a single connection per process,
+# since SQLite allows one writer at a time and queuing in-process is cheaper than lock retries.
+READ_POOL_SIZE = int(os.environ.get('DB_READ_POOL_SIZE', 5))
+
+# Seconds a request waits for a free pooled connection before giving up
+POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 30))
+
+# Milliseconds SQLite retries on a lock held by another process before raising "database is locked"
+BUSY_TIMEOUT_MS = int(os.environ.get('DB_BUSY_TIMEOUT_MS', 5000))
+
+# Prepared statements cached per connection
+STATEMENT_CACHE_SIZE = 256
+
+# Parameter rows sent per executemany() call when streaming large iterables
+BULK_CHUNK_SIZE = int(os.environ.get('DB_BULK_CHUNK_SIZE', 1000))
+
+# Rows fetched per round trip by iter_rows()
+FETCH_ARRAYSIZE = int(os.environ.get('DB_FETCH_ARRAYSIZE', 500))
+
+# Pragmas applied to every new connection. WAL lets readers run alongside the writer, and
+# synchronous=NORMAL is durable under WAL except for the last commits on power loss.
+PRAGMAS = (
+    ('journal_mode', 'WAL'),
+    ('synchronous', 'NORMAL'),
+    ('busy_timeout', BUSY_TIMEOUT_MS),
+    ('cache_size', -int(os.environ.get('DB_CACHE_SIZE_KB', 20000))),  # Negative value means KiB
+    ('mmap_size', int(os.environ.get('DB_MMAP_SIZE', 256 * 1024 * 1024))),
+    ('temp_store', 'MEMORY'),
+)
+
+# ---------------------- SQLAlchemy Connections ---------------------- #
+@event.listens_for(Engine, 'connect')
+def _apply_pragmas(dbapi_connection, connection_record):
+    """Give ORM connections the same SQLite tuning as the raw pool."""
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        for name, value in PRAGMAS:
+            cursor.execute(f'PRAGMA {name} = {value}')
+        cursor.close()
+
+# ---------------------- Connection Pool ---------------------- #
+class ConnectionPool:
+    """A bounded pool of SQLite connections for one process, with checkout statistics."""
+
+    def __init__(self, database, size, readonly=False, timeout=POOL_TIMEOUT):
+        self.database = database
+        self.size = size
+        self.readonly = readonly
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()  # Reuse the most recently used (warmest) connection first
+        self._all = []
+        self._lock = threading.Lock()
+        self.stats = {'checkouts': 0, 'waits': 0, 'wait_time': 0.0, 'timeouts': 0, 'connections': 0}
+
+    def _connect(self):
+        """Open and tune a new connection."""
+        conn = sqlite3.connect(
+            self.database,
+            timeout=BUSY_TIMEOUT_MS / 1000,
+            cached_statements=STATEMENT_CACHE_SIZE,
+            check_same_thread=False  # Connections move between request threads via the pool
+        )
+        conn.row_factory = sqlite3.Row  # To get rows as dictionaries
+        for name, value in PRAGMAS:
+            conn.execute(f'PRAGMA {name} = {value}')
+        if self.readonly:
+            conn.execute('PRAGMA query_only = ON')
+        return conn
+
+    def acquire(self):
+        """Check out a connection, opening one if the pool is not full or waiting for one if it is."""
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = None
+            with self._lock:
+                if len(self._all) < self.size:
+                    conn = self._connect()
+                    self._all.append(conn)
+                    self.stats['connections'] = len(self._all)
+            if conn is None:
+                started = time.monotonic()
+                try:
+                    conn = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    with self._lock:
+                        self.stats['timeouts'] += 1
+                    raise sqlite3.OperationalError("Timed out waiting for a pooled database connection")
+                finally:
+                    with self._lock:
+                        self.stats['waits'] += 1
+                        self.stats['wait_time'] += time.monotonic() - started
+        with self._lock:
+            self.stats['checkouts'] += 1
+        return conn
+
+    def release(self, conn):
+        """Return a connection to the pool, rolling back anything left uncommitted."""
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    def snapshot(self):
+        """Copy of the pool statistics plus current usage."""
+        with self._lock:
+            stats = dict(self.stats)
+        stats['size'] = self.size
+        stats['idle'] = self._idle.qsize()
+        return stats
+
+    def close(self):
+        """Close every connection owned by the pool."""
+        with self._lock:
+            for conn in self._all:
+                conn.close()
+            self._all = []
+            self._idle = queue.LifoQueue()
+
+# ---------------------- Per-Process Pools ---------------------- #
+_pools = {}
+_pools_pid = None
+_pools_lock = threading.Lock()
+
+def get_pools():
+    """Return this process's (write, read) pools, recreating them after a fork."""
+    global _pools, _pools_pid
+    with _pools_lock:
+        if _pools_pid != os.getpid():
+            _pools = {
+                'write': ConnectionPool(DATABASE, 1),
+                'read': ConnectionPool(DATABASE, READ_POOL_SIZE, readonly=True),
+            }
+            _pools_pid = os.getpid()
+        return _pools
+
+def pool_stats():
+    """Checkout, wait and wait-time statistics for this process's pools (for dashboards)."""
+    return {name: pool.snapshot() for name, pool in get_pools().items()}
+
+def close_pools():
+    """Close every pooled connection in this process (e.g. at shutdown)."""
+    for pool in get_pools().values():
+        pool.close()
 
 # ---------------------- Connect to the Database ---------------------- #
-def get_db():
-    """Opens a new database connection if there is none yet for the current application context."""
+def get_db(readonly=False):
+    """
+    Returns a pooled connection for the current application context.
+
+    Writes use the process's single write connection. Reads use the read pool, except while the
+    write connection has an open transaction, so a request always sees its own uncommitted writes.
+    The helpers below hand the write connection back as soon as their work is committed (see
+    release_write()), so do not keep a reference to it past a statement or transaction() block.
+    """
+    if readonly and not ('db' in g and g.db.in_transaction):
+        if 'db_read' not in g:
+            g.db_read = get_pools()['read'].acquire()
+        return g.db_read
     if 'db' not in g:
-        g.db = sqlite3.connect(DATABASE)
-        g.db.row_factory = sqlite3.Row  # To get rows as dictionaries
+        g.db = get_pools()['write'].acquire()
     return g.db
 
+# ---------------------- Release the Write Connection ---------------------- #
+def release_write():
+    """
+    Return the context's write connection to its pool once nothing is left uncommitted on it.
+
+    There is one write connection per process, so holding it until the end of the context would
+    make every other writer wait while this request does unrelated (possibly slow) work.
+    """
+    if in_transaction() or 'db' not in g or g.db.in_transaction:
+        return
+    get_pools()['write'].release(g.pop('db'))
+
 # ---------------------- Close the Database Connection ---------------------- #
 def close_db(e=None):
-    """Closes the database connection."""
+    """Returns the context's connections to their pools."""
     db = g.pop('db', None)
     if db is not None:
-        db.close()
+        get_pools()['write'].release(db)
+    db_read = g.pop('db_read', None)
+    if db_read is not None:
+        get_pools()['read'].release(db_read)
 
 # ---------------------- Initialize the Database ---------------------- #
 def init_db():
     """Initializes the database by creating tables."""
-    with closing(get_db()) as db:
-        with open(os.path.join(os.path.dirname(__file__), 'schema.sql'), 'r') as f:
-            db.executescript(f.read())
-        db.commit()
+    db = get_db()
+    with open(os.path.join(os.path.dirname(__file__), 'schema.sql'), 'r') as f:
+        db.executescript(f.read())
+    db.commit()
+    release_write()
+
+# ---------------------- Transactions ---------------------- #
+@contextmanager
+def transaction():
+    """
+    Runs the enclosed statements in one transaction with a single commit at the end.
+
+    Helpers called inside the block skip their own commits. Nested blocks join the outermost one,
+    and an exception rolls the whole transaction back.
+    """
+    db = get_db()
+    depth = g.get('db_transaction_depth', 0)
+    g.db_transaction_depth = depth + 1
+    try:
+        yield db
+    except Exception:
+        if depth == 0:
+            db.rollback()
+        raise
+    else:
+        if depth == 0:
+            db.commit()
+    finally:
+        g.db_transaction_depth = depth
+        release_write()
+
+def in_transaction():
+    """Whether the current context is inside a transaction() block."""
+    return g.get('db_transaction_depth', 0) > 0
 
 # ---------------------- Execute SQL Queries ---------------------- #
 def execute_query(query, args=(), commit=False):
@@ -36,13 +248,15 @@ def execute_query(query, args=(), commit=False):
     cursor = db.cursor()
     cursor.execute(query, args)
     
-    if commit:
-        db.commit()  # Commit changes if necessary
+    if commit and not in_transaction():
+        db.commit()  # Commit changes if necessary (deferred inside transaction())
     
     if query.strip().upper().startswith("SELECT"):
-        return cursor.fetchall()  # Return rows for SELECT queries
+        result = cursor.fetchall()  # Return rows for SELECT queries
     else:
-        return cursor.lastrowid  # Return last insert ID for non-SELECT queries
+        result = cursor.lastrowid  # Return last insert ID for non-SELECT queries
+    release_write()
+    return result
 
 # ---------------------- Query Wrapper for Insert/Update/Delete ---------------------- #
 def execute_insert(query, args):
@@ -57,10 +271,45 @@ def execute_delete(query, args):
     """Executes a delete query."""
     return execute_query(query, args, commit=True)
 
+# ---------------------- Execute Many (Bulk) ---------------------- #
+def execute_many(query, args_iterable, chunk_size=BULK_CHUNK_SIZE):
+    """
+    Executes one statement for every parameter tuple in args_iterable and returns the rows affected.
+
+    The iterable is consumed lazily in chunks of chunk_size, so generators of any length can be
+    streamed without building the full list. Outside transaction() each chunk is committed as it
+    is written; inside it, everything commits once when the block exits.
+    """
+    db = get_db()
+    rows = iter(args_iterable)
+    total = 0
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        cursor = db.executemany(query, chunk)
+        total += cursor.rowcount
+        if not in_transaction():
+            db.commit()
+    release_write()
+    return total
+
+def execute_insert_many(query, args_iterable):
+    """Executes an insert query for many rows."""
+    return execute_many(query, args_iterable)
+
+def execute_update_many(query, args_iterable):
+    """Executes an update query for many rows."""
+    return execute_many(query, args_iterable)
+
+def execute_delete_many(query, args_iterable):
+    """Executes a delete query for many rows."""
+    return execute_many(query, args_iterable)
+
 # ---------------------- Fetch a Single Record ---------------------- #
 def fetch_one(query, args=()):
     """Fetches a single record from the database."""
-    db = get_db()
+    db = get_db(readonly=True)
     cursor = db.cursor()
     cursor.execute(query, args)
     return cursor.fetchone()
@@ -68,75 +317,82 @@ def fetch_one(query, args=()):
 # ---------------------- Fetch Multiple Records ---------------------- #
 def fetch_all(query, args=()):
     """Fetches all records matching the query."""
-    db = get_db()
+    db = get_db(readonly=True)
     cursor = db.cursor()
     cursor.execute(query, args)
     return cursor.fetchall()
 
-# ---------------------- Example of Creating Tables ---------------------- #
-def create_tables():
-    """Creates all necessary tables for the app."""
-    # User table schema
-    user_table = """
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            email TEXT UNIQUE NOT NULL,
-            password TEXT NOT NULL,
-            profile_picture TEXT,
-            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-        );
+# ---------------------- Stream Records ---------------------- #
+def iter_rows(query, args=(), arraysize=None):
     """
-    
-    # Post table schema
-    post_table = """
-        CREATE TABLE IF NOT EXISTS posts (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            title TEXT NOT NULL,
-            content TEXT,
-            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY(user_id) REFERENCES users(id)
-        );
+    Yields records matching the query one at a time, fetching `arraysize` rows per round trip.
+
+    Unlike fetch_all, memory stays flat however many rows match, which is what full-table passes
+    (exports, background jobs) need. Consume the generator inside the application context.
     """
-    
-    # Other table schemas (messages, stories, notifications, etc.) can go here
+    db = get_db(readonly=True)
+    cursor = db.cursor()
+    cursor.arraysize = arraysize or FETCH_ARRAYSIZE
+    cursor.execute(query, args)
+    try:
+        while True:
+            rows = cursor.fetchmany()
+            if not rows:
+                break
+            yield from rows
+    finally:
+        cursor.close()
 
-    with closing(get_db()) as db:
-        db.execute(user_table)
-        db.execute(post_table)
-        db.commit()
+# ---------------------- Creating Tables ---------------------- #
+def create_tables():
+    """Creates every model table in the shared database (use `flask db upgrade` for managed schemas)."""
+    import models  # Registers every model on db.metadata
+    db.create_all()
 
 # ---------------------- Custom Query Examples ---------------------- #
 
 def get_user_by_username(username):
     """Fetches a user by username."""
-    query = "SELECT * FROM users WHERE username = ?"
+    query = "SELECT * FROM user WHERE username = ?"
     return fetch_one(query, (username,))
 
 def get_all_posts():
     """Fetches all posts."""
-    query = "SELECT * FROM posts"
+    query = "SELECT * FROM post"
     return fetch_all(query)
 
+def iter_all_posts():
+    """Streams all posts without loading the whole table."""
+    query = "SELECT * FROM post"
+    return iter_rows(query)
+
 def get_user_posts(user_id):
     """Fetches posts for a specific user."""
-    query = "SELECT * FROM posts WHERE user_id = ?"
+    query = "SELECT * FROM post WHERE user_id = ?"
     return fetch_all(query, (user_id,))
 
 def get_post_by_id(post_id):
     """Fetches a post by its ID."""
-    query = "SELECT * FROM posts WHERE id = ?"
+    query = "SELECT * FROM post WHERE id = ?"
     return fetch_one(query, (post_id,))
 
-def add_new_post(user_id, title, content):
+def add_new_post(user_id, content):
     """Inserts a new post."""
-    query = "INSERT INTO posts (user_id, title, content) VALUES (?, ?, ?)"
-    return execute_insert(query, (user_id, title, content))
+    query = "INSERT INTO post (user_id, content) VALUES (?, ?)"
+    return execute_insert(query, (user_id, content))
+
+def add_new_posts(posts):
+    """Inserts many (user_id, content) posts, e.g. when seeding or importing."""
+    query = "INSERT INTO post (user_id, content) VALUES (?, ?)"
+    return execute_insert_many(query, posts)
+
+def delete_posts(post_ids):
+    """Deletes many posts by id."""
+    query = "DELETE FROM post WHERE id = ?"
+    return execute_delete_many(query, ((post_id,) for post_id in post_ids))
 
 # ---------------------- Closing the Database ---------------------- #
 def close_all():
     """Ensure all resources are cleaned up."""
     close_db()
-    if hasattr(g, 'db'):
-        g.db.close()
+    close_pools()
@@ -0,0 +1,14 @@
+from flask_caching import Cache
+from flask_cors import CORS
+from flask_login import LoginManager
+from flask_mail import Mail
+from flask_migrate import Migrate
+
+# ---------------------- Flask Extensions ---------------------- #
+# Created unbound at import time and attached to the app in create_app(), so modules can
+# import them without building an app. The SQLAlchemy instance lives in database.py.
+cache = Cache()
+cors = CORS()
+login_manager = LoginManager()
+mail = Mail()
+migrate = Migrate()
@@ -0,0 +1,10 @@
+# ---------------------------- Unified Schema ---------------------------- #
+# Every model is bound to the single `db` in database.py and lives in one database.
+from models.user import User, followers
+from models.post import Post, Like, Comment, Tag
+from models.hashtag import Hashtag, PostHashtag, HashtagTrendBucket
+from models.message import Message
+from models.notification import Notification
+from models.story import Story
+from models.reel import Reel, ReelLike, ReelComment, ReelSeenFilter
+from models.media import MediaBlob, UploadSession, TranscodeJob
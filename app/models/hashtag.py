@@ -1,18 +1,23 @@
-from flask import Flask, render_template, request, redirect, url_for, session, flash
-from flask_sqlalchemy import SQLAlchemy
+import threading
+from collections import OrderedDict
+from flask import Blueprint, render_template, request, redirect, url_for, session, flash
 from datetime import datetime
+from database import db
+from utils.cache import on_hashtags_added
+from utils.helpers import conflict_insert
 
-# Initialize Flask app and database
-app = Flask(__name__)
-app.config['SECRET_KEY'] = 'your_secret_key'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///hashtag.db'  # Using SQLite for simplicity
-db = SQLAlchemy(app)
+# Hashtag routes
+hashtag_bp = Blueprint('hashtag', __name__)
+
+# Longest hashtag accepted, matching the hashtag column
+MAX_HASHTAG_LENGTH = 100
 
 # ---------------------------- Hashtag Model ---------------------------- #
 class Hashtag(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    hashtag = db.Column(db.String(100), unique=True, nullable=False)  # Hashtag text (e.g., #travel)
-    posts = db.relationship('Post', secondary='post_hashtags', back_populates='hashtags')
+    hashtag = db.Column(db.String(MAX_HASHTAG_LENGTH), unique=True, nullable=False)  # Hashtag text (e.g., #travel)
+    posts = db.relationship('Post', secondary='post_hashtag', back_populates='hashtags', viewonly=True)
+    post_hashtags = db.relationship('PostHashtag', back_populates='hashtag')
 
     def __repr__(self):
         return f'<Hashtag #{self.hashtag}>'
@@ -26,35 +31,128 @@ class PostHashtag(db.Model):
     post = db.relationship('Post', back_populates='post_hashtags')
     hashtag = db.relationship('Hashtag', back_populates='post_hashtags')
 
+    __table_args__ = (
+        # Serves posts-by-hashtag and trending counts; also rejects duplicate associations
+        db.Index('ix_post_hashtag_hashtag_id_post_id', 'hashtag_id', 'post_id', unique=True),
+        db.Index('ix_post_hashtag_post_id', 'post_id'),
+    )
+
+# ---------------------------- Hashtag Usage Buckets ---------------------------- #
+class HashtagTrendBucket(db.Model):
+    """Number of times a hashtag was used during one fixed-width time bucket."""
+    hashtag_id = db.Column(db.Integer, db.ForeignKey('hashtag.id', ondelete='CASCADE'), primary_key=True)
+    bucket_start = db.Column(db.Integer, primary_key=True)  # Unix time the bucket starts at
+    count = db.Column(db.Integer, default=0, nullable=False)
+
+    # Serves window scans ("every bucket since t") and pruning of old buckets
+    __table_args__ = (db.Index('ix_hashtag_trend_bucket_bucket_start', 'bucket_start'),)
+
+    def __repr__(self):
+        return f'<HashtagTrendBucket {self.hashtag_id}@{self.bucket_start}: {self.count}>'
+
+# ---------------------------- Hashtag Id Cache ---------------------------- #
+# Hashtag name -> id for recently used tags in this worker, so hot tags skip the lookup.
+# Hashtags are never renamed or deleted, so cached ids cannot go stale.
+HASHTAG_ID_CACHE_SIZE = 10000
+_hashtag_ids = OrderedDict()
+_hashtag_ids_lock = threading.Lock()
+
+def _cached_hashtag_ids(names):
+    with _hashtag_ids_lock:
+        found = {}
+        for name in names:
+            if name in _hashtag_ids:
+                _hashtag_ids.move_to_end(name)
+                found[name] = _hashtag_ids[name]
+        return found
+
+def _remember_hashtag_ids(ids):
+    with _hashtag_ids_lock:
+        _hashtag_ids.update(ids)
+        for name in ids:
+            _hashtag_ids.move_to_end(name)
+        while len(_hashtag_ids) > HASHTAG_ID_CACHE_SIZE:
+            _hashtag_ids.popitem(last=False)
+
+# ---------------------------- Normalize Hashtags ---------------------------- #
+def normalize_hashtags(hashtags):
+    """Lowercase tags, strip '#' and trailing punctuation, and drop empty, oversized and repeated ones (order kept)."""
+    names = []
+    seen = set()
+    for hashtag in hashtags:
+        name = hashtag.strip().lstrip('#').rstrip('.,!?;:').lower()
+        if name and len(name) <= MAX_HASHTAG_LENGTH and name not in seen:
+            seen.add(name)
+            names.append(name)
+    return names
+
+# ---------------------------- Resolve Hashtag Ids ---------------------------- #
+def resolve_hashtag_ids(names):
+    """
+    Return {name: id} for normalized names, creating the missing hashtags in the current transaction.
+
+    Known names come from the in-process cache, the rest from one IN query. Missing tags are
+    inserted with INSERT ... ON CONFLICT DO NOTHING, so two workers creating the same tag at
+    once both succeed, and then read back together.
+    """
+    ids = _cached_hashtag_ids(names)
+    missing = [name for name in names if name not in ids]
+    if missing:
+        ids.update(db.session.query(Hashtag.hashtag, Hashtag.id).filter(Hashtag.hashtag.in_(missing)))
+        missing = [name for name in names if name not in ids]
+    if missing:
+        statement = conflict_insert(Hashtag, db.session)
+        if statement is not None:
+            db.session.execute(statement.values([{'hashtag': name} for name in missing]).on_conflict_do_nothing(index_elements=['hashtag']))
+        else:
+            db.session.add_all(Hashtag(hashtag=name) for name in missing)
+            db.session.flush()
+        ids.update(db.session.query(Hashtag.hashtag, Hashtag.id).filter(Hashtag.hashtag.in_(missing)))
+    return ids
+
 # ---------------------------- Add Hashtags to Post ---------------------------- #
 def add_hashtags_to_post(post_id, hashtags):
-    """Helper function to associate hashtags with a post."""
-    for hashtag in hashtags:
-        # Check if the hashtag already exists
-        existing_hashtag = Hashtag.query.filter_by(hashtag=hashtag).first()
-        if existing_hashtag:
-            # If it exists, add it to the post
-            post_hashtag = PostHashtag(post_id=post_id, hashtag_id=existing_hashtag.id)
+    """
+    Associate hashtags with a post: one lookup, one upsert and one bulk insert in a single
+    transaction. Only tags the post did not have yet count as uses for trending and autocomplete.
+    """
+    names = normalize_hashtags(hashtags)
+    if not names:
+        return
+    ids = resolve_hashtag_ids(names)
+
+    # Re-tagging a post with a tag it already has is a no-op, and is not counted again
+    existing = {row[0] for row in db.session.query(PostHashtag.hashtag_id).filter(
+        PostHashtag.post_id == post_id, PostHashtag.hashtag_id.in_(ids.values()))}
+    added = {name: hashtag_id for name, hashtag_id in ids.items() if hashtag_id not in existing}
+    if added:
+        # The unique (hashtag_id, post_id) index still settles a concurrent re-tag
+        rows = [{'post_id': post_id, 'hashtag_id': hashtag_id} for hashtag_id in added.values()]
+        statement = conflict_insert(PostHashtag, db.session)
+        if statement is not None:
+            db.session.execute(statement.on_conflict_do_nothing(index_elements=['hashtag_id', 'post_id']), rows)
         else:
-            # If not, create a new hashtag and associate it with the post
-            new_hashtag = Hashtag(hashtag=hashtag)
-            db.session.add(new_hashtag)
-            db.session.commit()  # Commit to get the new hashtag's ID
-            post_hashtag = PostHashtag(post_id=post_id, hashtag_id=new_hashtag.id)
-
-        # Add the post-hashtag relationship
-        db.session.add(post_hashtag)
+            db.session.execute(PostHashtag.__table__.insert(), rows)
+
+        from utils.trending import record_hashtag_uses
+        record_hashtag_uses(list(added.values()))
     db.session.commit()
 
+    _remember_hashtag_ids(ids)  # Only after commit, so rolled-back ids are never cached
+    if added:
+        on_hashtags_added(list(added))
+        from utils.autocomplete import note_hashtags_used
+        note_hashtags_used(added)
+
 # ---------------------------- Get Posts by Hashtag ---------------------------- #
-@app.route('/hashtag/<string:hashtag>')
+@hashtag_bp.route('/hashtag/<string:hashtag>')
 def get_posts_by_hashtag(hashtag):
     """Route to display posts by hashtag."""
     hashtag_obj = Hashtag.query.filter_by(hashtag=hashtag).first()
 
     if not hashtag_obj:
         flash("Hashtag not found.", "danger")
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
 
     # Get all posts associated with the hashtag
     posts = [post_hashtag.post for post_hashtag in hashtag_obj.post_hashtags]
@@ -62,26 +160,25 @@ def get_posts_by_hashtag(hashtag):
     return render_template('hashtag_posts.html', hashtag=hashtag, posts=posts)
 
 # ---------------------------- Search Hashtags ---------------------------- #
-@app.route('/search', methods=['POST'])
+@hashtag_bp.route('/search', methods=['POST'])
 def search_hashtags():
     """Search for hashtags and display related posts."""
     query = request.form['query']
-    hashtags = Hashtag.query.filter(Hashtag.hashtag.ilike(f'%{query}%')).all()
+    from utils.autocomplete import search_hashtags_by_prefix
+    hashtags = search_hashtags_by_prefix(query)
 
     if not hashtags:
         flash("No hashtags found.", "danger")
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
 
     return render_template('search_results.html', hashtags=hashtags)
 
 # ---------------------------- Display Trending Hashtags ---------------------------- #
-@app.route('/trending')
+@hashtag_bp.route('/trending')
 def trending_hashtags():
-    """Route to display trending hashtags based on the number of posts associated with them."""
-    hashtags = db.session.query(Hashtag, db.func.count(PostHashtag.id).label('count')) \
-                         .join(PostHashtag, Hashtag.id == PostHashtag.hashtag_id) \
-                         .group_by(Hashtag.id) \
-                         .order_by(db.desc('count')).limit(10).all()
+    """Route to display trending hashtags, read from the precomputed trending list."""
+    from utils.trending import get_trending_hashtags
+    hashtags = [(hashtag, hashtag.trend_score) for hashtag in get_trending_hashtags(request.args.get('window'), 10)]
 
     return render_template('trending_hashtags.html', hashtags=hashtags)
 
@@ -90,7 +187,3 @@ def extract_hashtags_from_text(text):
     """Helper function to extract hashtags from a given text."""
     # Extract words that start with '#' and return them as a list
     return [word[1:] for word in text.split() if word.startswith('#')]
-
-# ---------------------------- Run Application ---------------------------- #
-if __name__ == '__main__':
-    app.run(debug=True)
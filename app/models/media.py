@@ -0,0 +1,70 @@
+from datetime import datetime
+from database import db
+
+# ---------------------------- Media Blob Model ---------------------------- #
+class MediaBlob(db.Model):
+    """
+    One uploaded file, stored once under its content hash however many records use it.
+
+    ref_count is the number of posts, stories, reels and profiles pointing at the blob. When
+    it drops to zero, released_at is set, and the garbage collector deletes the files once
+    they have stayed unreferenced for a grace period.
+    """
+    sha256 = db.Column(db.String(64), primary_key=True)  # Hex digest of the uploaded bytes
+    kind = db.Column(db.String(10), nullable=False)  # 'image', 'video' or 'file'
+    size = db.Column(db.Integer, nullable=False)  # Bytes uploaded
+    path = db.Column(db.String(120), nullable=True)  # Main processed file relative to MEDIA_ROOT; NULL until processed
+    ref_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    released_at = db.Column(db.DateTime, nullable=True)  # When ref_count last reached zero
+
+    # Serves the garbage collector: unreferenced blobs released before a cutoff
+    __table_args__ = (db.Index('ix_media_blob_ref_count_released_at', 'ref_count', 'released_at'),)
+
+    def __repr__(self):
+        return f'<MediaBlob {self.sha256[:12]} refs={self.ref_count}>'
+
+# ---------------------------- Upload Session Model ---------------------------- #
+class UploadSession(db.Model):
+    """
+    A resumable upload in progress (see utils.uploads). The bytes received so far live in
+    MEDIA_STAGING_DIR as `<id>.part`; the file's size is the upload's offset.
+    """
+    id = db.Column(db.String(32), primary_key=True)  # Random hex token, also used in URLs
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)  # Indexed to count a user's open uploads
+    filename = db.Column(db.String(255), nullable=False)  # Client file name; only its extension is used
+    size = db.Column(db.BigInteger, nullable=False)  # Total bytes announced by the client
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+    def __repr__(self):
+        return f'<UploadSession {self.id} by User {self.user_id}>'
+
+# ---------------------------- Transcode Job Model ---------------------------- #
+class TranscodeJob(db.Model):
+    """
+    A queued video transcode for a reel or story (see utils.transcoding). The table is the
+    queue: workers claim due jobs with a conditional UPDATE, so jobs survive restarts and
+    several workers can share it. A running job's worker renews heartbeat_at while it works;
+    a job whose heartbeat stops is claimed again.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    target = db.Column(db.String(20), nullable=False)  # 'reel' or 'story'
+    record_id = db.Column(db.Integer, nullable=False)
+    source_path = db.Column(db.String(120), nullable=False)  # Stored video, relative to MEDIA_ROOT
+    status = db.Column(db.String(20), default='queued', nullable=False)  # queued, running, done or failed
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    error = db.Column(db.Text, nullable=True)  # Last failure
+    heights = db.Column(db.String(50), nullable=True)  # Renditions produced, e.g. '720,480,360'
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    run_after = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)  # Retries are delayed
+    started_at = db.Column(db.DateTime, nullable=True)
+    heartbeat_at = db.Column(db.DateTime, nullable=True)  # Last lease renewal by the running worker
+    finished_at = db.Column(db.DateTime, nullable=True)
+    wait_seconds = db.Column(db.Float, nullable=True)  # Queued to claimed, last attempt
+    encode_seconds = db.Column(db.Float, nullable=True)  # Encoder run time, last attempt
+
+    # Serves the worker's claim query: due jobs by status and time
+    __table_args__ = (db.Index('ix_transcode_job_status_run_after', 'status', 'run_after'),)
+
+    def __repr__(self):
+        return f'<TranscodeJob {self.id} {self.target} {self.record_id} {self.status}>'
@@ -1,21 +1,22 @@
-from flask import Flask, render_template, request, redirect, url_for, session, flash
-from flask_sqlalchemy import SQLAlchemy
+from flask import Blueprint, render_template, request, redirect, url_for, session, flash
 from datetime import datetime
+from database import db
 
-# Initialize Flask app and database
-app = Flask(__name__)
-app.config['SECRET_KEY'] = 'your_secret_key'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///notifications.db'  # Using SQLite for simplicity
-db = SQLAlchemy(app)
+# Notification routes
+notification_bp = Blueprint('notification', __name__)
 
 # ---------------------------- Notification Model ---------------------------- #
 class Notification(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)  # User who will receive the notification
+    notification_type = db.Column(db.String(20), nullable=True)  # Kind of event (e.g., 'like', 'comment', 'follow')
     message = db.Column(db.String(255), nullable=False)  # Notification message (e.g., "You have a new like!")
     is_read = db.Column(db.Boolean, default=False)  # Whether the notification has been read by the user
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)  # Timestamp of when the notification was created
 
+    # Serves the notification center and unread badges for one user, newest first
+    __table_args__ = (db.Index('ix_notification_user_id_is_read_timestamp', 'user_id', 'is_read', 'timestamp'),)
+
     def __repr__(self):
         return f'<Notification {self.id} for User {self.user_id}>'
 
@@ -27,10 +28,10 @@ def send_notification(user_id, message):
     db.session.commit()
 
 # ---------------------------- Get Notifications ---------------------------- #
-@app.route('/notifications')
+@notification_bp.route('/notifications')
 def get_notifications():
     if 'user_id' not in session:
-        return redirect(url_for('login'))
+        return redirect(url_for('auth.login'))
 
     # Get notifications for the current user
     notifications = Notification.query.filter_by(user_id=session['user_id']).order_by(Notification.timestamp.desc()).all()
@@ -38,7 +39,7 @@ def get_notifications():
     return render_template('notifications.html', notifications=notifications)
 
 # ---------------------------- Mark Notifications as Read ---------------------------- #
-@app.route('/mark_read/<int:notification_id>', methods=['POST'])
+@notification_bp.route('/mark_read/<int:notification_id>', methods=['POST'])
 def mark_read(notification_id):
     notification = Notification.query.get_or_404(notification_id)
     
@@ -47,10 +48,10 @@ def mark_read(notification_id):
     db.session.commit()
 
     flash("Notification marked as read.", "success")
-    return redirect(url_for('get_notifications'))
+    return redirect(url_for('.get_notifications'))
 
 # ---------------------------- Delete Notification ---------------------------- #
-@app.route('/delete_notification/<int:notification_id>', methods=['POST'])
+@notification_bp.route('/delete_notification/<int:notification_id>', methods=['POST'])
 def delete_notification(notification_id):
     notification = Notification.query.get_or_404(notification_id)
     
@@ -59,13 +60,13 @@ def delete_notification(notification_id):
     db.session.commit()
 
     flash("Notification deleted.", "success")
-    return redirect(url_for('get_notifications'))
+    return redirect(url_for('.get_notifications'))
 
 # ---------------------------- New Like Notification ---------------------------- #
-@app.route('/like_post/<int:post_id>', methods=['POST'])
+@notification_bp.route('/like_post/<int:post_id>', methods=['POST'])
 def like_post(post_id):
     if 'user_id' not in session:
-        return redirect(url_for('login'))
+        return redirect(url_for('auth.login'))
 
     post = Post.query.get_or_404(post_id)
     # Assuming `post.user_id` is the user who owns the post
@@ -77,13 +78,13 @@ def like_post(post_id):
     db.session.commit()
 
     flash("You liked the post!", "success")
-    return redirect(url_for('feed'))
+    return redirect(url_for('post.feed'))
 
 # ---------------------------- New Comment Notification ---------------------------- #
-@app.route('/comment_post/<int:post_id>', methods=['POST'])
+@notification_bp.route('/comment_post/<int:post_id>', methods=['POST'])
 def comment_post(post_id):
     if 'user_id' not in session:
-        return redirect(url_for('login'))
+        return redirect(url_for('auth.login'))
 
     post = Post.query.get_or_404(post_id)
     content = request.form['comment']
@@ -97,13 +98,13 @@ def comment_post(post_id):
     db.session.commit()
 
     flash("Comment posted!", "success")
-    return redirect(url_for('feed'))
+    return redirect(url_for('post.feed'))
 
 # ---------------------------- New Follower Notification ---------------------------- #
-@app.route('/follow_user/<int:user_id>', methods=['POST'])
+@notification_bp.route('/follow_user/<int:user_id>', methods=['POST'])
 def follow_user(user_id):
     if 'user_id' not in session:
-        return redirect(url_for('login'))
+        return redirect(url_for('auth.login'))
 
     # Follow the user
     new_follow = Follow(follower_id=session['user_id'], followed_id=user_id)
@@ -114,13 +115,9 @@ def follow_user(user_id):
     send_notification(user_id, f"User {session['user_id']} started following you.")
 
     flash(f"You started following User {user_id}!", "success")
-    return redirect(url_for('profile', user_id=user_id))
+    return redirect(url_for('auth.profile', user_id=user_id))
 
 # ---------------------------- Helper Function to Get Unread Notifications ---------------------------- #
 def get_unread_notifications(user_id):
     """Return unread notifications for the user."""
     return Notification.query.filter_by(user_id=user_id, is_read=False).all()
-
-# ---------------------------- Run Application ---------------------------- #
-if __name__ == '__main__':
-    app.run(debug=True)
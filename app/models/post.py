@@ -1,14 +1,12 @@
 import os
-from flask import Flask, render_template, request, redirect, url_for, flash, session
+from datetime import datetime
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session
 from werkzeug.utils import secure_filename
-from flask_sqlalchemy import SQLAlchemy
+from database import db
 
-# Initialize Flask app and database
-app = Flask(__name__)
-app.config['SECRET_KEY'] = 'your_secret_key'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///posts.db'
-app.config['UPLOAD_FOLDER'] = 'static/post_media'
-db = SQLAlchemy(app)
+# Post routes
+post_bp = Blueprint('post', __name__)
+UPLOAD_FOLDER = 'static/post_media'
 
 # ---------------------------- Post Model ---------------------------- #
 class Post(db.Model):
@@ -17,10 +15,23 @@ class Post(db.Model):
     image = db.Column(db.String(120), nullable=True)
     video = db.Column(db.String(120), nullable=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, server_default=db.func.current_timestamp(), nullable=False)
+    like_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)  # Denormalized count of likes
+    comment_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)  # Denormalized count of comments
+    media_status = db.Column(db.String(20), default='ready', server_default='ready', nullable=False)  # 'processing' until the upload pipeline stores its media
     user = db.relationship('User', backref='posts')
     likes = db.relationship('Like', backref='post', lazy=True)
     comments = db.relationship('Comment', backref='post', lazy=True)
     tags = db.relationship('Tag', backref='post', lazy=True)
+    hashtags = db.relationship('Hashtag', secondary='post_hashtag', back_populates='posts', viewonly=True)
+    post_hashtags = db.relationship('PostHashtag', back_populates='post', cascade='all, delete-orphan')
+
+    __table_args__ = (
+        # Serves the home feed: posts of a set of authors, newest first
+        db.Index('ix_post_user_id_created_at', 'user_id', 'created_at'),
+        # Serves trending: posts ranked by engagement without aggregating likes or comments
+        db.Index('ix_post_like_count_comment_count', 'like_count', 'comment_count'),
+    )
 
     def __repr__(self):
         return f'<Post {self.id}>'
@@ -31,6 +42,9 @@ class Like(db.Model):
     post_id = db.Column(db.Integer, db.ForeignKey('post.id'), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
 
+    # One like per user per post; also serves "has this user liked this post" lookups
+    __table_args__ = (db.Index('ix_like_post_id_user_id', 'post_id', 'user_id', unique=True),)
+
     def __repr__(self):
         return f'<Like {self.id}>'
 
@@ -38,7 +52,7 @@ class Like(db.Model):
 class Comment(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     content = db.Column(db.String(250), nullable=False)
-    post_id = db.Column(db.Integer, db.ForeignKey('post.id'), nullable=False)
+    post_id = db.Column(db.Integer, db.ForeignKey('post.id'), nullable=False, index=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     user = db.relationship('User', backref='comments')
 
@@ -49,16 +63,16 @@ class Comment(db.Model):
 class Tag(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(50), nullable=False)
-    post_id = db.Column(db.Integer, db.ForeignKey('post.id'), nullable=False)
+    post_id = db.Column(db.Integer, db.ForeignKey('post.id'), nullable=False, index=True)
 
     def __repr__(self):
         return f'<Tag {self.name}>'
 
 # ---------------------------- Create Post ---------------------------- #
-@app.route('/create_post', methods=['GET', 'POST'])
+@post_bp.route('/create_post', methods=['GET', 'POST'])
 def create_post():
     if 'user_id' not in session:
-        return redirect(url_for('login'))
+        return redirect(url_for('auth.login'))
 
     if request.method == 'POST':
         content = request.form['content']
@@ -70,24 +84,24 @@ def create_post():
         video_filename = None
         if image:
             image_filename = secure_filename(image.filename)
-            image.save(os.path.join(app.config['UPLOAD_FOLDER'], image_filename))
+            image.save(os.path.join(UPLOAD_FOLDER, image_filename))
         if video:
             video_filename = secure_filename(video.filename)
-            video.save(os.path.join(app.config['UPLOAD_FOLDER'], video_filename))
+            video.save(os.path.join(UPLOAD_FOLDER, video_filename))
 
         post = Post(content=content, image=image_filename, video=video_filename, user_id=session['user_id'])
         db.session.add(post)
         db.session.commit()
         flash("Post created successfully!", "success")
-        return redirect(url_for('feed'))
+        return redirect(url_for('.feed'))
 
     return render_template('create_post.html')
 
 # ---------------------------- Like Post ---------------------------- #
-@app.route('/like_post/<int:post_id>', methods=['POST'])
+@post_bp.route('/like_post/<int:post_id>', methods=['POST'])
 def like_post(post_id):
     if 'user_id' not in session:
-        return redirect(url_for('login'))
+        return redirect(url_for('auth.login'))
 
     post = Post.query.get_or_404(post_id)
     user = User.query.get(session['user_id'])
@@ -101,13 +115,13 @@ def like_post(post_id):
     else:
         flash("You already liked this post.", "info")
 
-    return redirect(url_for('feed'))
+    return redirect(url_for('.feed'))
 
 # ---------------------------- Comment on Post ---------------------------- #
-@app.route('/comment_post/<int:post_id>', methods=['POST'])
+@post_bp.route('/comment_post/<int:post_id>', methods=['POST'])
 def comment_post(post_id):
     if 'user_id' not in session:
-        return redirect(url_for('login'))
+        return redirect(url_for('auth.login'))
 
     post = Post.query.get_or_404(post_id)
     content = request.form['content']
@@ -118,13 +132,13 @@ def comment_post(post_id):
     db.session.commit()
     flash("Your comment was posted!", "success")
 
-    return redirect(url_for('feed'))
+    return redirect(url_for('.feed'))
 
 # ---------------------------- Tag Post ---------------------------- #
-@app.route('/tag_post/<int:post_id>', methods=['POST'])
+@post_bp.route('/tag_post/<int:post_id>', methods=['POST'])
 def tag_post(post_id):
     if 'user_id' not in session:
-        return redirect(url_for('login'))
+        return redirect(url_for('auth.login'))
 
     post = Post.query.get_or_404(post_id)
     tags = request.form['tags'].split(',')
@@ -138,13 +152,13 @@ def tag_post(post_id):
     db.session.commit()
     flash("Tags added to the post!", "success")
 
-    return redirect(url_for('feed'))
+    return redirect(url_for('.feed'))
 
 # ---------------------------- Save Post ---------------------------- #
-@app.route('/save_post/<int:post_id>', methods=['POST'])
+@post_bp.route('/save_post/<int:post_id>', methods=['POST'])
 def save_post(post_id):
     if 'user_id' not in session:
-        return redirect(url_for('login'))
+        return redirect(url_for('auth.login'))
 
     post = Post.query.get_or_404(post_id)
     user = User.query.get(session['user_id'])
@@ -153,17 +167,13 @@ def save_post(post_id):
     # Flash a success message
     flash("Post saved to your collection!", "success")
 
-    return redirect(url_for('feed'))
+    return redirect(url_for('.feed'))
 
 # ---------------------------- Feed ---------------------------- #
-@app.route('/feed')
+@post_bp.route('/feed')
 def feed():
     if 'user_id' not in session:
-        return redirect(url_for('login'))
+        return redirect(url_for('auth.login'))
 
     posts = Post.query.all()
     return render_template('feed.html', posts=posts)
-
-# ---------------------------- Run Application ---------------------------- #
-if __name__ == '__main__':
-    app.run(debug=True)
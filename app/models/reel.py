@@ -1,128 +1,177 @@
-from flask import Flask, render_template, request, redirect, url_for, session, flash
-from flask_sqlalchemy import SQLAlchemy
+from flask import Blueprint, render_template, request, redirect, url_for, session, flash
 from datetime import datetime
-import os
+from database import db
 
-# Initialize Flask app and database
-app = Flask(__name__)
-app.config['SECRET_KEY'] = 'your_secret_key'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///reels.db'
-app.config['UPLOAD_FOLDER'] = 'app/static/videos'  # Folder to store uploaded videos
-app.config['ALLOWED_EXTENSIONS'] = {'mp4', 'mov', 'avi', 'mkv'}
-db = SQLAlchemy(app)
+# Reel routes
+reel_bp = Blueprint('reel', __name__)
+ALLOWED_EXTENSIONS = {'mp4', 'mov', 'avi', 'mkv'}
 
 # ---------------------------- Reel Model ---------------------------- #
 class Reel(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
     video_file = db.Column(db.String(120), nullable=False)  # Video file name
     caption = db.Column(db.String(255), nullable=True)  # Optional caption for the reel
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
-    likes = db.relationship('Like', backref='reel', lazy=True)
-    comments = db.relationship('Comment', backref='reel', lazy=True)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)  # Indexed for the reels feed's recency window
+    like_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)  # Denormalized count of likes
+    comment_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)  # Denormalized count of comments
+    media_status = db.Column(db.String(20), default='ready', server_default='ready', nullable=False)  # Upload pipeline state: processing, ready or failed
+    transcode_status = db.Column(db.String(20), nullable=True)  # Rendition ladder state: queued, running, ready or failed; NULL if never queued
+    user = db.relationship('User')
+    likes = db.relationship('ReelLike', backref='reel', lazy=True)
+    comments = db.relationship('ReelComment', backref='reel', lazy=True)
+
+    # Ranks reels by engagement without aggregating likes or comments
+    __table_args__ = (db.Index('ix_reel_like_count_comment_count', 'like_count', 'comment_count'),)
 
     def __repr__(self):
         return f'<Reel {self.id} by {self.user_id}>'
 
-# ---------------------------- Like Model ---------------------------- #
-class Like(db.Model):
+# ---------------------------- Reel Seen Filter Model ---------------------------- #
+class ReelSeenFilter(db.Model):
+    """
+    Reels a user has watched, as two generations of a fixed-size Bloom filter (see
+    utils.reels_feed): when the current one fills up it becomes the previous one, so the
+    set stays the same size however many reels are watched and forgets the oldest first.
+    """
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    current = db.Column(db.LargeBinary, nullable=False)
+    previous = db.Column(db.LargeBinary, nullable=True)
+    current_count = db.Column(db.Integer, default=0, nullable=False)  # Reels added to `current`
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<ReelSeenFilter for User {self.user_id}>'
+
+# ---------------------------- Reel Like Model ---------------------------- #
+class ReelLike(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     reel_id = db.Column(db.Integer, db.ForeignKey('reel.id'), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
 
+    # One like per user per reel; also serves "has this user liked this reel" lookups
+    __table_args__ = (db.Index('ix_reel_like_reel_id_user_id', 'reel_id', 'user_id', unique=True),)
+
     def __repr__(self):
-        return f'<Like {self.id}>'
+        return f'<ReelLike {self.id}>'
 
-# ---------------------------- Comment Model ---------------------------- #
-class Comment(db.Model):
+# ---------------------------- Reel Comment Model ---------------------------- #
+class ReelComment(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    reel_id = db.Column(db.Integer, db.ForeignKey('reel.id'), nullable=False)
+    reel_id = db.Column(db.Integer, db.ForeignKey('reel.id'), nullable=False, index=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     content = db.Column(db.String(255), nullable=False)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
 
     def __repr__(self):
-        return f'<Comment {self.id} on Reel {self.reel_id}>'
+        return f'<ReelComment {self.id} on Reel {self.reel_id}>'
 
 # ---------------------------- Upload Reel ---------------------------- #
-@app.route('/upload_reel', methods=['GET', 'POST'])
+@reel_bp.route('/upload_reel', methods=['GET', 'POST'])
 def upload_reel():
     if 'user_id' not in session:
-        return redirect(url_for('login'))
+        return redirect(url_for('auth.login'))
 
     if request.method == 'POST':
-        video_file = request.files['video']
+        video_file = request.files.get('video')
+        upload_id = request.form.get('upload_id')  # A finished resumable upload (see utils.uploads), for large reels
         caption = request.form['caption']
 
-        if video_file and allowed_file(video_file.filename):
-            # Save the video file to the designated folder
-            video_filename = os.path.join(app.config['UPLOAD_FOLDER'], video_file.filename)
-            video_file.save(video_filename)
-
-            # Create new reel entry in the database
-            reel = Reel(user_id=session['user_id'], video_file=video_file.filename, caption=caption)
-            db.session.add(reel)
-            db.session.commit()
-            flash("Reel uploaded successfully!", "success")
-            return redirect(url_for('view_reels'))
+        if upload_id or (video_file and allowed_file(video_file.filename)):
+            from utils.media_pipeline import MediaQueueFull, accept_resumable_upload, accept_upload
+            from utils.uploads import get_upload
+
+            def create_record(kind):
+                # video_file is filled in by the media pipeline once the upload is processed
+                reel = Reel(user_id=session['user_id'], video_file='', caption=caption, media_status='processing')
+                db.session.add(reel)
+                db.session.commit()
+                return reel
+
+            try:
+                if upload_id:
+                    reel = accept_resumable_upload(get_upload(upload_id, session['user_id']), 'reel', create_record)
+                else:
+                    reel = accept_upload(video_file, 'reel', create_record)
+                if reel:
+                    flash("Reel uploaded successfully! It will appear once processing finishes.", "success")
+                    return redirect(url_for('.view_reels'))
+            except MediaQueueFull:
+                flash("Too many uploads are being processed. Please try again in a moment.", "danger")
+                return redirect(url_for('.upload_reel'))
 
         flash("Invalid file type. Only video files are allowed.", "danger")
 
     return render_template('upload_reel.html')
 
 # ---------------------------- View Reels ---------------------------- #
-@app.route('/reels')
+@reel_bp.route('/reels')
 def view_reels():
     if 'user_id' not in session:
-        return redirect(url_for('login'))
+        return redirect(url_for('auth.login'))
+
+    # Ranked for the viewer and served a cursor page at a time (see utils/reels_feed.py)
+    from utils.query_options import load_reel_stats
+    from utils.reels_feed import get_reels_page
+    reels, next_cursor = get_reels_page(session['user_id'], request.args.get('cursor'))
+    load_reel_stats(reels, session['user_id'])
+    return render_template('view_reels.html', reels=reels, next_cursor=next_cursor)
+
+# ---------------------------- Reel Watched ---------------------------- #
+@reel_bp.route('/reels/<int:reel_id>/watched', methods=['POST'])
+def reel_watched(reel_id):
+    """Called by the player once a reel has been watched, so the feed stops showing it."""
+    if 'user_id' not in session:
+        return redirect(url_for('auth.login'))
 
-    reels = Reel.query.all()
-    return render_template('view_reels.html', reels=reels)
+    from utils.reels_feed import mark_reels_watched
+    mark_reels_watched(session['user_id'], [reel_id])
+    return '', 204
 
 # ---------------------------- Like Reel ---------------------------- #
-@app.route('/like_reel/<int:reel_id>', methods=['POST'])
+@reel_bp.route('/like_reel/<int:reel_id>', methods=['POST'])
 def like_reel(reel_id):
     if 'user_id' not in session:
-        return redirect(url_for('login'))
+        return redirect(url_for('auth.login'))
 
     reel = Reel.query.get_or_404(reel_id)
 
-    # Check if the user has already liked the reel
-    existing_like = Like.query.filter_by(reel_id=reel.id, user_id=session['user_id']).first()
+    # Likes are buffered and written in batches; the buffer also answers for unflushed likes
+    from utils.like_buffer import LikeBufferFull, get_reel_like_buffer
+    like_buffer = get_reel_like_buffer()
 
-    if existing_like:
+    if like_buffer.is_liked(session['user_id'], reel.id):
         flash("You already liked this reel.", "info")
     else:
-        like = Like(reel_id=reel.id, user_id=session['user_id'])
-        db.session.add(like)
-        db.session.commit()
-        flash("You liked this reel!", "success")
+        try:
+            like_buffer.set_liked(session['user_id'], reel.id, True)
+            flash("You liked this reel!", "success")
+        except LikeBufferFull:
+            flash("Too many likes are being saved. Please try again in a moment.", "danger")
 
-    return redirect(url_for('view_reels'))
+    return redirect(url_for('.view_reels'))
 
 # ---------------------------- Comment on Reel ---------------------------- #
-@app.route('/comment_reel/<int:reel_id>', methods=['POST'])
+@reel_bp.route('/comment_reel/<int:reel_id>', methods=['POST'])
 def comment_reel(reel_id):
     if 'user_id' not in session:
-        return redirect(url_for('login'))
+        return redirect(url_for('auth.login'))
 
     reel = Reel.query.get_or_404(reel_id)
     content = request.form['comment']
 
     if content.strip():
-        comment = Comment(reel_id=reel.id, user_id=session['user_id'], content=content)
+        from utils.counters import increment_counter
+        comment = ReelComment(reel_id=reel.id, user_id=session['user_id'], content=content)
         db.session.add(comment)
+        increment_counter(Reel, reel.id, 'comment_count')
         db.session.commit()
         flash("Comment added successfully!", "success")
     else:
         flash("Comment cannot be empty.", "danger")
 
-    return redirect(url_for('view_reels'))
+    return redirect(url_for('.view_reels'))
 
 # ---------------------------- Helper Function to Check File Type ---------------------------- #
 def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in app.config['ALLOWED_EXTENSIONS']
-
-# ---------------------------- Run Application ---------------------------- #
-if __name__ == '__main__':
-    app.run(debug=True)
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
@@ -1,15 +1,12 @@
 import os
 from datetime import datetime, timedelta
-from flask import Flask, render_template, request, redirect, url_for, session, flash
+from flask import Blueprint, render_template, request, redirect, url_for, session, flash
 from werkzeug.utils import secure_filename
-from flask_sqlalchemy import SQLAlchemy
+from database import db
 
-# Initialize Flask app and database
-app = Flask(__name__)
-app.config['SECRET_KEY'] = 'your_secret_key'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///stories.db'
-app.config['UPLOAD_FOLDER'] = 'static/story_media'
-db = SQLAlchemy(app)
+# Story routes
+story_bp = Blueprint('story', __name__)
+UPLOAD_FOLDER = 'static/story_media'
 
 # ---------------------------- Story Model ---------------------------- #
 class Story(db.Model):
@@ -20,15 +17,23 @@ class Story(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     user = db.relationship('User', backref='stories')
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    expiration_time = db.Column(db.DateTime, default=lambda: datetime.utcnow() + timedelta(days=1), nullable=False)
+    media_status = db.Column(db.String(20), default='ready', server_default='ready', nullable=False)  # Upload pipeline state: processing, ready or failed
+    transcode_status = db.Column(db.String(20), nullable=True)  # Rendition ladder state for videos: queued, running, ready or failed
+
+    # The first serves the reaper (expired stories by expiration time), the second the story
+    # tray (active stories of a set of authors)
+    __table_args__ = (db.Index('ix_story_expiration_time', 'expiration_time'),
+                      db.Index('ix_story_user_id_expiration_time', 'user_id', 'expiration_time'))
 
     def __repr__(self):
         return f'<Story {self.id}>'
 
 # ---------------------------- Create Story ---------------------------- #
-@app.route('/create_story', methods=['GET', 'POST'])
+@story_bp.route('/create_story', methods=['GET', 'POST'])
 def create_story():
     if 'user_id' not in session:
-        return redirect(url_for('login'))
+        return redirect(url_for('auth.login'))
 
     if request.method == 'POST':
         content = request.form['content']
@@ -40,69 +45,68 @@ def create_story():
         video_filename = None
         if image:
             image_filename = secure_filename(image.filename)
-            image.save(os.path.join(app.config['UPLOAD_FOLDER'], image_filename))
+            image.save(os.path.join(UPLOAD_FOLDER, image_filename))
         if video:
             video_filename = secure_filename(video.filename)
-            video.save(os.path.join(app.config['UPLOAD_FOLDER'], video_filename))
+            video.save(os.path.join(UPLOAD_FOLDER, video_filename))
 
         story = Story(content=content, image=image_filename, video=video_filename, user_id=session['user_id'])
         db.session.add(story)
         db.session.commit()
         flash("Story posted successfully!", "success")
-        return redirect(url_for('profile'))
+        return redirect(url_for('auth.profile'))
 
     return render_template('create_story.html')
 
 # ---------------------------- View Stories ---------------------------- #
-@app.route('/view_stories')
+@story_bp.route('/view_stories')
 def view_stories():
     if 'user_id' not in session:
-        return redirect(url_for('login'))
+        return redirect(url_for('auth.login'))
 
-    # Get the stories of the current user that are less than 24 hours old
-    current_time = datetime.utcnow()
-    stories = Story.query.filter(Story.timestamp >= current_time - timedelta(days=1)).all()
+    # Active stories of the followed accounts and the user's own, grouped per author
+    from utils.stories import get_story_tray
+    tray = get_story_tray(session['user_id'])
+    stories = [story for entry in tray for story in entry['stories']]
 
-    return render_template('view_stories.html', stories=stories)
+    return render_template('view_stories.html', tray=tray, stories=stories)
 
 # ---------------------------- Delete Story ---------------------------- #
-@app.route('/delete_story/<int:story_id>', methods=['POST'])
+@story_bp.route('/delete_story/<int:story_id>', methods=['POST'])
 def delete_story(story_id):
     if 'user_id' not in session:
-        return redirect(url_for('login'))
+        return redirect(url_for('auth.login'))
 
     story = Story.query.get_or_404(story_id)
 
     # Ensure the story belongs to the current user
     if story.user_id != session['user_id']:
         flash("You can only delete your own stories.", "danger")
-        return redirect(url_for('view_stories'))
+        return redirect(url_for('.view_stories'))
 
-    # Delete the story's media from the filesystem (optional)
-    if story.image:
-        os.remove(os.path.join(app.config['UPLOAD_FOLDER'], story.image))
-    if story.video:
-        os.remove(os.path.join(app.config['UPLOAD_FOLDER'], story.video))
+    # Delete the story's media: files in the content-addressed store may be shared, so only
+    # their reference is dropped and the garbage collector removes them once unused
+    from utils.media_store import blob_key, release_media
+    release_media(story.image, story.video)
+    for filename in (story.image, story.video):
+        if filename and not blob_key(filename) and os.path.exists(os.path.join(UPLOAD_FOLDER, filename)):
+            os.remove(os.path.join(UPLOAD_FOLDER, filename))
 
     # Delete the story from the database
     db.session.delete(story)
     db.session.commit()
 
     flash("Story deleted successfully!", "success")
-    return redirect(url_for('view_stories'))
+    return redirect(url_for('.view_stories'))
 
 # ---------------------------- Story Expiration ---------------------------- #
-@app.route('/expired_stories')
+@story_bp.route('/expired_stories')
 def expired_stories():
     if 'user_id' not in session:
-        return redirect(url_for('login'))
+        return redirect(url_for('auth.login'))
 
-    # Get stories that are older than 24 hours (expired stories)
+    # Get the user's expired stories the reaper has not deleted yet
     current_time = datetime.utcnow()
-    expired_stories = Story.query.filter(Story.timestamp <= current_time - timedelta(days=1)).all()
+    expired_stories = Story.query.filter(Story.user_id == session['user_id'], Story.expiration_time <= current_time).all()
 
     return render_template('expired_stories.html', stories=expired_stories)
-
-# ---------------------------- Run Application ---------------------------- #
-if __name__ == '__main__':
-    app.run(debug=True)
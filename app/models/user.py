@@ -1,17 +1,22 @@
 import hashlib
 import os
-from flask import Flask, render_template, request, redirect, url_for, flash, session
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session
 from werkzeug.security import generate_password_hash, check_password_hash
-from flask_sqlalchemy import SQLAlchemy
 from werkzeug.utils import secure_filename
+from database import db
 
-# Initialize Flask app and database
-app = Flask(__name__)
-app.config['SECRET_KEY'] = 'your_secret_key'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///users.db'
-app.config['UPLOAD_FOLDER'] = 'static/profile_pics'
+# User routes
+user_bp = Blueprint('user', __name__)
+UPLOAD_FOLDER = 'static/profile_pics'
 
-db = SQLAlchemy(app)
+# ---------------------------- Followers Association ---------------------------- #
+# Each row means `follower_id` follows `followed_id`
+followers = db.Table(
+    'followers',
+    db.Column('follower_id', db.Integer, db.ForeignKey('user.id'), primary_key=True),
+    db.Column('followed_id', db.Integer, db.ForeignKey('user.id'), primary_key=True),
+    db.Index('ix_followers_followed_id', 'followed_id')  # Follower lookups for fan-out
+)
 
 # ---------------------------- User Model ---------------------------- #
 class User(db.Model):
@@ -22,12 +27,17 @@ class User(db.Model):
     bio = db.Column(db.String(250))
     profile_pic = db.Column(db.String(120), default='default.jpg')
     is_private = db.Column(db.Boolean, default=False)
+    following = db.relationship(
+        'User', secondary=followers,
+        primaryjoin=(followers.c.follower_id == id),
+        secondaryjoin=(followers.c.followed_id == id),
+        backref=db.backref('followers', lazy='dynamic'), lazy='dynamic')
 
     def __repr__(self):
         return f'<User {self.username}>'
 
 # ---------------------------- User Registration ---------------------------- #
-@app.route('/register', methods=['GET', 'POST'])
+@user_bp.route('/register', methods=['GET', 'POST'])
 def register():
     if request.method == 'POST':
         username = request.form['username']
@@ -38,13 +48,15 @@ def register():
         new_user = User(username=username, email=email, password=hashed_password)
         db.session.add(new_user)
         db.session.commit()
+        from utils.autocomplete import note_user_created
+        note_user_created(new_user)
         flash("Registration successful!", "success")
-        return redirect(url_for('login'))
+        return redirect(url_for('.login'))
 
     return render_template('register.html')
 
 # ---------------------------- User Login ---------------------------- #
-@app.route('/login', methods=['GET', 'POST'])
+@user_bp.route('/login', methods=['GET', 'POST'])
 def login():
     if request.method == 'POST':
         email = request.form['email']
@@ -54,17 +66,17 @@ def login():
         if user and check_password_hash(user.password, password):
             session['user_id'] = user.id
             flash("Login successful!", "success")
-            return redirect(url_for('profile'))
+            return redirect(url_for('.profile'))
 
         flash("Invalid credentials, please try again.", "danger")
 
     return render_template('login.html')
 
 # ---------------------------- User Profile ---------------------------- #
-@app.route('/profile', methods=['GET', 'POST'])
+@user_bp.route('/profile', methods=['GET', 'POST'])
 def profile():
     if 'user_id' not in session:
-        return redirect(url_for('login'))
+        return redirect(url_for('.login'))
 
     user = User.query.filter_by(id=session['user_id']).first()
 
@@ -72,7 +84,7 @@ def profile():
         if request.files['profile_pic']:
             profile_pic = request.files['profile_pic']
             filename = secure_filename(profile_pic.filename)
-            profile_pic.save(os.path.join(app.config['UPLOAD_FOLDER'], filename))
+            profile_pic.save(os.path.join(UPLOAD_FOLDER, filename))
             user.profile_pic = filename
 
         user.bio = request.form['bio']
@@ -82,10 +94,10 @@ def profile():
     return render_template('profile.html', user=user)
 
 # ---------------------------- Change Password ---------------------------- #
-@app.route('/change_password', methods=['GET', 'POST'])
+@user_bp.route('/change_password', methods=['GET', 'POST'])
 def change_password():
     if 'user_id' not in session:
-        return redirect(url_for('login'))
+        return redirect(url_for('.login'))
 
     user = User.query.filter_by(id=session['user_id']).first()
 
@@ -100,7 +112,7 @@ def change_password():
                 user.password = hashed_password
                 db.session.commit()
                 flash("Password changed successfully!", "success")
-                return redirect(url_for('profile'))
+                return redirect(url_for('.profile'))
             else:
                 flash("New passwords do not match.", "danger")
         else:
@@ -109,27 +121,25 @@ def change_password():
     return render_template('change_password.html')
 
 # ---------------------------- Privacy Settings ---------------------------- #
-@app.route('/privacy', methods=['GET', 'POST'])
+@user_bp.route('/privacy', methods=['GET', 'POST'])
 def privacy():
     if 'user_id' not in session:
-        return redirect(url_for('login'))
+        return redirect(url_for('.login'))
 
     user = User.query.filter_by(id=session['user_id']).first()
 
     if request.method == 'POST':
         user.is_private = True if request.form.get('is_private') == 'on' else False
         db.session.commit()
+        from utils.cache import on_privacy_changed
+        on_privacy_changed(user.id)
         flash("Privacy settings updated successfully!", "success")
 
     return render_template('privacy.html', user=user)
 
 # ---------------------------- Logout ---------------------------- #
-@app.route('/logout')
+@user_bp.route('/logout')
 def logout():
     session.pop('user_id', None)
     flash("You have been logged out.", "info")
-    return redirect(url_for('login'))
-
-# ---------------------------- Run Application ---------------------------- #
-if __name__ == '__main__':
-    app.run(debug=True)
+    return redirect(url_for('.login'))
@@ -164,6 +164,91 @@ document.addEventListener("DOMContentLoaded", function () {
         observer.observe(img);
     });
 
+    // ------------------------ HLS Playback ------------------------
+    // Browsers without native HLS play the playlist through hls.js when the page includes it;
+    // otherwise they fall back to the MP4 <source> of the video.
+    document.querySelectorAll('video[data-hls-src]').forEach((video) => {
+        if (video.canPlayType('application/vnd.apple.mpegurl') || !window.Hls || !window.Hls.isSupported()) return;
+        const hls = new window.Hls({ capLevelToPlayerSize: true }); // No 1080p for a 360px-wide player
+        hls.loadSource(video.dataset.hlsSrc);
+        hls.attachMedia(video);
+    });
+
+    // ------------------------ Watched Videos ------------------------
+    // Videos with data-watched-url (reels) report once, when they end or have played long
+    // enough to count as watched, so the reels feed stops showing them.
+    const WATCHED_SECONDS = 10;
+
+    document.querySelectorAll('video[data-watched-url]').forEach((video) => {
+        let reported = false;
+        const report = () => {
+            if (reported) return;
+            reported = true;
+            fetch(video.dataset.watchedUrl, { method: 'POST', keepalive: true });
+        };
+        video.addEventListener('ended', report);
+        video.addEventListener('timeupdate', () => {
+            if (video.currentTime >= WATCHED_SECONDS) report();
+        });
+    });
+
+    // ------------------------ Resumable Uploads ------------------------
+    // Forms marked data-resumable-upload send files over the form size limit in chunks
+    // (see /uploads), then submit the form with the upload id instead of the file.
+    const RESUMABLE_THRESHOLD = 8 * 1024 * 1024;
+
+    async function uploadInChunks(file) {
+        let response = await fetch('/uploads', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ filename: file.name, size: file.size })
+        });
+        if (!response.ok) throw new Error('Upload refused');
+        let { upload_id: uploadId, offset, chunk_size: chunkSize } = await response.json();
+
+        let failures = 0;
+        while (offset < file.size) {
+            try {
+                response = await fetch(`/uploads/${uploadId}`, {
+                    method: 'PATCH',
+                    headers: { 'Upload-Offset': String(offset) },
+                    body: file.slice(offset, offset + chunkSize)
+                });
+                if (!response.ok && response.status !== 409) throw new Error('Chunk failed');
+                offset = (await response.json()).offset; // 409 also reports where to resume
+                failures = 0;
+            } catch (error) {
+                // Ask the server how much arrived, then resume from there
+                if (++failures > 5) throw error;
+                await new Promise((resolve) => setTimeout(resolve, 1000 * failures));
+                const status = await fetch(`/uploads/${uploadId}`, { method: 'HEAD' });
+                if (status.ok) offset = Number(status.headers.get('Upload-Offset'));
+            }
+        }
+        return uploadId;
+    }
+
+    document.querySelectorAll('form[data-resumable-upload]').forEach((form) => {
+        form.addEventListener('submit', async (e) => {
+            const input = form.querySelector('input[type="file"]');
+            const file = input && input.files[0];
+            if (!file || file.size <= RESUMABLE_THRESHOLD) return; // Small files go with the form
+            e.preventDefault();
+            const hidden = document.createElement('input');
+            hidden.type = 'hidden';
+            hidden.name = 'upload_id';
+            try {
+                hidden.value = await uploadInChunks(file);
+            } catch (error) {
+                alert('Upload failed. Please try again.');
+                return;
+            }
+            form.appendChild(hidden);
+            input.disabled = true; // Do not send the file again
+            form.submit();
+        });
+    });
+
 });
 
 
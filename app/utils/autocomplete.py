@@ -0,0 +1,193 @@
+import bisect
+import heapq
+import threading
+import time
+from flask import current_app
+from sqlalchemy import func
+from models import Hashtag, PostHashtag, User
+from models.user import followers
+from database import db  # Assuming database.py handles the DB session
+
+# Prefixes up to this length match many entries, so their top results are kept precomputed
+SHORT_PREFIX_LENGTH = 2
+
+# Results kept per precomputed short prefix; requests asking for more are computed directly
+TOP_CACHE_SIZE = 50
+
+# Sorts after every character, so `prefix + PREFIX_END` bounds the keys starting with prefix
+PREFIX_END = '\U0010ffff'
+
+# ---------------------- Prefix Index ---------------------- #
+class PrefixIndex:
+    """
+    Sorted-array prefix index over (label, popularity, id) entries for typeahead.
+
+    Keys are (lowercased label, id) pairs kept in one sorted list, so a prefix is two
+    bisections away from its slice of matches, and labels differing only in case (or shared
+    by several ids) are separate entries. Matches are ranked by popularity (then alphabetically) with a
+    bounded heap, and the top results of 1-2 character prefixes are cached because those
+    slices are large. Entries can be added and re-ranked in place between full rebuilds.
+    """
+
+    def __init__(self, entries=()):
+        self._lock = threading.Lock()
+        self.rebuild(entries)
+
+    def rebuild(self, entries):
+        """Replace the whole index with (label, popularity, id) entries."""
+        items = {(label.lower(), entry_id): (label, popularity, entry_id) for label, popularity, entry_id in entries}
+        with self._lock:
+            self._items = items
+            self._keys = sorted(items)
+            self._top = {}
+            self.built_at = time.monotonic()
+
+    def __len__(self):
+        return len(self._keys)
+
+    def add(self, label, popularity=0, entry_id=None):
+        """Insert an entry, or update its popularity if it is already indexed."""
+        key = (label.lower(), entry_id)
+        with self._lock:
+            if key not in self._items:
+                bisect.insort(self._keys, key)
+            self._items[key] = (label, popularity, entry_id)
+            self._forget_prefixes(key)
+
+    def bump(self, label, delta=1, entry_id=None):
+        """Change an indexed entry's popularity by delta. Returns False if the entry is unknown."""
+        key = (label.lower(), entry_id)
+        with self._lock:
+            if key not in self._items:
+                return False
+            stored_label, popularity, entry_id = self._items[key]
+            self._items[key] = (stored_label, popularity + delta, entry_id)
+            self._forget_prefixes(key)
+            return True
+
+    def _forget_prefixes(self, key):
+        for length in range(1, SHORT_PREFIX_LENGTH + 1):
+            self._top.pop(key[0][:length], None)
+
+    def search(self, prefix, limit=10):
+        """Return up to `limit` (label, popularity, id) entries whose label starts with prefix, most popular first."""
+        prefix = prefix.strip().lower()
+        if not prefix or limit <= 0:
+            return []
+
+        with self._lock:
+            if len(prefix) <= SHORT_PREFIX_LENGTH and limit <= TOP_CACHE_SIZE:
+                if prefix not in self._top:
+                    self._top[prefix] = self._rank(prefix, TOP_CACHE_SIZE)
+                return self._top[prefix][:limit]
+            return self._rank(prefix, limit)
+
+    def _rank(self, prefix, limit):
+        start = bisect.bisect_left(self._keys, (prefix,))
+        end = bisect.bisect_left(self._keys, (prefix + PREFIX_END,), start)
+        keys = heapq.nsmallest(limit, (self._keys[i] for i in range(start, end)), key=lambda key: (-self._items[key][1], key))
+        return [self._items[key] for key in keys]
+
+# ---------------------- Index Sources ---------------------- #
+def hashtag_entries():
+    """(name, number of posts, id) for every hashtag."""
+    counts = db.session.query(PostHashtag.hashtag_id, func.count(PostHashtag.id).label('total')).group_by(PostHashtag.hashtag_id).subquery()
+    return db.session.query(Hashtag.hashtag, func.coalesce(counts.c.total, 0), Hashtag.id) \
+                     .outerjoin(counts, counts.c.hashtag_id == Hashtag.id).yield_per(1000)
+
+def user_entries():
+    """(username, number of followers, id) for every user."""
+    counts = db.session.query(followers.c.followed_id, func.count().label('total')).group_by(followers.c.followed_id).subquery()
+    return db.session.query(User.username, func.coalesce(counts.c.total, 0), User.id) \
+                     .outerjoin(counts, counts.c.followed_id == User.id).yield_per(1000)
+
+# ---------------------- Per-Worker Indexes ---------------------- #
+_indexes = {}
+_sources = {'hashtags': hashtag_entries, 'users': user_entries}
+_build_lock = threading.Lock()
+_rebuilding = set()  # Names of the indexes being rebuilt in the background
+
+def get_index(name):
+    """
+    Return this worker's index of 'hashtags' or 'users'. Incremental updates keep it current,
+    but only for writes served by this worker, so once it is older than
+    AUTOCOMPLETE_REBUILD_SECONDS a background thread builds a fresh one from the database
+    and swaps it in. Requests keep using the old index meanwhile; only the very first build
+    runs inline.
+    """
+    index = _indexes.get(name)
+    if index is None:
+        with _build_lock:
+            index = _indexes.get(name)
+            if index is None:
+                index = _indexes[name] = PrefixIndex(_sources[name]())
+        return index
+    if time.monotonic() - index.built_at > current_app.config.get('AUTOCOMPLETE_REBUILD_SECONDS', 600):
+        _start_rebuild(name)
+    return index
+
+def _start_rebuild(name):
+    """Build a replacement index on a background thread, unless one is being built already."""
+    with _build_lock:
+        if name in _rebuilding:
+            return
+        _rebuilding.add(name)
+    app = current_app._get_current_object()
+
+    def run():
+        try:
+            with app.app_context():
+                _indexes[name] = PrefixIndex(_sources[name]())
+        except Exception:
+            app.logger.exception("Rebuilding the %s autocomplete index failed.", name)
+        finally:
+            with _build_lock:
+                _rebuilding.discard(name)
+
+    threading.Thread(target=run, name=f'autocomplete-{name}', daemon=True).start()
+
+# ---------------------- Incremental Updates ---------------------- #
+def note_hashtags_used(hashtag_ids):
+    """Count one more post for each {name: id} hashtag, adding tags this worker has not indexed yet."""
+    index = _indexes.get('hashtags')
+    if index is None:
+        return  # Built from the database on first use
+    for name, hashtag_id in hashtag_ids.items():
+        if not index.bump(name, 1, hashtag_id):
+            index.add(name, 1, hashtag_id)
+
+def note_user_created(user):
+    """Make a new account searchable right away in this worker."""
+    index = _indexes.get('users')
+    if index is not None:
+        index.add(user.username, 0, user.id)
+
+# ---------------------- Autocomplete ---------------------- #
+def search_hashtags_by_prefix(prefix, limit=None):
+    """Hashtag objects whose name starts with prefix, most used first, for the search pages."""
+    if limit is None:
+        limit = current_app.config.get('USER_SEARCH_LIMIT', 10)
+    ids = [entry_id for _, _, entry_id in get_index('hashtags').search(prefix.strip().lstrip('#'), limit)]
+    if not ids:
+        return []
+    found = {hashtag.id: hashtag for hashtag in Hashtag.query.filter(Hashtag.id.in_(ids))}
+    return [found[hashtag_id] for hashtag_id in ids if hashtag_id in found]
+
+def autocomplete(prefix, kind='all', limit=None):
+    """
+    Suggest hashtags and/or usernames starting with prefix, most popular first.
+
+    kind is 'hashtags', 'users' or 'all'; at most `limit` (USER_SEARCH_LIMIT by default)
+    suggestions of each kind are returned.
+    """
+    if limit is None:
+        limit = current_app.config.get('USER_SEARCH_LIMIT', 10)
+    prefix = prefix.strip()
+    results = {}
+    if kind in ('hashtags', 'all'):
+        results['hashtags'] = [{'id': entry_id, 'name': label, 'posts': popularity}
+                               for label, popularity, entry_id in get_index('hashtags').search(prefix.lstrip('#'), limit)]
+    if kind in ('users', 'all'):
+        results['users'] = [{'id': entry_id, 'username': label, 'followers': popularity}
+                            for label, popularity, entry_id in get_index('users').search(prefix.lstrip('@'), limit)]
+    return results
@@ -0,0 +1,42 @@
+import hashlib
+import math
+
+# ---------------------- Bloom Filter ---------------------- #
+class BloomFilter:
+    """
+    Fixed-size set membership with no false negatives and a tunable false-positive rate.
+
+    `size_bits` bits and `hashes` probes per item: with the defaults (64 Kbit = 8 KB, 7 probes)
+    about 6,800 items fit at a 1% false-positive rate. The bits are a plain bytearray, so a
+    filter is stored as bytes and rebuilt with from_bytes().
+    """
+
+    def __init__(self, size_bits=65536, hashes=7, bits=None):
+        self.size_bits = size_bits
+        self.hashes = hashes
+        self.bits = bytearray(bits) if bits is not None else bytearray((size_bits + 7) // 8)
+
+    @classmethod
+    def from_bytes(cls, data, hashes=7):
+        return cls(len(data) * 8, hashes, data)
+
+    @staticmethod
+    def capacity(size_bits, hashes=7, error_rate=0.01):
+        """Items a filter holds before its false-positive rate passes `error_rate`."""
+        return int(-size_bits / hashes * math.log(1 - error_rate ** (1 / hashes)))
+
+    def _positions(self, item):
+        # Double hashing: k probes from two 64-bit halves of one digest
+        digest = hashlib.blake2b(str(item).encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        return ((first + i * second) % self.size_bits for i in range(self.hashes))
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def to_bytes(self):
+        return bytes(self.bits)
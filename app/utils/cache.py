@@ -0,0 +1,162 @@
+import functools
+import threading
+import time
+from collections import defaultdict
+from flask import request, session
+from flask_login import current_user
+from extensions import cache
+
+# Backend names accepted in CACHE_TYPE, mapped to Flask-Caching backends
+CACHE_BACKENDS = {
+    'simple': 'SimpleCache',
+    'redis': 'RedisCache',
+    'filesystem': 'FileSystemCache',
+    'null': 'NullCache',
+}
+
+# ---------------------- Cache Setup ---------------------- #
+def init_cache(app):
+    """Attach the cache to the app, translating the short CACHE_TYPE names."""
+    cache_type = app.config.get('CACHE_TYPE', 'simple')
+    app.config['CACHE_TYPE'] = CACHE_BACKENDS.get(cache_type, cache_type)
+    cache.init_app(app)
+
+# ---------------------- Hit/Miss Statistics ---------------------- #
+_stats = defaultdict(lambda: {'hits': 0, 'misses': 0})
+_stats_lock = threading.Lock()
+
+def _record(family, hit):
+    with _stats_lock:
+        _stats[family]['hits' if hit else 'misses'] += 1
+
+def cache_stats():
+    """Hits, misses and hit ratio per key family, counted in this worker since it started."""
+    with _stats_lock:
+        report = {}
+        for family, counts in _stats.items():
+            total = counts['hits'] + counts['misses']
+            report[family] = dict(counts, hit_ratio=round(counts['hits'] / total, 3) if total else None)
+        return report
+
+# ---------------------- Generations ---------------------- #
+def _generation_key(family, scope):
+    return f'gen:{family}' if scope is None else f'gen:{family}:{scope}'
+
+def _generation(family, scope=None):
+    """
+    Current generation of a family (or of one scope inside it).
+
+    Generations start from the clock so that a generation lost to eviction or a restart
+    never comes back to a number that older entries were stored under.
+    """
+    key = _generation_key(family, scope)
+    value = cache.get(key)
+    if value is None:
+        cache.add(key, int(time.time() * 1000), timeout=0)
+        value = cache.get(key)
+    return value
+
+def invalidate(family, scope=None):
+    """
+    Drop every cached entry of a family, or only those of one scope (e.g. one post id).
+
+    Nothing is deleted: bumping the generation changes the keys readers build, and the old
+    entries simply expire.
+    """
+    key = _generation_key(family, scope)
+    if cache.get(key) is None:
+        cache.set(key, int(time.time() * 1000), timeout=0)
+    else:
+        cache.cache.inc(key)
+
+def build_key(family, parts=(), scope=None):
+    """Key for an entry of a family; it changes whenever the family or its scope is invalidated."""
+    key = f'{family}:{_generation(family)}'
+    if scope is not None:
+        key += f':{scope}:{_generation(family, scope)}'
+    return ':'.join([key] + [str(part) for part in parts])
+
+# ---------------------- Cached Values ---------------------- #
+def get_or_set(family, parts, builder, scope=None, timeout=None):
+    """Return the cached value for (family, parts, scope), computing it with builder() on a miss."""
+    key = build_key(family, parts, scope)
+    value = cache.get(key)
+    if value is not None:
+        _record(family, True)
+        return value
+    _record(family, False)
+    value = builder()
+    cache.set(key, value, timeout=timeout)
+    return value
+
+# ---------------------- Cached Views ---------------------- #
+def viewer_key():
+    """Cache scope for the requesting user: their id, or 'anon'."""
+    return current_user.get_id() if current_user.is_authenticated else 'anon'
+
+def cached_view(family, scope=None, per_viewer=False, timeout=None):
+    """
+    Cache the rendered page of a GET view.
+
+    scope is a function of the view's arguments naming what the page depends on (e.g. a post
+    id), so invalidate(family, scope) drops just those pages. per_viewer keeps one entry per
+    user for pages showing viewer-specific or privacy-restricted content. Pages rendered with
+    pending flash messages, non-GET requests and non-string responses are never cached.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method != 'GET' or session.get('_flashes'):
+                return view(*args, **kwargs)
+
+            parts = [request.full_path]
+            if per_viewer:
+                parts.append(viewer_key())
+            key = build_key(family, parts, scope(**kwargs) if scope else None)
+
+            page = cache.get(key)
+            if page is not None:
+                _record(family, True)
+                return page
+            _record(family, False)
+
+            response = view(*args, **kwargs)
+            if isinstance(response, str):
+                cache.set(key, response, timeout=timeout)
+            return response
+        return wrapper
+    return decorator
+
+# ---------------------- Invalidation Hooks ---------------------- #
+def on_post_created(post):
+    """A new post changes its author's profile."""
+    invalidate('profile', post.user_id)
+
+def on_post_changed(post_id, user_id):
+    """An edited post changes its own page and its author's profile."""
+    invalidate('post', post_id)
+    invalidate('profile', user_id)
+
+def on_post_deleted(post_id, user_id):
+    """A deleted post must also drop out of every ranking and hashtag listing."""
+    on_post_changed(post_id, user_id)
+    for family in ('trending', 'trending_hashtags', 'hashtag'):
+        invalidate(family)
+
+def on_post_engagement(post_id):
+    """A like or comment changes the counts and comments shown on the post's page."""
+    invalidate('post', post_id)
+
+def on_hashtags_added(hashtag_names):
+    """Newly tagged posts appear in their hashtag listings."""
+    for name in hashtag_names:
+        invalidate('hashtag', name)
+
+def on_profile_changed(user_id):
+    """Bio, picture or other account details changed."""
+    invalidate('profile', user_id)
+
+def on_privacy_changed(user_id):
+    """Visibility changed: drop the profile and every cached post page, since any may show this user's posts."""
+    invalidate('profile', user_id)
+    invalidate('post')
@@ -0,0 +1,34 @@
+from sqlalchemy import func, select, update
+from models import Post, Comment, Like
+from models.reel import Reel, ReelLike, ReelComment
+from database import db  # Assuming database.py handles the DB session
+
+# Counter columns maintained for each model: (model, like model, comment model, foreign key name)
+COUNTED_MODELS = (
+    (Post, Like, Comment, 'post_id'),
+    (Reel, ReelLike, ReelComment, 'reel_id'),
+)
+
+# ---------------------- Atomic Counter Update ---------------------- #
+def increment_counter(model, object_id, column_name, delta=1, session=None):
+    """
+    Add delta to a counter column with a single `UPDATE ... SET n = n + delta`.
+
+    The database applies the change atomically, so concurrent likes never lose updates the
+    way a Python read-modify-write would. The caller commits with the rest of its transaction,
+    on `session` when given (db.session otherwise).
+    """
+    column = getattr(model, column_name)
+    (session or db.session).execute(
+        update(model).where(model.id == object_id).values({column: column + delta})
+        .execution_options(synchronize_session=False)
+    )
+
+# ---------------------- Reconcile Counters ---------------------- #
+def reconcile_counters():
+    """Recompute every like_count and comment_count from the likes and comments tables in bulk."""
+    for model, like_model, comment_model, foreign_key in COUNTED_MODELS:
+        like_total = select(func.count(like_model.id)).where(getattr(like_model, foreign_key) == model.id).scalar_subquery()
+        comment_total = select(func.count(comment_model.id)).where(getattr(comment_model, foreign_key) == model.id).scalar_subquery()
+        db.session.execute(update(model).values(like_count=like_total, comment_count=comment_total))
+    db.session.commit()
@@ -0,0 +1,37 @@
+import json
+import os
+from models import Post
+from models.message import Message
+from models.notification import Notification
+from utils.helpers import iter_query
+
+# Tables included in a full data export: file name -> model
+EXPORT_MODELS = {
+    'posts': Post,
+    'messages': Message,
+    'notifications': Notification,
+}
+
+# ---------------------- Serialize a Row ---------------------- #
+def row_to_dict(obj):
+    """Convert a model instance into a dict of its column values."""
+    return {column.key: getattr(obj, column.key) for column in obj.__table__.columns}
+
+# ---------------------- Export One Table ---------------------- #
+def export_model(model, fileobj, batch_size=1000):
+    """Write every row of a model to fileobj as JSON lines, streaming in batches. Returns the row count."""
+    count = 0
+    for obj in iter_query(model.query.order_by(model.id), batch_size):
+        fileobj.write(json.dumps(row_to_dict(obj), default=str) + '\n')
+        count += 1
+    return count
+
+# ---------------------- Export All Tables ---------------------- #
+def export_all(directory, batch_size=1000):
+    """Export posts, messages and notifications into `<directory>/<name>.jsonl`. Returns {name: row count}."""
+    os.makedirs(directory, exist_ok=True)
+    counts = {}
+    for name, model in EXPORT_MODELS.items():
+        with open(os.path.join(directory, f'{name}.jsonl'), 'w') as f:
+            counts[name] = export_model(model, f, batch_size)
+    return counts
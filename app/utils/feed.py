@@ -0,0 +1,82 @@
+import base64
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import and_, or_
+from models import Post
+from models.user import followers
+from database import db  # Assuming database.py handles the DB session
+from utils.query_options import post_list_options
+
+# ---------------------- Encode a Feed Cursor ---------------------- #
+def encode_cursor(created_at, post_id):
+    """Encode the (created_at, id) position of the last post on a page into an opaque token."""
+    raw = f"{created_at.isoformat()}|{post_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+# ---------------------- Decode a Feed Cursor ---------------------- #
+def decode_cursor(cursor):
+    """Decode a feed cursor back into (created_at, id). Returns None if it is missing or malformed."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, post_id = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        return datetime.fromisoformat(created_at), int(post_id)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+# ---------------------- Followed Authors ---------------------- #
+def followed_ids_query(user_id):
+    """Subquery selecting the ids of every account the user follows."""
+    return db.session.query(followers.c.followed_id).filter(followers.c.follower_id == user_id)
+
+# ---------------------- Keyset Filter ---------------------- #
+def apply_keyset(query, position):
+    """Restrict a newest-first post query to rows strictly after the given (created_at, id) position."""
+    if position is None:
+        return query
+    created_at, post_id = position
+    return query.filter(or_(
+        Post.created_at < created_at,
+        and_(Post.created_at == created_at, Post.id < post_id)
+    ))
+
+# ---------------------- Home Feed Page ---------------------- #
+def get_feed_page(user_id, cursor=None, per_page=None, include_own=True):
+    """
+    Return one page of the home feed as (posts, next_cursor).
+
+    Only posts by followed accounts (and the viewer's own posts, unless include_own is False)
+    are returned, newest first. Pages are addressed by an opaque (created_at, id) cursor instead
+    of OFFSET, so every page is a bounded index range scan however deep the viewer scrolls.
+    next_cursor is None on the last page.
+    """
+    authors = Post.user_id.in_(followed_ids_query(user_id))
+    if include_own:
+        authors = or_(authors, Post.user_id == user_id)
+
+    return paginate_posts(Post.query.options(*post_list_options()).filter(authors), cursor, per_page)
+
+# ---------------------- Keyset Pager ---------------------- #
+def paginate_posts(query, cursor=None, per_page=None):
+    """
+    Return one newest-first page of any Post query as (posts, next_cursor).
+
+    Uses the same (created_at, id) cursor as the feed, so each page is a bounded range scan
+    on an index ending in created_at; next_cursor is None on the last page. Posts whose media
+    is still processing (or failed) are left out.
+    """
+    if per_page is None:
+        per_page = current_app.config.get('POSTS_PER_PAGE', 20)
+    query = apply_keyset(query.filter(Post.media_status == 'ready'), decode_cursor(cursor))
+
+    # Fetch one extra row to learn whether another page exists without a COUNT(*)
+    posts = query.order_by(Post.created_at.desc(), Post.id.desc()).limit(per_page + 1).all()
+
+    next_cursor = None
+    if len(posts) > per_page:
+        posts = posts[:per_page]
+        last = posts[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+
+    return posts, next_cursor
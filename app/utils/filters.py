@@ -1,11 +1,16 @@
 import re
 from datetime import datetime
+from sqlalchemy import func
 from werkzeug.routing import BaseConverter
+from models import Hashtag, Post
+from models.hashtag import normalize_hashtags
+from utils.feed import paginate_posts
 
 # ---------------------- Filter Posts by Hashtag ---------------------- #
 def filter_posts_by_hashtags(posts, hashtags):
     """Filter posts that contain any of the given hashtags."""
-    return [post for post in posts if any(hashtag in post.hashtags for hashtag in hashtags)]
+    names = set(normalize_hashtags(hashtags))
+    return [post for post in posts if any(hashtag.hashtag in names for hashtag in post.hashtags)]
 
 # ---------------------- Filter Posts by Date Range ---------------------- #
 def filter_posts_by_date(posts, start_date=None, end_date=None):
@@ -24,18 +29,18 @@ def filter_posts_by_user(posts, user_id):
 
 # ---------------------- Search Posts by Title ---------------------- #
 def search_posts_by_title(posts, search_term):
-    """Search posts by title."""
+    """Search posts by title in an already loaded list. Use utils.search to search the database."""
     return [post for post in posts if search_term.lower() in post.title.lower()]
 
 # ---------------------- Search Posts by Content ---------------------- #
 def search_posts_by_content(posts, search_term):
-    """Search posts by content."""
+    """Search posts by content in an already loaded list. Use utils.search to search the database."""
     return [post for post in posts if search_term.lower() in post.content.lower()]
 
 # ---------------------- Filter Posts by Popularity ---------------------- #
 def filter_posts_by_popularity(posts, min_likes=0, min_comments=0):
     """Filter posts that have a minimum number of likes or comments."""
-    return [post for post in posts if post.likes >= min_likes and post.comments >= min_comments]
+    return [post for post in posts if post.like_count >= min_likes and post.comment_count >= min_comments]
 
 # ---------------------- Apply Date Formatting ---------------------- #
 def format_post_date(post):
@@ -46,9 +51,9 @@ def format_post_date(post):
 def filter_by_media_type(posts, media_type):
     """Filter posts by media type (image/video)."""
     if media_type == 'image':
-        return [post for post in posts if post.media_type == 'image']
+        return [post for post in posts if post.image]
     elif media_type == 'video':
-        return [post for post in posts if post.media_type == 'video']
+        return [post for post in posts if post.video]
     return posts
 
 # ---------------------- Apply Content Length Filter ---------------------- #
@@ -63,7 +68,7 @@ def filter_users_by_follower_count(users, min_followers=0):
 
 # ---------------------- Filter Content by Keywords ---------------------- #
 def filter_content_by_keywords(posts, keywords):
-    """Filter posts by keywords. Matches any keyword in the content or title."""
+    """Filter loaded posts by keywords. Matches any keyword in the content or title; use utils.search for the database."""
     return [post for post in posts if any(keyword.lower() in post.title.lower() or keyword.lower() in post.content.lower() for keyword in keywords)]
 
 # ---------------------- Normalize a Search Query ---------------------- #
@@ -73,18 +78,136 @@ def normalize_search_query(query):
 
 # ---------------------- Paginate Content ---------------------- #
 def paginate_content(content_list, page, per_page=10):
-    """Paginate content into pages."""
+    """Paginate an already loaded list. Queries should be paged with FilterSpec.page() instead."""
     start = (page - 1) * per_page
     end = start + per_page
     return content_list[start:end]
 
 # ---------------------- Apply Content Filtering (Multiple Filters) ---------------------- #
 def apply_filters(posts, filters):
-    """Apply multiple filters to the posts."""
+    """
+    Apply multiple filters to the posts.
+
+    filters is a FilterSpec, which runs as SQL when posts is a query and over the list
+    otherwise, or a {filter_func: args} dict of the list filters above.
+    """
+    if isinstance(filters, FilterSpec):
+        return filters.apply(posts) if hasattr(posts, 'filter') else filters.filter_list(posts)
     for filter_func, filter_args in filters.items():
         posts = filter_func(posts, *filter_args)
     return posts
 
+# ---------------------- SQL Versions of the Post Filters ---------------------- #
+# Each takes the same arguments as its list counterpart and returns a WHERE clause on Post.
+def hashtags_clause(hashtags):
+    return Post.hashtags.any(Hashtag.hashtag.in_(normalize_hashtags(hashtags)))
+
+def date_clause(start_date=None, end_date=None):
+    clauses = []
+    if start_date:
+        clauses.append(Post.created_at >= start_date)
+    if end_date:
+        clauses.append(Post.created_at <= end_date)
+    return clauses
+
+def user_clause(user_id):
+    return Post.user_id == user_id
+
+def popularity_clause(min_likes=0, min_comments=0):
+    return [Post.like_count >= min_likes, Post.comment_count >= min_comments]
+
+def media_type_clause(media_type):
+    if media_type == 'image':
+        return Post.image.isnot(None)
+    elif media_type == 'video':
+        return Post.video.isnot(None)
+    return []
+
+def content_length_clause(min_length=0, max_length=1000):
+    return func.length(Post.content).between(min_length, max_length)
+
+# Filter name -> (SQL clause builder, list filter)
+POST_FILTERS = {
+    'hashtags': (hashtags_clause, filter_posts_by_hashtags),
+    'date': (date_clause, filter_posts_by_date),
+    'user': (user_clause, filter_posts_by_user),
+    'popularity': (popularity_clause, filter_posts_by_popularity),
+    'media_type': (media_type_clause, filter_by_media_type),
+    'content_length': (content_length_clause, filter_by_content_length),
+}
+
+# ---------------------- Composable Filter Specs ---------------------- #
+class FilterSpec:
+    """
+    An immutable, chainable set of named post filters (see POST_FILTERS).
+
+    The same spec compiles into WHERE clauses with apply(query), so filtering happens in the
+    database and only one page of rows is loaded, or runs the list filters over posts that are
+    already in memory with filter_list(posts).
+
+        spec = FilterSpec().add('user', user_id).add('media_type', 'image')
+        posts, next_cursor = spec.page(Post.query, cursor)
+    """
+
+    def __init__(self, filters=()):
+        self.filters = tuple(filters)
+
+    def add(self, name, *args, **kwargs):
+        """Return a new spec with one more filter."""
+        if name not in POST_FILTERS:
+            raise ValueError(f"Unknown post filter: {name}")
+        return FilterSpec(self.filters + ((name, args, kwargs),))
+
+    def __len__(self):
+        return len(self.filters)
+
+    def clauses(self):
+        """The spec as a list of SQLAlchemy WHERE clauses."""
+        clauses = []
+        for name, args, kwargs in self.filters:
+            clause = POST_FILTERS[name][0](*args, **kwargs)
+            clauses.extend(clause if isinstance(clause, list) else [clause])
+        return clauses
+
+    def apply(self, query):
+        """Restrict a Post query to the posts matching every filter."""
+        return query.filter(*self.clauses())
+
+    def filter_list(self, posts):
+        """Run the list versions of the filters over already loaded posts."""
+        for name, args, kwargs in self.filters:
+            posts = POST_FILTERS[name][1](posts, *args, **kwargs)
+        return posts
+
+    def page(self, query, cursor=None, per_page=None):
+        """One newest-first page of the filtered query, as (posts, next_cursor)."""
+        return paginate_posts(self.apply(query), cursor, per_page)
+
+    @classmethod
+    def from_args(cls, args):
+        """
+        Build a spec from request arguments: hashtag, since, until (ISO dates), media_type,
+        min_likes, min_comments. Missing or malformed values are ignored.
+        """
+        spec = cls()
+        if args.get('hashtag'):
+            spec = spec.add('hashtags', args.getlist('hashtag'))
+        since, until = _parse_date(args.get('since')), _parse_date(args.get('until'))
+        if since or until:
+            spec = spec.add('date', since, until)
+        if args.get('media_type') in ('image', 'video'):
+            spec = spec.add('media_type', args['media_type'])
+        min_likes, min_comments = args.get('min_likes', 0, type=int), args.get('min_comments', 0, type=int)
+        if min_likes or min_comments:
+            spec = spec.add('popularity', min_likes, min_comments)
+        return spec
+
+def _parse_date(value):
+    try:
+        return datetime.fromisoformat(value) if value else None
+    except ValueError:
+        return None
+
 # ---------------------- URL Slug Converter ---------------------- #
 class SlugConverter(BaseConverter):
     """Custom URL converter to convert slug-like strings."""
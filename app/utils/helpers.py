@@ -2,8 +2,9 @@ import os
 import random
 import string
 from datetime import datetime
-from werkzeug.utils import secure_filename
 from flask import current_app
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 # ---------------------- Generate a Random String ---------------------- #
 def generate_random_string(length=10):
@@ -24,13 +25,16 @@ def allowed_file(filename, allowed_extensions=None):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in allowed_extensions
 
 # ---------------------- Save File ---------------------- #
-def save_file(file, upload_folder, allowed_extensions=None):
-    """Save a file to the server and return its filename."""
+def save_file(file, allowed_extensions=None):
+    """
+    Save a file as-is in the content-addressed media store and return its path relative to
+    MEDIA_ROOT. Identical files are stored once; the caller must commit the session, which
+    holds the new reference (see utils.media_store). Uploads that need resizing go through
+    utils.media_pipeline instead.
+    """
     if file and allowed_file(file.filename, allowed_extensions):
-        filename = secure_filename(file.filename)  # Secure the filename
-        filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], upload_folder, filename)
-        file.save(filepath)
-        return filename
+        from utils.media_store import store_file
+        return store_file(file)
     return None
 
 # ---------------------- Generate Slug from Text ---------------------- #
@@ -80,6 +84,21 @@ def paginate_query(query, page, per_page=10):
     """Paginate query results and return the results for the current page."""
     return query.paginate(page, per_page, False)
 
+# ---------------------- Stream Query Results ---------------------- #
+def iter_query(query, batch_size=1000):
+    """Iterate over an ORM query in batches of `batch_size` rows instead of loading every row with .all()."""
+    return query.yield_per(batch_size)
+
+# ---------------------- Upsert-Capable INSERT ---------------------- #
+def conflict_insert(model, session):
+    """INSERT for `model` supporting on_conflict_do_nothing/do_update on the session's database, or None if unsupported."""
+    dialect = session.get_bind().dialect.name
+    if dialect == 'sqlite':
+        return sqlite_insert(model)
+    if dialect == 'postgresql':
+        return postgresql_insert(model)
+    return None
+
 # ---------------------- Format File Size ---------------------- #
 def format_file_size(size_in_bytes):
     """Convert file size in bytes to a human-readable format."""
@@ -105,15 +124,8 @@ def validate_form(form_data, required_fields):
     return True, "Form validation successful"
 
 # ---------------------- Convert Image to Thumbnail ---------------------- #
-def create_thumbnail(image_path, thumbnail_folder):
-    """Create a thumbnail for an image."""
-    from PIL import Image
-    base_width = 200
-    img = Image.open(image_path)
-    w_percent = (base_width / float(img.size[0]))
-    h_size = int((float(img.size[1]) * float(w_percent)))
-    img = img.resize((base_width, h_size), Image.ANTIALIAS)
-    
-    thumbnail_path = os.path.join(thumbnail_folder, os.path.basename(image_path))
-    img.save(thumbnail_path)
-    return thumbnail_path
+def create_thumbnail(image_path, thumbnail_folder, base_width=200):
+    """Create an upright, metadata-free JPEG thumbnail for an image (uploads get theirs from the media pipeline)."""
+    from utils.images import make_thumbnail
+    thumbnail_name = os.path.splitext(os.path.basename(image_path))[0] + '.jpg'
+    return make_thumbnail(image_path, os.path.join(thumbnail_folder, thumbnail_name), base_width)
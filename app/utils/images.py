@@ -0,0 +1,106 @@
+import math
+import os
+import shutil
+
+# The functions in this module run in media worker processes: they only read and write files
+# and never touch Flask or the database.
+
+# Output format -> (file extension, PIL format, encoder options besides quality)
+IMAGE_FORMATS = {
+    'jpeg': ('jpg', 'JPEG', {'progressive': True, 'optimize': True}),
+    'webp': ('webp', 'WEBP', {'method': 4}),
+    'avif': ('avif', 'AVIF', {'speed': 6}),
+}
+
+# EXIF orientations that rotate the picture by 90 degrees, so its displayed width is the stored height
+ROTATED_ORIENTATIONS = {5, 6, 7, 8}
+
+# Resize in two steps when shrinking by more than this factor: a cheap integer reduce(), then Lanczos
+REDUCING_GAP = 3.0
+
+# ---------------------- Decoding ---------------------- #
+def open_for_width(path, width):
+    """
+    Open an image for output no wider than `width`, upright and in RGB.
+
+    JPEGs are decoded with draft(), which lets libjpeg decode at 1/2, 1/4 or 1/8 scale while
+    staying at least `width` wide: a 4000px photo needed at 1080px decodes at 2000px, for a
+    fraction of the time and memory. EXIF orientation is applied to the pixels.
+    """
+    from PIL import Image, ImageOps
+    with Image.open(path) as original:
+        if original.format == 'JPEG':
+            rotated = original.getexif().get(0x0112, 1) in ROTATED_ORIENTATIONS
+            scale = width / (original.height if rotated else original.width)
+            if scale < 1:
+                original.draft('RGB', (math.ceil(original.width * scale), math.ceil(original.height * scale)))
+        return ImageOps.exif_transpose(original).convert('RGB')
+
+def resize_to_width(image, width):
+    from PIL import Image
+    height = max(1, round(image.height * width / image.width))
+    return image.resize((width, height), Image.Resampling.LANCZOS, reducing_gap=REDUCING_GAP)
+
+# ---------------------- Encoding ---------------------- #
+def save_formats(image, output_dir, stem, formats, quality):
+    """Save `<stem>.<ext>` in each format this Pillow build can write (AVIF needs libavif). JPEG is always written."""
+    from PIL import Image
+    Image.init()
+    for name in formats:
+        extension, pil_format, options = IMAGE_FORMATS[name]
+        if name == 'jpeg' or pil_format in Image.SAVE:
+            path = os.path.join(output_dir, f'{stem}.{extension}')
+            # Written aside and renamed, as two uploads of the same file can produce it at once
+            temporary_path = f'{path}.{os.getpid()}.tmp'
+            # No exif/icc arguments, so camera, location and other metadata are not published
+            image.save(temporary_path, pil_format, quality=quality, **options)
+            os.replace(temporary_path, path)
+
+# ---------------------- Responsive Image Ladder ---------------------- #
+def process_image(staged_path, output_dir, name, widths, quality=85, formats=('webp', 'jpeg')):
+    """
+    Build the responsive copies of a staged image upload.
+
+    Writes `<name>.jpg`, upright and capped at the largest width, and `<name>_<width>.jpg` for
+    every smaller width of the ladder, plus the same files in the other `formats` (e.g. .webp)
+    for browsers that accept them. Smaller sizes are made from the next larger one, never
+    from the original. The staged file is removed. Returns the main file name.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    formats = tuple(name for name in formats if name != 'jpeg') + ('jpeg',)
+    try:
+        image = open_for_width(staged_path, max(widths))
+    finally:
+        os.remove(staged_path)
+
+    if image.width > max(widths):
+        image = resize_to_width(image, max(widths))
+    main = image
+    for width in sorted(widths, reverse=True):
+        if width < image.width:
+            image = resize_to_width(image, width)
+            save_formats(image, output_dir, f'{name}_{width}', formats, quality)
+
+    # Written last: once the main file exists, so does every smaller copy
+    save_formats(main, output_dir, name, formats, quality)
+    return f'{name}.jpg'
+
+def make_thumbnail(source_path, thumbnail_path, width, quality=85):
+    """Write a single downscaled JPEG of an image file."""
+    image = open_for_width(source_path, width)
+    if image.width > width:
+        image = resize_to_width(image, width)
+    image.save(thumbnail_path, 'JPEG', quality=quality, progressive=True, optimize=True)
+    return thumbnail_path
+
+# ---------------------- Videos ---------------------- #
+def store_video(staged_path, output_dir, name):
+    """Move a staged video into place as `<name>.<original extension>`. Returns the file name."""
+    os.makedirs(output_dir, exist_ok=True)
+    filename = name + os.path.splitext(staged_path)[1].lower()
+    path = os.path.join(output_dir, filename)
+    if os.path.exists(path):
+        os.remove(staged_path)  # Same content already stored
+    else:
+        shutil.move(staged_path, path)
+    return filename
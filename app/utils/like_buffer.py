@@ -0,0 +1,222 @@
+import atexit
+import threading
+import time
+from collections import Counter
+from flask import current_app
+from sqlalchemy import delete, insert, tuple_
+from sqlalchemy.orm import Session
+from models import Post, Like
+from models.reel import Reel, ReelLike
+from database import db  # Assuming database.py handles the DB session
+from utils.cache import on_post_engagement
+from utils.counters import increment_counter
+
+# Keys per statement when matching (user_id, target_id) pairs, kept under SQLite's bound-parameter limit
+KEY_CHUNK_SIZE = 400
+
+# Seconds to wait before retrying a failed flush, doubling per consecutive failure up to the maximum
+FLUSH_RETRY_SECONDS = 1.0
+MAX_FLUSH_RETRY_SECONDS = 60.0
+
+class LikeBufferFull(Exception):
+    """Raised when a like buffer holds max_pending intents and cannot flush them right now."""
+
+# ---------------------- Like Buffer ---------------------- #
+class LikeBuffer:
+    """
+    Per-worker buffer of like/unlike intents, written to the database in batches.
+
+    Intents are kept per (user_id, target_id), so repeated toggles collapse into the final state
+    and only that state is written. A flush resolves the whole batch with one SELECT, one
+    executemany INSERT, one DELETE, one counter UPDATE per target and a single commit.
+
+    Durability: intents live only in this worker's memory until flushed. A crash loses at most
+    the last `flush_interval` seconds (or `max_pending` intents) of likes; a clean shutdown
+    flushes at exit. A flush_interval of 0 writes every intent through immediately.
+
+    Flushes run on their own session, so an inline flush never commits or rolls back the
+    request's work. After a failed flush the next attempt waits out a growing backoff, and
+    while the buffer is full new intents are refused with LikeBufferFull.
+
+    on_written, if given, is called with each target id of a batch once it is committed, e.g.
+    to drop cached pages that were rendered from the old counts in the meantime.
+    """
+
+    def __init__(self, like_model, target_model, foreign_key, flush_interval=1.0, max_pending=5000, on_written=None):
+        self.like_model = like_model
+        self.target_model = target_model
+        self.foreign_key = foreign_key
+        self.on_written = on_written
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending = {}  # (user_id, target_id) -> True for like, False for unlike
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # Serializes flushes so a key is never written twice at once
+        self._failures = 0  # Consecutive failed flushes
+        self._retry_at = 0.0  # time.monotonic() before which flushes wait out the backoff
+        self._thread = None
+
+    # ---------------------- Recording Intents ---------------------- #
+    def set_liked(self, user_id, target_id, liked):
+        """Record that the user likes (or no longer likes) the target. Raises LikeBufferFull when full."""
+        key = (user_id, target_id)
+        with self._lock:
+            full = key not in self._pending and len(self._pending) >= self.max_pending
+        if full:
+            self.flush()  # Does nothing during the backoff after a failed flush
+
+        with self._lock:
+            if key not in self._pending and len(self._pending) >= self.max_pending:
+                raise LikeBufferFull()
+            self._pending[key] = liked
+
+        if self.flush_interval <= 0:
+            self.flush()
+        else:
+            self._start_flusher()
+
+    def toggle(self, user_id, target_id):
+        """Flip the user's like on the target and return the new state."""
+        liked = not self.is_liked(user_id, target_id)
+        self.set_liked(user_id, target_id, liked)
+        return liked
+
+    # ---------------------- Reading Your Own Writes ---------------------- #
+    def pending_state(self, user_id, target_id):
+        """Return the unflushed intent for this pair, or None when nothing is pending."""
+        with self._lock:
+            return self._pending.get((user_id, target_id))
+
+    def is_liked(self, user_id, target_id):
+        """Whether the user likes the target, seeing this worker's unflushed intents first."""
+        state = self.pending_state(user_id, target_id)
+        if state is not None:
+            return state
+        fk = getattr(self.like_model, self.foreign_key)
+        return db.session.query(self.like_model.id).filter(
+            self.like_model.user_id == user_id, fk == target_id).first() is not None
+
+    def apply_pending(self, targets, user_id):
+        """
+        Overlay the user's unflushed intents on loaded targets: sets liked_by_viewer and
+        display_like_count. The overlay stays off the mapped like_count column, so a later
+        flush or commit in the request never writes it back.
+        """
+        for target in targets:
+            target.display_like_count = target.like_count
+            state = self.pending_state(user_id, target.id)
+            if state is not None and state != getattr(target, 'liked_by_viewer', None):
+                target.display_like_count += 1 if state else -1
+                target.liked_by_viewer = state
+        return targets
+
+    # ---------------------- Flushing ---------------------- #
+    def flush(self, force=False):
+        """
+        Write every pending intent in one transaction. Returns the number of intents flushed.
+        Skipped during the backoff after a failed flush, unless force is True.
+        """
+        with self._flush_lock:
+            if not force and time.monotonic() < self._retry_at:
+                return 0
+            # Intents stay pending until committed, so readers see them throughout the write
+            with self._lock:
+                batch = dict(self._pending)
+            if not batch:
+                return 0
+
+            try:
+                self._write(batch)
+            except Exception:
+                self._failures += 1
+                delay = min(FLUSH_RETRY_SECONDS * 2 ** (self._failures - 1), MAX_FLUSH_RETRY_SECONDS)
+                self._retry_at = time.monotonic() + delay
+                current_app.logger.exception("Like buffer flush failed; %d intents kept, retrying in %.0fs.", len(batch), delay)
+                return 0
+            self._failures, self._retry_at = 0, 0.0
+            # Drop what was written, keeping intents that changed meanwhile
+            with self._lock:
+                for key, liked in batch.items():
+                    if self._pending.get(key) == liked:
+                        del self._pending[key]
+            return len(batch)
+
+    def _write(self, batch):
+        """Apply a batch of intents against the persisted likes and adjust the counters, on a session of its own."""
+        fk = getattr(self.like_model, self.foreign_key)
+        keys = list(batch)
+
+        with Session(db.engine) as session:  # Rolled back on close if anything fails
+            existing = set()
+            for start in range(0, len(keys), KEY_CHUNK_SIZE):
+                chunk = keys[start:start + KEY_CHUNK_SIZE]
+                existing.update(session.query(self.like_model.user_id, fk).filter(tuple_(self.like_model.user_id, fk).in_(chunk)))
+
+            to_insert = [key for key, liked in batch.items() if liked and key not in existing]
+            to_delete = [key for key, liked in batch.items() if not liked and key in existing]
+
+            if to_insert:
+                session.execute(insert(self.like_model), [
+                    {'user_id': user_id, self.foreign_key: target_id} for user_id, target_id in to_insert
+                ])
+            for start in range(0, len(to_delete), KEY_CHUNK_SIZE):
+                chunk = to_delete[start:start + KEY_CHUNK_SIZE]
+                session.execute(delete(self.like_model).where(tuple_(self.like_model.user_id, fk).in_(chunk)))
+
+            deltas = Counter()
+            for _, target_id in to_insert:
+                deltas[target_id] += 1
+            for _, target_id in to_delete:
+                deltas[target_id] -= 1
+            for target_id, delta in deltas.items():
+                if delta:
+                    increment_counter(self.target_model, target_id, 'like_count', delta, session=session)
+
+            session.commit()
+        if self.on_written:
+            for target_id in {target_id for _, target_id in batch}:
+                self.on_written(target_id)
+
+    def _start_flusher(self):
+        """Start the background thread that flushes this buffer every flush_interval seconds."""
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            app = current_app._get_current_object()
+
+            def run():
+                while True:
+                    time.sleep(self.flush_interval)
+                    with app.app_context():
+                        self.flush()
+
+            def flush_at_exit():
+                with app.app_context():
+                    self.flush(force=True)
+
+            self._thread = threading.Thread(target=run, name='like-buffer-flusher', daemon=True)
+            self._thread.start()
+            atexit.register(flush_at_exit)
+
+# ---------------------- Buffer Registry ---------------------- #
+_buffers = {}
+
+def _get_buffer(name, like_model, target_model, foreign_key, on_written=None):
+    if name not in _buffers:
+        _buffers[name] = LikeBuffer(
+            like_model, target_model, foreign_key,
+            flush_interval=current_app.config.get('LIKE_BUFFER_FLUSH_INTERVAL', 1.0),
+            max_pending=current_app.config.get('LIKE_BUFFER_MAX_PENDING', 5000),
+            on_written=on_written
+        )
+    return _buffers[name]
+
+def get_post_like_buffer():
+    """Return this worker's like buffer for posts."""
+    return _get_buffer('post', Like, Post, 'post_id', on_written=on_post_engagement)
+
+def get_reel_like_buffer():
+    """Return this worker's like buffer for reels."""
+    return _get_buffer('reel', ReelLike, Reel, 'reel_id')
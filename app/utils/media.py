@@ -0,0 +1,196 @@
+import functools
+import mimetypes
+import os
+from flask import current_app, request
+from werkzeug.wsgi import wrap_file
+from utils.media_store import blob_dir, blob_key
+from utils.video import ladder_complete, playlist_name, poster_name, rendition_name
+
+# Extensions of the alternate formats, in order of preference, for <source> elements
+SOURCE_FORMATS = {'avif': 'image/avif', 'webp': 'image/webp'}
+
+# HLS playlist type, as expected by players
+HLS_MIME_TYPE = 'application/vnd.apple.mpegurl'
+
+# Not known to the mimetypes table of every Python version
+for _extension, _mime_type in {**SOURCE_FORMATS, 'm3u8': HLS_MIME_TYPE, 'ts': 'video/mp2t'}.items():
+    mimetypes.add_type(_mime_type, f'.{_extension}')
+
+# Content-addressed files never change, so browsers and CDNs may keep them for a year without asking
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# Bytes read per chunk when a bounded byte range is streamed without the server's file wrapper
+RANGE_CHUNK_SIZE = 256 * 1024
+
+# ---------------------- Media URLs ---------------------- #
+def media_url(path, width=None, extension=None):
+    """
+    URL of a processed media file (a path relative to MEDIA_ROOT, as stored on records), or of
+    its `width`-pixel copy and/or its copy in another format, e.g. media_url(path, 320, 'webp').
+    """
+    stem, original_extension = os.path.splitext(path)
+    if width:
+        stem = f'{stem}_{width}'
+    extension = f'.{extension}' if extension else original_extension
+    return f"{current_app.config.get('MEDIA_URL', '/media').rstrip('/')}/{stem}{extension}"
+
+# ---------------------- Responsive Images ---------------------- #
+@functools.lru_cache(maxsize=4096)
+def image_variants(media_root, path):
+    """
+    (main width, smaller widths, alternate formats) of a processed image. Processed files never
+    change, so one header read and a few stats per image and worker are enough.
+    """
+    from PIL import Image
+    stem = os.path.join(media_root, os.path.splitext(path)[0])
+    try:
+        with Image.open(stem + '.jpg') as image:
+            width = image.width
+    except OSError:
+        return None
+    widths = tuple(w for w in current_app.config.get('MEDIA_IMAGE_WIDTHS', ()) if w < width and os.path.exists(f'{stem}_{w}.jpg'))
+    formats = tuple(extension for extension in SOURCE_FORMATS if os.path.exists(f'{stem}.{extension}'))
+    return width, widths, formats
+
+def image_srcset(path, extension='jpg'):
+    """`srcset` value listing every stored width of an image, or '' if it has not been processed."""
+    variants = image_variants(current_app.config['MEDIA_ROOT'], path) if path else None
+    if not variants:
+        return ''
+    width, widths, _ = variants
+    entries = [f'{media_url(path, w, extension)} {w}w' for w in sorted(widths)]
+    entries.append(f'{media_url(path, None, extension)} {width}w')
+    return ', '.join(entries)
+
+def image_sources(path):
+    """[(mime type, srcset)] for the alternate formats stored for an image, best first."""
+    variants = image_variants(current_app.config['MEDIA_ROOT'], path) if path else None
+    if not variants:
+        return []
+    return [(SOURCE_FORMATS[extension], image_srcset(path, extension)) for extension in variants[2]]
+
+# ---------------------- Videos ---------------------- #
+# Rendition heights of transcoded videos by path. Only complete ladders are cached, as they
+# never change; the cache is simply emptied if it grows past this many entries.
+_video_renditions = {}
+VIDEO_CACHE_SIZE = 4096
+
+def video_renditions(path):
+    """Heights of a stored video's H.264 renditions, largest first; () until it is transcoded and packaged."""
+    key = blob_key(path)
+    if not key:
+        return ()
+    if path not in _video_renditions:
+        directory = os.path.join(current_app.config['MEDIA_ROOT'], blob_dir(key))
+        if not ladder_complete(directory, key, hls=current_app.config.get('HLS_ENABLED', True)):
+            return ()  # Not transcoded yet (see utils.transcoding)
+        if len(_video_renditions) >= VIDEO_CACHE_SIZE:
+            _video_renditions.clear()
+        ladder = sorted((height for height, _ in current_app.config.get('TRANSCODE_LADDER', ())), reverse=True)
+        _video_renditions[path] = tuple(h for h in ladder if os.path.exists(os.path.join(directory, rendition_name(key, h))))
+    return _video_renditions[path]
+
+def video_file_path(path, filename):
+    """Path of another file stored next to a video (a rendition or its poster)."""
+    return f'{os.path.dirname(path)}/{filename}'
+
+def video_sources(path, max_height=720):
+    """
+    [(URL, mime type)] to list as <source> elements, best first: the largest rendition no
+    taller than `max_height` (or the smallest one), then the upload itself as a fallback.
+    """
+    if not path:
+        return []
+    renditions = video_renditions(path)
+    sources = []
+    if renditions:
+        height = next((h for h in renditions if h <= max_height), renditions[-1])
+        sources.append((media_url(video_file_path(path, rendition_name(blob_key(path), height))), 'video/mp4'))
+    sources.append((media_url(path), mimetypes.guess_type(path)[0] or 'video/mp4'))
+    return sources
+
+def video_playlist(path):
+    """URL of a transcoded video's HLS master playlist, or '' (not packaged, or HLS disabled)."""
+    if not video_renditions(path) or not current_app.config.get('HLS_ENABLED', True):
+        return ''
+    return media_url(video_file_path(path, playlist_name(blob_key(path))))
+
+def video_poster(path):
+    """URL of a transcoded video's poster frame, or ''."""
+    if not video_renditions(path):
+        return ''
+    return media_url(video_file_path(path, poster_name(blob_key(path))))
+
+# ---------------------- Serving Media ---------------------- #
+def media_etag(path, stat):
+    """
+    (ETag, immutable) for a media file. Content-addressed files get a strong ETag from their
+    name, which is their content hash plus size/format suffix; anything else falls back to
+    modification time and size.
+    """
+    if blob_key(path):
+        return os.path.basename(path), True
+    return f'{stat.st_mtime_ns:x}-{stat.st_size:x}', False
+
+def iter_file_range(file, length, chunk_size=RANGE_CHUNK_SIZE):
+    """Yield `length` bytes from the current position of `file`, then close it."""
+    try:
+        while length > 0:
+            chunk = file.read(min(chunk_size, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        file.close()
+
+def send_media(full_path, path):
+    """
+    Response for a media file on disk (`path` is its name relative to MEDIA_ROOT).
+
+    Answers If-None-Match with 304 and a single byte range (honouring If-Range) with 206, so
+    seeking in a video fetches only the part played. Whole files, and ranges running to the
+    end of the file (what players send when seeking), are handed to the server's
+    wsgi.file_wrapper, which servers like gunicorn turn into sendfile(): the bytes go from
+    the page cache to the socket without passing through Python.
+    """
+    stat = os.stat(full_path)
+    etag, immutable = media_etag(path, stat)
+    response = current_app.response_class(mimetype=mimetypes.guess_type(full_path)[0] or 'application/octet-stream')
+    response.set_etag(etag)
+    response.headers['Accept-Ranges'] = 'bytes'
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL if immutable else \
+        f"public, max-age={current_app.config.get('MEDIA_CACHE_SECONDS', 3600)}"
+
+    if request.if_none_match.contains_weak(etag):
+        response.status_code = 304
+        return response
+
+    size = stat.st_size
+    start, stop = 0, size
+    byte_range = request.range
+    # Multiple ranges are answered with the whole file, which the spec allows
+    if byte_range and len(byte_range.ranges) == 1 and (not request.if_range.etag or request.if_range.etag == etag):
+        bounds = byte_range.range_for_length(size)
+        if bounds is None:
+            response.status_code = 416
+            response.headers['Content-Range'] = f'bytes */{size}'
+            return response
+        start, stop = bounds
+        response.status_code = 206
+        response.headers['Content-Range'] = f'bytes {start}-{stop - 1}/{size}'
+
+    file = open(full_path, 'rb')
+    file.seek(start)
+    if stop == size:
+        response.response = wrap_file(request.environ, file, RANGE_CHUNK_SIZE)
+    else:
+        response.response = iter_file_range(file, stop - start)
+    response.direct_passthrough = True  # Keep Werkzeug from buffering the iterator
+    response.content_length = stop - start
+    return response
+
+def register_template_helpers(app):
+    """Make the media helpers available in every template."""
+    app.jinja_env.globals.update(media_url=media_url, image_srcset=image_srcset, image_sources=image_sources,
+                                 video_sources=video_sources, video_playlist=video_playlist, video_poster=video_poster)
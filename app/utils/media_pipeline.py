@@ -0,0 +1,272 @@
+import multiprocessing
+import os
+import threading
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import nullcontext
+from flask import current_app, has_app_context
+from models import Post, Story, User
+from models.reel import Reel
+from database import db  # Assuming database.py handles the DB session
+from utils.cache import on_post_changed, on_profile_changed
+from utils.images import process_image, store_video
+from utils.timeline import fan_out_post
+from utils.transcoding import queue_transcode
+from utils.media_store import StagedFile, acquire_blob, blob_dir, hash_to_file, mark_blob_processed, ready_blob_path, release_media
+
+IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
+VIDEO_EXTENSIONS = {'mp4', 'mov', 'avi', 'mkv'}
+
+# Bytes read per chunk while streaming an upload to the staging area
+STAGING_CHUNK_SIZE = 1024 * 1024
+
+class MediaQueueFull(Exception):
+    """Raised when this worker already has MEDIA_QUEUE_SIZE uploads waiting or being processed."""
+
+# ---------------------- Media Targets ---------------------- #
+# Attach functions store a processed file on a record and return the path it replaces
+
+def _attach_post_media(record, kind, path):
+    # Posts and stories keep images and videos in separate columns
+    if kind == 'image':
+        previous, record.image = record.image, path
+    else:
+        previous, record.video = record.video, path
+    return previous
+
+def _attach_reel_video(reel, kind, path):
+    previous, reel.video_file = reel.video_file, path
+    return previous
+
+def _attach_avatar(user, kind, path):
+    previous, user.profile_pic = user.profile_pic, path
+    return previous
+
+def _post_media_ready(post, published):
+    on_post_changed(post.id, post.user_id)
+    # Materialize a new post into followers' timelines when push mode is enabled
+    if published and current_app.config.get('TIMELINE_ENABLED'):
+        fan_out_post(post)
+
+def _avatar_ready(user, published):
+    on_profile_changed(user.id)
+
+# Target -> (model, accepted kinds, store the result on the record, run once ready).
+# The ready hook also gets whether the record was just published (processing until now).
+MEDIA_TARGETS = {
+    'post': (Post, ('image', 'video'), _attach_post_media, _post_media_ready),
+    'story': (Story, ('image', 'video'), _attach_post_media, None),
+    'reel': (Reel, ('video',), _attach_reel_video, None),
+    'avatar': (User, ('image',), _attach_avatar, _avatar_ready),
+}
+
+def media_kind(filename):
+    """'image', 'video', or None for files we do not accept."""
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    if extension in IMAGE_EXTENSIONS:
+        return 'image'
+    if extension in VIDEO_EXTENSIONS:
+        return 'video'
+    return None
+
+# ---------------------- Staging ---------------------- #
+def stage_upload(file_storage):
+    """
+    Stream an upload into MEDIA_STAGING_DIR in fixed-size chunks, hashing it on the way.
+    Returns (staged path, sha256 hex digest, size in bytes). Uploads the request parser
+    already wrote into the staging area (see utils.uploads.UploadRequest) stay where they are.
+    """
+    if isinstance(file_storage.stream, StagedFile):
+        return file_storage.stream.claim()
+    staging_dir = current_app.config['MEDIA_STAGING_DIR']
+    os.makedirs(staging_dir, exist_ok=True)
+    extension = file_storage.filename.rsplit('.', 1)[-1].lower()
+    path = os.path.join(staging_dir, f'{uuid.uuid4().hex}.{extension}')
+    try:
+        digest, size = hash_to_file(file_storage.stream, path, STAGING_CHUNK_SIZE)
+    except Exception:
+        discard_staged(path)
+        raise
+    return path, digest, size
+
+def discard_staged(path):
+    if path and os.path.exists(path):
+        os.remove(path)
+
+# ---------------------- Media Pipeline ---------------------- #
+class MediaPipeline:
+    """
+    Bounded background processing for uploaded media.
+
+    Requests only stream the upload to the staging area and return. Resizing and re-encoding
+    run in a process pool, since PIL work is CPU-bound and would otherwise hold this worker's
+    GIL. A callback back in this process stores the result on the record and marks it ready.
+
+    Output is content-addressed (see utils.media_store): files are named after the upload's
+    hash, so a file uploaded again is attached without being processed a second time.
+
+    At most queue_size uploads are waiting or in progress per worker process. reserve() fails
+    beyond that, so a burst of uploads gets a quick "try again" instead of piling up staged
+    files. A worker count of 0 processes uploads inline (handy for development and tests).
+    """
+
+    def __init__(self, app, workers=2, queue_size=32, image_widths=(150, 320, 640, 1080), image_formats=('webp', 'jpeg'), jpeg_quality=85):
+        self.app = app
+        self.workers = workers
+        self.image_widths = tuple(image_widths)
+        self.image_formats = tuple(image_formats)
+        self.jpeg_quality = jpeg_quality
+        self._slots = threading.BoundedSemaphore(queue_size)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Take a queue slot without waiting. Every successful reserve() must end in submit() or release()."""
+        return self._slots.acquire(blocking=False)
+
+    def release(self):
+        self._slots.release()
+
+    def _pool(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # Spawned, not forked: forking a threaded web worker can copy locks held by other threads
+                    self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+        return self._executor
+
+    def _run(self, function, *args):
+        if self.workers > 0:
+            return self._pool().submit(function, *args)
+        future = Future()
+        try:
+            future.set_result(function(*args))
+        except Exception as error:
+            future.set_exception(error)
+        return future
+
+    def submit(self, target, record_id, staged_path, kind, digest, ready_path=None):
+        """
+        Process a staged file for a record, using the slot taken by reserve(). When the blob was
+        processed before (ready_path), the staged copy is dropped and the stored files reused.
+        """
+        directory = blob_dir(digest)
+        output_dir = os.path.join(self.app.config['MEDIA_ROOT'], directory)
+        try:
+            if ready_path:
+                discard_staged(staged_path)
+                future = Future()
+                future.set_result(os.path.basename(ready_path))
+            elif kind == 'image':
+                future = self._run(process_image, staged_path, output_dir, digest, self.image_widths, self.jpeg_quality, self.image_formats)
+            else:
+                future = self._run(store_video, staged_path, output_dir, digest)
+        except Exception:
+            self.release()
+            discard_staged(staged_path)
+            raise
+        future.add_done_callback(lambda done: self._finish(target, record_id, kind, digest, directory, staged_path, done))
+        return future
+
+    def _finish(self, target, record_id, kind, digest, directory, staged_path, future):
+        """Runs in this process once a file is processed: store the result and mark the record."""
+        model, _, attach, on_ready = MEDIA_TARGETS[target]
+        try:
+            # Inline processing already runs inside the request's app context and session
+            with nullcontext() if has_app_context() else self.app.app_context():
+                try:
+                    path = f'{directory}/{future.result()}'.replace(os.sep, '/')
+                except Exception as error:
+                    discard_staged(staged_path)
+                    if isinstance(error, BrokenProcessPool):
+                        self._executor = None  # A worker died (e.g. out of memory); start a fresh pool next time
+                    path = None
+                    self.app.logger.exception("Media processing failed for %s %s.", target, record_id)
+
+                record = db.session.get(model, record_id)
+                if record is None or path is None:
+                    release_media(digest)  # Never attached: give back the reference accept_upload took
+                if record is None:
+                    db.session.commit()
+                    return  # Deleted while processing
+                if path is None:
+                    status = 'failed'
+                else:
+                    mark_blob_processed(digest, path)
+                    release_media(attach(record, kind, path))
+                    status = 'ready'
+                    if kind == 'video' and hasattr(record, 'transcode_status'):
+                        queue_transcode(target, record)  # Rendition ladder, made by `flask transcode-worker`
+                published = getattr(record, 'media_status', 'ready') != 'ready' and status == 'ready'
+                if hasattr(record, 'media_status'):
+                    record.media_status = status
+                db.session.commit()
+                if status == 'ready' and on_ready:
+                    on_ready(record, published)
+        finally:
+            self.release()
+
+_pipeline = None
+_pipeline_lock = threading.Lock()
+
+def get_media_pipeline():
+    """Return this worker process's media pipeline."""
+    global _pipeline
+    if _pipeline is None:
+        with _pipeline_lock:
+            if _pipeline is None:
+                config = current_app.config
+                _pipeline = MediaPipeline(
+                    current_app._get_current_object(),
+                    workers=config.get('MEDIA_WORKERS', 2),
+                    queue_size=config.get('MEDIA_QUEUE_SIZE', 32),
+                    image_widths=config.get('MEDIA_IMAGE_WIDTHS', (150, 320, 640, 1080)),
+                    image_formats=config.get('MEDIA_IMAGE_FORMATS', ('webp', 'jpeg')),
+                    jpeg_quality=config.get('MEDIA_JPEG_QUALITY', 85)
+                )
+    return _pipeline
+
+# ---------------------- Accepting Uploads ---------------------- #
+def accept_upload(file_storage, target, create_record):
+    """
+    Stage an upload and queue it for processing, so the request can return right away.
+
+    create_record(kind) is called with 'image' or 'video' and must create (or fetch) and commit
+    the record the media belongs to, returning it. The reference on the upload's blob is taken
+    in that same transaction. Returns the record, or None when the file type is not accepted
+    for the target. Raises MediaQueueFull when the pipeline is busy.
+    """
+    return accept_staged(target, media_kind(file_storage.filename or ''), lambda: stage_upload(file_storage), create_record)
+
+def accept_resumable_upload(upload, target, create_record):
+    """
+    accept_upload() for a resumable upload (see utils.uploads), which is consumed. Returns None
+    when there is no such upload or it has not received all its bytes.
+    """
+    from utils.uploads import finish_upload, upload_complete
+    if upload is None or not upload_complete(upload):
+        return None
+    return accept_staged(target, media_kind(upload.filename), lambda: finish_upload(upload), create_record)
+
+def accept_staged(target, kind, stage, create_record):
+    """Like accept_upload(), for the file stage() puts in the staging area; stage() returns (path, sha256 hex digest, size)."""
+    if kind not in MEDIA_TARGETS[target][1]:
+        return None
+
+    pipeline = get_media_pipeline()
+    if not pipeline.reserve():
+        raise MediaQueueFull()
+    staged_path = None
+    try:
+        staged_path, digest, size = stage()
+        ready_path = ready_blob_path(digest)
+        acquire_blob(digest, kind, size)
+        record = create_record(kind)
+    except Exception:
+        db.session.rollback()
+        pipeline.release()
+        discard_staged(staged_path)
+        raise
+    pipeline.submit(target, record.id, staged_path, kind, digest, ready_path)
+    return record
@@ -0,0 +1,190 @@
+import glob
+import hashlib
+import os
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import update
+from models.media import MediaBlob
+from database import db  # Assuming database.py handles the DB session
+from utils.helpers import conflict_insert
+
+# Bytes read per chunk while hashing an upload on its way to disk
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Length of the hex hash prefix used for each of the two directory levels (ab/cd/abcd...)
+SHARD_WIDTH = 2
+
+# Blobs deleted per garbage-collection batch
+GC_BATCH_SIZE = 500
+
+# ---------------------- Writing Uploads ---------------------- #
+def hash_to_file(stream, path, chunk_size=HASH_CHUNK_SIZE):
+    """Copy a stream to `path` in fixed-size chunks, hashing as it goes. Returns (sha256 hex, bytes)."""
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, 'wb') as out:
+        while True:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+            out.write(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size
+
+def hash_file(path, chunk_size=HASH_CHUNK_SIZE):
+    """(sha256 hex, bytes) of a file on disk."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+        return digest.hexdigest(), file.tell()
+
+class StagedFile:
+    """
+    A file in the staging area that hashes what is written to it, for upload parsers to write
+    into directly (see utils.uploads.UploadRequest). Deleted on close unless claimed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'w+b')
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self.claimed = False
+
+    def write(self, data):
+        self.digest.update(data)
+        self.size += len(data)
+        return self.file.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self.file, name)
+
+    def claim(self):
+        """Close the file and keep it. Returns (path, sha256 hex, bytes)."""
+        self.file.close()
+        self.claimed = True
+        return self.path, self.digest.hexdigest(), self.size
+
+    def close(self):
+        self.file.close()
+        if not self.claimed and os.path.exists(self.path):
+            os.remove(self.path)
+
+# ---------------------- Blob Layout ---------------------- #
+def blob_dir(sha256):
+    """Directory of a blob relative to MEDIA_ROOT, sharded by hash prefix so no directory grows huge."""
+    return os.path.join(sha256[:SHARD_WIDTH], sha256[SHARD_WIDTH:2 * SHARD_WIDTH])
+
+def blob_key(path):
+    """The hash a stored media path belongs to, or None for paths outside the store (e.g. 'default.jpg')."""
+    if not path:
+        return None
+    key = os.path.basename(path).split('.')[0].split('_')[0]
+    return key if len(key) == 64 else None
+
+# ---------------------- Reference Counting ---------------------- #
+def acquire_blob(sha256, kind, size):
+    """
+    Add a reference to the blob of an upload, creating its row on first sight, in the caller's
+    transaction. Uses an atomic upsert where supported, so identical concurrent uploads share
+    one row.
+    """
+    statement = conflict_insert(MediaBlob, db.session)
+    if statement is not None:
+        statement = statement.values(sha256=sha256, kind=kind, size=size, ref_count=1, created_at=datetime.utcnow())
+        db.session.execute(statement.on_conflict_do_update(
+            index_elements=['sha256'],
+            set_={'ref_count': MediaBlob.ref_count + 1, 'released_at': None}
+        ))
+        return
+
+    updated = db.session.execute(
+        update(MediaBlob).where(MediaBlob.sha256 == sha256)
+        .values(ref_count=MediaBlob.ref_count + 1, released_at=None)
+    )
+    if updated.rowcount == 0:
+        db.session.add(MediaBlob(sha256=sha256, kind=kind, size=size, ref_count=1))
+
+def release_media(*paths):
+    """Drop one reference per stored media path, in the caller's transaction. Other paths are ignored."""
+    for key in filter(None, map(blob_key, paths)):
+        db.session.execute(
+            update(MediaBlob).where(MediaBlob.sha256 == key, MediaBlob.ref_count > 0)
+            .values(ref_count=MediaBlob.ref_count - 1)
+        )
+        # Start the grace period when the last reference goes
+        db.session.execute(
+            update(MediaBlob).where(MediaBlob.sha256 == key, MediaBlob.ref_count == 0, MediaBlob.released_at.is_(None))
+            .values(released_at=datetime.utcnow())
+        )
+
+def ready_blob_path(sha256):
+    """Main file of an already processed blob, or None when it still has to be processed."""
+    path = db.session.query(MediaBlob.path).filter(MediaBlob.sha256 == sha256).scalar()
+    if path and os.path.exists(os.path.join(current_app.config['MEDIA_ROOT'], path)):
+        return path
+    return None
+
+def mark_blob_processed(sha256, path):
+    db.session.execute(update(MediaBlob).where(MediaBlob.sha256 == sha256).values(path=path))
+
+def store_file(file_storage):
+    """
+    Store an upload unprocessed as `<sha256>.<extension>` and take a reference on it, in the
+    caller's transaction. Returns its path relative to MEDIA_ROOT.
+    """
+    from utils.media_pipeline import discard_staged, media_kind, stage_upload
+    staged_path, sha256, size = stage_upload(file_storage)
+    path = '/'.join((blob_dir(sha256), sha256 + os.path.splitext(staged_path)[1])).replace(os.sep, '/')
+    target = os.path.join(current_app.config['MEDIA_ROOT'], path)
+    if os.path.exists(target):
+        discard_staged(staged_path)  # Same content already stored
+    else:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(staged_path, target)
+    acquire_blob(sha256, media_kind(file_storage.filename) or 'file', size)
+    mark_blob_processed(sha256, path)
+    return path
+
+# ---------------------- Garbage Collection ---------------------- #
+def collect_garbage(grace_seconds=None, now=None):
+    """
+    Delete the files and rows of blobs unreferenced for longer than MEDIA_GC_GRACE_SECONDS, and
+    staged uploads abandoned for as long. The grace period covers uploads that have taken a
+    reference but not yet committed the record using it. Returns the number of blobs removed.
+    """
+    if grace_seconds is None:
+        grace_seconds = current_app.config.get('MEDIA_GC_GRACE_SECONDS', 3600)
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(seconds=grace_seconds)
+    media_root = current_app.config['MEDIA_ROOT']
+
+    removed = 0
+    while True:
+        keys = [row[0] for row in db.session.query(MediaBlob.sha256)
+                .filter(MediaBlob.ref_count <= 0, MediaBlob.released_at < cutoff)
+                .limit(GC_BATCH_SIZE)]
+        if not keys:
+            break
+        # Rows go first: a blob re-acquired after this delete is simply stored again
+        deleted = MediaBlob.query.filter(MediaBlob.sha256.in_(keys), MediaBlob.ref_count <= 0) \
+                                 .delete(synchronize_session=False)
+        db.session.commit()
+        survivors = {row[0] for row in db.session.query(MediaBlob.sha256).filter(MediaBlob.sha256.in_(keys))}
+        for key in set(keys) - survivors:
+            for path in glob.glob(os.path.join(media_root, blob_dir(key), key + '*')):
+                os.remove(path)
+        removed += deleted
+
+    # Includes resumable uploads that have received nothing for as long
+    staging_dir = current_app.config.get('MEDIA_STAGING_DIR')
+    if staging_dir and os.path.isdir(staging_dir):
+        for entry in os.scandir(staging_dir):
+            if entry.is_file() and entry.stat().st_mtime < time.time() - grace_seconds:
+                os.remove(entry.path)
+    from utils.uploads import expire_uploads
+    expire_uploads(cutoff)
+    return removed
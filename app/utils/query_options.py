@@ -0,0 +1,91 @@
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload, selectinload
+from models import Post, Comment, Like, Story
+from models.reel import Reel, ReelLike
+from database import db  # Assuming database.py handles the DB session
+from utils.like_buffer import get_post_like_buffer, get_reel_like_buffer
+
+# Number of most recent comments shown under each post in list views
+COMMENT_PREVIEW_SIZE = 3
+
+# ---------------------- Post Loader Options ---------------------- #
+def post_list_options():
+    """Loader options that fetch the author with each post and every post's tags in one extra query."""
+    return (joinedload(Post.user), selectinload(Post.tags))
+
+# ---------------------- Reel Loader Options ---------------------- #
+def reel_list_options():
+    """Loader options that fetch the creator together with each reel."""
+    return (joinedload(Reel.user),)
+
+# ---------------------- Story Loader Options ---------------------- #
+def story_list_options():
+    """Loader options that fetch the author together with each story."""
+    return (joinedload(Story.user),)
+
+# ---------------------- Load Posts by Id ---------------------- #
+def posts_by_ids(ids):
+    """
+    Load posts with the list loader options, in the order of `ids`; ids of deleted posts, and
+    of posts whose media is not ready, are skipped.
+    """
+    if not ids:
+        return []
+    found = {post.id: post for post in Post.query.options(*post_list_options()).filter(Post.id.in_(ids), Post.media_status == 'ready')}
+    return [found[post_id] for post_id in ids if post_id in found]
+
+# ---------------------- Post Stats ---------------------- #
+def load_post_stats(posts, viewer_id=None, preview_size=COMMENT_PREVIEW_SIZE):
+    """
+    Attach comment_preview, liked_by_viewer and display_like_count to each post.
+
+    Uses a fixed number of queries however many posts are passed, so templates can render
+    engagement for a whole page without touching the lazy likes/comments relationships.
+    Like and comment totals come from the denormalized like_count/comment_count columns;
+    display_like_count adds the viewer's own unflushed likes.
+    """
+    ids = [post.id for post in posts]
+    if not ids:
+        return posts
+
+    # Latest `preview_size` comments per post, with their authors, via a window function
+    ranked = db.session.query(
+        Comment.id.label('id'),
+        func.row_number().over(partition_by=Comment.post_id, order_by=Comment.id.desc()).label('position')
+    ).filter(Comment.post_id.in_(ids)).subquery()
+    previews = {}
+    for comment in (Comment.query.options(joinedload(Comment.user))
+                    .join(ranked, Comment.id == ranked.c.id)
+                    .filter(ranked.c.position <= preview_size)
+                    .order_by(Comment.post_id, Comment.id)):
+        previews.setdefault(comment.post_id, []).append(comment)
+
+    liked = set()
+    if viewer_id is not None:
+        liked = {row[0] for row in db.session.query(Like.post_id).filter(Like.user_id == viewer_id, Like.post_id.in_(ids))}
+
+    for post in posts:
+        post.comment_preview = previews.get(post.id, [])
+        post.liked_by_viewer = post.id in liked
+        post.display_like_count = post.like_count
+    if viewer_id is not None:
+        get_post_like_buffer().apply_pending(posts, viewer_id)  # Show the viewer's own unflushed likes
+    return posts
+
+# ---------------------- Reel Stats ---------------------- #
+def load_reel_stats(reels, viewer_id=None):
+    """Attach liked_by_viewer and display_like_count to each reel with a single query."""
+    ids = [reel.id for reel in reels]
+    if not ids:
+        return reels
+
+    liked = set()
+    if viewer_id is not None:
+        liked = {row[0] for row in db.session.query(ReelLike.reel_id).filter(ReelLike.user_id == viewer_id, ReelLike.reel_id.in_(ids))}
+
+    for reel in reels:
+        reel.liked_by_viewer = reel.id in liked
+        reel.display_like_count = reel.like_count
+    if viewer_id is not None:
+        get_reel_like_buffer().apply_pending(reels, viewer_id)  # Show the viewer's own unflushed likes
+    return reels
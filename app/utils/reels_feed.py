@@ -0,0 +1,178 @@
+import base64
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import Float, and_, case, cast, func, or_
+from models.reel import Reel, ReelSeenFilter
+from database import db  # Assuming database.py handles the DB session
+from extensions import cache
+from utils.bloom import BloomFilter
+from utils.cache import build_key
+from utils.feed import followed_ids_query
+from utils.helpers import conflict_insert
+from utils.query_options import reel_list_options
+
+# Size of each seen-set generation: 64 Kbit (8 KB) holds about 6,800 reels at 1% false positives
+SEEN_FILTER_BITS = 65536
+SEEN_FILTER_HASHES = 7
+
+# ---------------------- Seen Set ---------------------- #
+def load_seen_filters(user_id):
+    """The viewer's seen-set generations as BloomFilters (current first), or [] before their first watch."""
+    row = db.session.get(ReelSeenFilter, user_id)
+    if row is None:
+        return []
+    filters = [BloomFilter.from_bytes(row.current, SEEN_FILTER_HASHES)]
+    if row.previous:
+        filters.append(BloomFilter.from_bytes(row.previous, SEEN_FILTER_HASHES))
+    return filters
+
+def mark_reels_watched(user_id, reel_ids):
+    """
+    Add reels to the viewer's seen-set and commit. When the current generation reaches its
+    capacity it is rotated out, keeping the false-positive rate bounded. The row is created
+    with an upsert and re-read locked, so concurrent first watches do not collide.
+    """
+    empty = {'user_id': user_id, 'current': BloomFilter(SEEN_FILTER_BITS).to_bytes(), 'current_count': 0}
+    statement = conflict_insert(ReelSeenFilter, db.session)
+    if statement is not None:
+        db.session.execute(statement.values(**empty).on_conflict_do_nothing(index_elements=['user_id']))
+    elif db.session.get(ReelSeenFilter, user_id) is None:
+        db.session.add(ReelSeenFilter(**empty))
+        db.session.flush()
+    row = ReelSeenFilter.query.filter_by(user_id=user_id).populate_existing().with_for_update().one()
+    current = BloomFilter.from_bytes(row.current, SEEN_FILTER_HASHES)
+    for reel_id in reel_ids:
+        if row.current_count >= BloomFilter.capacity(SEEN_FILTER_BITS, SEEN_FILTER_HASHES):
+            row.previous, current = current.to_bytes(), BloomFilter(SEEN_FILTER_BITS)
+            row.current_count = 0
+        current.add(reel_id)
+        row.current_count += 1
+    row.current = current.to_bytes()
+    db.session.commit()
+
+# ---------------------- Cursors ---------------------- #
+def encode_cursor(position, since):
+    """Encode a (score, id) feed position and the feed's window start into an opaque token."""
+    score, reel_id = position
+    raw = f"{score!r}|{reel_id}|{since.isoformat()}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """((score, id), since) from a cursor, or None if it is missing or malformed."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        score, reel_id, since = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        return (float(score), int(reel_id)), datetime.fromisoformat(since)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+# ---------------------- Scoring ---------------------- #
+def epoch_hours(column):
+    """SQL expression for a timestamp column as hours since the Unix epoch."""
+    if db.session.get_bind().dialect.name == 'sqlite':
+        return cast(func.strftime('%s', column), Float) / 3600.0
+    return func.extract('epoch', column) / 3600.0
+
+def reel_score(user_id):
+    """
+    SQL ranking score of a reel for a viewer, from REELS_FEED_WEIGHTS: points per like, per
+    comment, for a creator the viewer follows, and per hour of recency. Recency is counted
+    from a fixed origin rather than from "now", so that part never drifts while the viewer
+    pages. Likes and comments do change between pages, so a reel can cross the (score, id)
+    cursor: one rising past it is left for the next feed session, and one falling behind it
+    would repeat, which get_reels_page() prevents by skipping reels it already served.
+    """
+    weights = current_app.config.get('REELS_FEED_WEIGHTS', {})
+    followed = Reel.user_id.in_(followed_ids_query(user_id))
+    return (
+        Reel.like_count * weights.get('like', 1.0)
+        + Reel.comment_count * weights.get('comment', 3.0)
+        + case((followed, weights.get('follow', 50.0)), else_=0.0)
+        + epoch_hours(Reel.timestamp) * weights.get('hour', 2.0)
+    )
+
+def candidate_batch(user_id, since, position, limit):
+    """
+    The next `limit` (score, id) candidates after `position`, best first: ready reels by other
+    users posted since `since`. Only ids and scores are read, and the database keeps just the
+    top `limit` rows while ranking, so memory stays bounded however many reels exist.
+    """
+    score = reel_score(user_id)
+    query = db.session.query(score.label('score'), Reel.id).filter(
+        Reel.media_status == 'ready', Reel.user_id != user_id, Reel.timestamp >= since
+    )
+    if position is not None:
+        last_score, last_id = position
+        query = query.filter(or_(score < last_score, and_(score == last_score, Reel.id < last_id)))
+    return [(float(row.score), row.id) for row in query.order_by(score.desc(), Reel.id.desc()).limit(limit)]
+
+# ---------------------- Reels Feed Page ---------------------- #
+def _prefetch_key(user_id, cursor):
+    return build_key('reels_prefetch', [user_id, cursor])
+
+def _served_key(user_id, since):
+    # A feed session is identified by its window start, which every cursor of it carries
+    return build_key('reels_served', [user_id, since.isoformat()])
+
+def get_reels_page(user_id, cursor=None, per_page=None):
+    """
+    Return one page of the ranked reels feed as (reels, next_cursor).
+
+    Candidates are read in score order in batches of twice the page size; reels in the
+    viewer's seen-set are skipped, and at most REELS_FEED_MAX_BATCHES batches are read per
+    request so a viewer who has seen nearly everything still gets a quick (short) page. The
+    unseen candidates beyond this page are cached under the next cursor as a prefetch, so the
+    following page usually needs no ranking query at all. Reels already served in this feed
+    session are skipped too, since engagement changes can move them behind the cursor.
+    next_cursor is None at the end.
+    """
+    config = current_app.config
+    per_page = per_page or config.get('REELS_PER_PAGE', 10)
+    decoded = decode_cursor(cursor)
+    if decoded:
+        position, since = decoded
+    else:
+        position, since = None, datetime.utcnow() - timedelta(days=config.get('REELS_FEED_WINDOW_DAYS', 14))
+    seen = load_seen_filters(user_id)
+    served = (cache.get(_served_key(user_id, since)) or set()) if cursor else set()
+
+    def unseen(candidates):
+        return [candidate for candidate in candidates
+                if candidate[1] not in served and not any(candidate[1] in f for f in seen)]
+
+    prefetched = cache.get(_prefetch_key(user_id, cursor)) if cursor else None
+    if prefetched:
+        candidates, position, exhausted = prefetched
+        candidates = unseen(candidates)
+    else:
+        candidates, exhausted = [], False
+
+    wanted = 2 * per_page  # This page and the next one's prefetch
+    batches = 0
+    while len(candidates) < wanted and not exhausted and batches < config.get('REELS_FEED_MAX_BATCHES', 5):
+        batch = candidate_batch(user_id, since, position, wanted)
+        batches += 1
+        exhausted = len(batch) < wanted
+        if batch:
+            position = batch[-1]
+        candidates += unseen(batch)
+
+    page, rest = candidates[:per_page], candidates[per_page:]
+    if rest or not exhausted:
+        # Resume after the last reel shown; the prefetched rest comes first
+        next_position = page[-1] if page else position
+        next_cursor = encode_cursor(next_position, since) if next_position else None
+        if next_cursor and rest:
+            cache.set(_prefetch_key(user_id, next_cursor), (rest, position, exhausted),
+                      timeout=config.get('REELS_PREFETCH_SECONDS', 300))
+        if next_cursor:
+            cache.set(_served_key(user_id, since), served | {reel_id for _, reel_id in page},
+                      timeout=config.get('REELS_PREFETCH_SECONDS', 300))
+    else:
+        next_cursor = None
+
+    ids = [reel_id for _, reel_id in page]
+    found = {reel.id: reel for reel in Reel.query.options(*reel_list_options()).filter(Reel.id.in_(ids))} if ids else {}
+    return [found[reel_id] for reel_id in ids if reel_id in found], next_cursor
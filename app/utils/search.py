@@ -0,0 +1,177 @@
+import re
+from abc import ABC, abstractmethod
+from flask import current_app
+from sqlalchemy import or_, text
+from models import Message, Post
+from models.reel import Reel
+from database import db  # Assuming database.py handles the DB session
+from utils.query_options import posts_by_ids, reel_list_options
+
+# Searchable content: kind -> (model, indexed column, FTS5 table created by migration 0003)
+SEARCH_SOURCES = {
+    'posts': (Post, 'content', 'post_fts'),
+    'reels': (Reel, 'caption', 'reel_fts'),
+    'messages': (Message, 'content', 'message_fts'),
+}
+
+# Longest query, in terms, that is passed on to a backend
+MAX_QUERY_TERMS = 8
+
+# A word, optionally followed by * to match every word starting with it
+TERM_PATTERN = re.compile(r'(\w+)(\*?)')
+
+# ---------------------- Query Parsing ---------------------- #
+def parse_query(query):
+    """Split a user query into (term, is_prefix) pairs; `tag*` asks for a prefix match."""
+    return [(term.lower(), bool(star)) for term, star in TERM_PATTERN.findall(query or '')][:MAX_QUERY_TERMS]
+
+def fts_match(terms):
+    """FTS5 MATCH expression requiring every term. Terms are quoted so user input is never parsed as FTS syntax."""
+    return ' '.join(f'"{term}"*' if prefix else f'"{term}"' for term, prefix in terms)
+
+# ---------------------- Search Backends ---------------------- #
+class SearchBackend(ABC):
+    """
+    Interface for a full-text search backend.
+
+    search() returns one page of matching ids, best first, plus an opaque cursor for the next
+    page (None on the last page). Cursors are only meaningful to the backend that made them.
+    """
+    name = None
+
+    @abstractmethod
+    def search(self, kind, terms, limit, cursor=None, user_id=None):
+        """One page of matching ids for parsed terms, as (ids, next_cursor)."""
+
+    def rebuild(self):
+        """Re-index everything from the source tables."""
+
+class FTS5Backend(SearchBackend):
+    """
+    SQLite FTS5 search. The external-content tables and the triggers keeping them in sync are
+    created by migration 0003, so writes need no application code. Results are ranked by bm25
+    and paged with a (score, id) keyset, so a page costs one pass over the matches only.
+    """
+    name = 'fts5'
+
+    def search(self, kind, terms, limit, cursor=None, user_id=None):
+        _, _, table = SEARCH_SOURCES[kind]
+        params = {'match': fts_match(terms), 'limit': limit + 1}
+
+        matches = f'SELECT f.rowid AS id, bm25({table}) AS score FROM {table} f'
+        if kind == 'messages':
+            # Only the user's own conversations; the join runs per match, not per message
+            matches += ' JOIN message m ON m.id = f.rowid AND (m.sender_id = :user_id OR m.recipient_id = :user_id)'
+            params['user_id'] = user_id
+        matches += f' WHERE {table} MATCH :match'
+
+        sql = f'SELECT id, score FROM ({matches})'
+        if cursor is not None:
+            params['score'], params['after'] = cursor
+            sql += ' WHERE score > :score OR (score = :score AND id > :after)'
+        sql += ' ORDER BY score, id LIMIT :limit'
+
+        rows = db.session.execute(text(sql), params).fetchall()
+        next_cursor = encode_cursor(rows[limit - 1].score, rows[limit - 1].id) if len(rows) > limit else None
+        return [row.id for row in rows[:limit]], next_cursor
+
+    def rebuild(self):
+        for _, _, table in SEARCH_SOURCES.values():
+            db.session.execute(text(f"INSERT INTO {table}({table}) VALUES ('rebuild')"))
+            db.session.execute(text(f"INSERT INTO {table}({table}) VALUES ('optimize')"))
+        db.session.commit()
+
+class LikeBackend(SearchBackend):
+    """
+    Fallback for databases without FTS5 (or before migration 0003): one LIKE per term, newest
+    first, paged by id. Scans the table, so it is only meant for small or development databases.
+    """
+    name = 'like'
+
+    def search(self, kind, terms, limit, cursor=None, user_id=None):
+        model, column, _ = SEARCH_SOURCES[kind]
+        query = db.session.query(model.id)
+        for term, _ in terms:
+            # LIKE has no notion of words, so every term also matches as a prefix or substring
+            query = query.filter(getattr(model, column).ilike(f'%{term}%'))
+        if kind == 'messages':
+            query = query.filter(or_(Message.sender_id == user_id, Message.recipient_id == user_id))
+        if cursor is not None:
+            query = query.filter(model.id < cursor[1])
+
+        ids = [row[0] for row in query.order_by(model.id.desc()).limit(limit + 1)]
+        next_cursor = encode_cursor(0, ids[limit - 1]) if len(ids) > limit else None
+        return ids[:limit], next_cursor
+
+# Backends accepted in SEARCH_BACKEND ('auto' picks fts5 when its tables exist)
+SEARCH_BACKENDS = {'fts5': FTS5Backend, 'like': LikeBackend}
+
+_backends = {}
+
+def get_backend():
+    """The configured backend for the current database, resolved once per engine."""
+    engine = db.engine
+    if engine.url not in _backends:
+        name = current_app.config.get('SEARCH_BACKEND', 'auto')
+        if name == 'auto':
+            name = 'fts5' if _has_fts_tables(engine) else 'like'
+        _backends[engine.url] = SEARCH_BACKENDS[name]()
+    return _backends[engine.url]
+
+def _has_fts_tables(engine):
+    if engine.dialect.name != 'sqlite':
+        return False
+    tables = [table for _, _, table in SEARCH_SOURCES.values()]
+    with engine.connect() as connection:
+        found = connection.execute(text(
+            "SELECT count(*) FROM sqlite_master WHERE type = 'table' AND name IN (%s)" % ', '.join(f"'{table}'" for table in tables)
+        )).scalar()
+    return found == len(tables)
+
+# ---------------------- Cursors ---------------------- #
+def encode_cursor(score, last_id):
+    return f'{score!r}:{last_id}'
+
+def decode_cursor(cursor):
+    """(score, id) from a cursor string, or None for a missing or malformed cursor."""
+    try:
+        score, last_id = cursor.split(':')
+        return float(score), int(last_id)
+    except (AttributeError, ValueError):
+        return None
+
+# ---------------------- Searching ---------------------- #
+def search(kind, query, limit=None, cursor=None, user_id=None):
+    """
+    Full-text search over 'posts', 'reels' or 'messages' (only those sent or received by
+    user_id). Every term must match; `word*` matches words starting with it.
+
+    Returns (results, next_cursor): model objects best match first, and the cursor to pass
+    back for the following page, or None when there are no more results.
+    """
+    if kind not in SEARCH_SOURCES:
+        raise ValueError(f"Unknown search kind: {kind}")
+    if kind == 'messages' and user_id is None:
+        raise ValueError("Message search needs the id of the user whose messages are searched")
+
+    terms = parse_query(query)
+    if not terms:
+        return [], None
+    limit = limit or current_app.config.get('POSTS_PER_PAGE', 20)
+    ids, next_cursor = get_backend().search(kind, terms, limit, decode_cursor(cursor), user_id)
+    return load_results(kind, ids), next_cursor
+
+def load_results(kind, ids):
+    """Load the matched rows in ranking order."""
+    if kind == 'posts':
+        return posts_by_ids(ids)
+    if not ids:
+        return []
+    model, _, _ = SEARCH_SOURCES[kind]
+    query = model.query.options(*reel_list_options()) if kind == 'reels' else model.query
+    found = {row.id: row for row in query.filter(model.id.in_(ids))}
+    return [found[row_id] for row_id in ids if row_id in found]
+
+def rebuild_search_index():
+    """Re-index every searchable table (after bulk imports or restoring a backup)."""
+    get_backend().rebuild()
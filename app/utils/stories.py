@@ -0,0 +1,96 @@
+import time
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import or_
+from models import Story
+from database import db  # Assuming database.py handles the DB session
+from utils.feed import followed_ids_query
+from utils.media import media_url, video_playlist, video_poster
+from utils.media_store import release_media
+from utils.query_options import story_list_options
+
+# ---------------------- Story Tray ---------------------- #
+def get_story_tray(user_id, now=None, include_own=True):
+    """
+    The viewer's story tray: the active stories of the accounts they follow (and their own,
+    unless include_own is False) as [{'user', 'stories'}], one entry per author with the
+    stories oldest first. The viewer comes first, then the authors with the newest stories.
+
+    One query, answered from the (user_id, expiration_time) index: stories past their
+    expiration time are left out here whether or not the reaper has deleted them yet.
+    """
+    now = now or datetime.utcnow()
+    authors = Story.user_id.in_(followed_ids_query(user_id))
+    if include_own:
+        authors = or_(authors, Story.user_id == user_id)
+    stories = Story.query.options(*story_list_options()).filter(
+        authors, Story.expiration_time > now, Story.media_status == 'ready'
+    ).order_by(Story.user_id, Story.timestamp, Story.id).all()
+
+    tray = {}
+    for story in stories:
+        tray.setdefault(story.user_id, {'user': story.user, 'stories': []})['stories'].append(story)
+    return sorted(tray.values(), key=lambda entry: (entry['user'].id != user_id, -entry['stories'][-1].timestamp.timestamp()))
+
+def story_tray_json(tray):
+    """The story tray as JSON-ready dicts, with media URLs."""
+    def story_json(story):
+        video = story.video and story.transcode_status in (None, 'ready')
+        return {
+            'id': story.id,
+            'content': story.content,
+            'image': media_url(story.image) if story.image else None,
+            'video': media_url(story.video) if story.video else None,
+            'hls': video_playlist(story.video) if video else '',
+            'poster': video_poster(story.video) if video else '',
+            'created_at': story.timestamp.isoformat(),
+            'expires_at': story.expiration_time.isoformat(),
+        }
+
+    return [{
+        'user_id': entry['user'].id,
+        'username': entry['user'].username,
+        'profile_pic': media_url(entry['user'].profile_pic) if entry['user'].profile_pic and '/' in entry['user'].profile_pic else None,
+        'stories': [story_json(story) for story in entry['stories']],
+    } for entry in tray]
+
+# ---------------------- Story Reaper ---------------------- #
+def reap_expired_stories(batch_size=None, max_batches=None, now=None):
+    """
+    Delete expired stories in batches of STORY_REAP_BATCH_SIZE, each its own transaction: read
+    the ids and media paths of one batch from the expiration_time index, drop the media
+    references, then DELETE ... WHERE id IN (...). Locks stay short and memory bounded however
+    many stories expired. Stops after `max_batches` when given. Returns the number deleted.
+    """
+    batch_size = batch_size or current_app.config.get('STORY_REAP_BATCH_SIZE', 500)
+    now = now or datetime.utcnow()
+    reaped = batches = 0
+    while max_batches is None or batches < max_batches:
+        rows = db.session.query(Story.id, Story.image, Story.video) \
+                         .filter(Story.expiration_time <= now) \
+                         .order_by(Story.expiration_time).limit(batch_size).all()
+        if not rows:
+            break
+        for _, image, video in rows:
+            release_media(image, video)  # Files go with the media garbage collector's grace period
+        reaped += Story.query.filter(Story.id.in_([row.id for row in rows])).delete(synchronize_session=False)
+        db.session.commit()
+        batches += 1
+    return reaped
+
+def run_reaper(interval=None, once=False):
+    """
+    Reap expired stories every `interval` seconds (STORY_REAP_INTERVAL) until interrupted, or
+    once with once=True. Returns the number of stories deleted.
+    """
+    interval = current_app.config.get('STORY_REAP_INTERVAL', 60) if interval is None else interval
+    reaped = 0
+    while True:
+        started = time.monotonic()
+        count = reap_expired_stories()
+        reaped += count
+        if count:
+            current_app.logger.info("Reaped %d expired stories in %.1fs.", count, time.monotonic() - started)
+        if once:
+            return reaped
+        time.sleep(interval)
@@ -0,0 +1,194 @@
+import bisect
+import threading
+from flask import current_app
+from sqlalchemy import func
+from models import Post
+from models.user import followers
+from database import db  # Assuming database.py handles the DB session
+from utils.feed import decode_cursor, encode_cursor, get_feed_page
+from utils.query_options import post_list_options
+
+# ---------------------- In-Process Timeline Store ---------------------- #
+class MemoryTimelineStore:
+    """
+    Bounded per-user timelines of post ids held in this worker's memory (lost on restart).
+    Other workers never see these pushes, so it is only used with TIMELINE_MEMORY_STORE,
+    for single-process servers.
+    """
+
+    def __init__(self, max_length):
+        self.max_length = max_length
+        self._timelines = {}  # user_id -> ascending list of post ids
+        self._celebrities = set()
+        self._lock = threading.Lock()
+
+    def push(self, user_ids, post_id):
+        """Insert a post id into each user's timeline, evicting the oldest ids past max_length."""
+        with self._lock:
+            for user_id in user_ids:
+                timeline = self._timelines.setdefault(user_id, [])
+                bisect.insort(timeline, post_id)
+                if len(timeline) > self.max_length:
+                    del timeline[:len(timeline) - self.max_length]
+
+    def range(self, user_id, before_id=None, count=20):
+        """Return up to `count` post ids older than before_id, newest first."""
+        with self._lock:
+            timeline = self._timelines.get(user_id, [])
+            end = len(timeline) if before_id is None else bisect.bisect_left(timeline, before_id)
+            return timeline[max(0, end - count):end][::-1]
+
+    def add_celebrity(self, user_id):
+        with self._lock:
+            self._celebrities.add(user_id)
+
+    def celebrities(self):
+        with self._lock:
+            return set(self._celebrities)
+
+# ---------------------- Redis Timeline Store ---------------------- #
+class RedisTimelineStore:
+    """Bounded per-user timelines kept in Redis sorted sets scored by post id, shared by all workers."""
+
+    def __init__(self, client, max_length, prefix='timeline:'):
+        self.client = client
+        self.max_length = max_length
+        self.prefix = prefix
+
+    def push(self, user_ids, post_id):
+        """Insert a post id into each user's timeline in one pipelined round trip."""
+        pipe = self.client.pipeline(transaction=False)
+        for user_id in user_ids:
+            key = f'{self.prefix}{user_id}'
+            pipe.zadd(key, {post_id: post_id})
+            pipe.zremrangebyrank(key, 0, -self.max_length - 1)  # Keep only the newest max_length ids
+        pipe.execute()
+
+    def range(self, user_id, before_id=None, count=20):
+        """Return up to `count` post ids older than before_id, newest first."""
+        max_score = '+inf' if before_id is None else f'({before_id}'
+        ids = self.client.zrevrangebyscore(f'{self.prefix}{user_id}', max_score, '-inf', start=0, num=count)
+        return [int(post_id) for post_id in ids]
+
+    def add_celebrity(self, user_id):
+        self.client.sadd(f'{self.prefix}celebrities', user_id)
+
+    def celebrities(self):
+        return {int(user_id) for user_id in self.client.smembers(f'{self.prefix}celebrities')}
+
+# ---------------------- Timeline Store Selection ---------------------- #
+_store = None
+_store_selected = False
+
+def get_timeline_store():
+    """
+    Return the configured timeline store, or None when there is none to share between
+    workers: without Redis, timelines pushed by one worker would be missing from the others,
+    so the feed falls back to the pull path unless TIMELINE_MEMORY_STORE allows in-process
+    timelines (single-process servers only).
+    """
+    global _store, _store_selected
+    if not _store_selected:
+        config = current_app.config
+        max_length = config.get('TIMELINE_MAX_LENGTH', 800)
+        redis_url = config.get('TIMELINE_REDIS_URL')
+        if redis_url:
+            try:
+                import redis
+                _store = RedisTimelineStore(redis.Redis.from_url(redis_url), max_length)
+            except ImportError:
+                current_app.logger.warning("redis is not installed; timelines need TIMELINE_REDIS_URL and redis.")
+        if _store is None and config.get('TIMELINE_MEMORY_STORE'):
+            current_app.logger.warning("Using in-process timelines; posts fanned out by one worker are "
+                                       "not seen by the others, so run a single worker.")
+            _store = MemoryTimelineStore(max_length)
+        elif _store is None:
+            current_app.logger.warning("No shared timeline store; serving the feed with the pull path.")
+        _store_selected = True
+    return _store
+
+# ---------------------- Follower Helpers ---------------------- #
+def count_followers(user_id):
+    """Count an account's followers using the followed_id index."""
+    return db.session.query(func.count()).select_from(followers).filter(followers.c.followed_id == user_id).scalar()
+
+def iter_follower_batches(user_id, batch_size):
+    """Yield the follower ids of an account in batches, paging by follower id."""
+    last_id = 0
+    while True:
+        batch = [row[0] for row in db.session.query(followers.c.follower_id)
+                 .filter(followers.c.followed_id == user_id, followers.c.follower_id > last_id)
+                 .order_by(followers.c.follower_id).limit(batch_size)]
+        if not batch:
+            return
+        yield batch
+        last_id = batch[-1]
+
+# ---------------------- Fan-out on Write ---------------------- #
+def fan_out_post(post):
+    """
+    Push a freshly committed post into its author's and followers' timelines.
+
+    Accounts above CELEBRITY_FOLLOWER_THRESHOLD are not fanned out; they are recorded as
+    celebrities and their posts are merged into timelines at read time instead.
+    Returns True when the post was pushed.
+    """
+    store = get_timeline_store()
+    if store is None:
+        return False
+    store.push([post.user_id], post.id)
+
+    if count_followers(post.user_id) > current_app.config.get('CELEBRITY_FOLLOWER_THRESHOLD', 10000):
+        store.add_celebrity(post.user_id)
+        return False
+
+    batch_size = current_app.config.get('TIMELINE_FANOUT_BATCH_SIZE', 1000)
+    for batch in iter_follower_batches(post.user_id, batch_size):
+        store.push(batch, post.id)
+    return True
+
+# ---------------------- Timeline Feed Page ---------------------- #
+def get_timeline_page(user_id, cursor=None, per_page=None):
+    """
+    Return one page of the home feed as (posts, next_cursor) from the materialized timeline.
+
+    Pushed ids are read with a single range read and merged with recent posts of followed
+    celebrities. Timelines are ordered by post id, so only the id half of the cursor is used.
+    When the bounded timeline cannot fill the page (new followers, trimmed history, cold
+    workers), or there is no timeline store, the page is served by the pull feed from the
+    same cursor.
+    """
+    if per_page is None:
+        per_page = current_app.config.get('POSTS_PER_PAGE', 20)
+
+    position = decode_cursor(cursor)
+    before_id = position[1] if position else None
+
+    store = get_timeline_store()
+    if store is None:
+        return get_feed_page(user_id, cursor, per_page)
+    post_ids = store.range(user_id, before_id, per_page + 1)
+    if len(post_ids) <= per_page:
+        return get_feed_page(user_id, cursor, per_page)
+
+    # Hybrid pull: merge in posts from followed accounts that are not fanned out
+    celebrities = store.celebrities()
+    if celebrities:
+        followed_celebrities = db.session.query(followers.c.followed_id).filter(
+            followers.c.follower_id == user_id, followers.c.followed_id.in_(celebrities))
+        pulled = db.session.query(Post.id).filter(Post.user_id.in_(followed_celebrities), Post.media_status == 'ready')
+        if before_id is not None:
+            pulled = pulled.filter(Post.id < before_id)
+        pulled_ids = [row[0] for row in pulled.order_by(Post.id.desc()).limit(per_page + 1)]
+        post_ids = sorted(set(post_ids) | set(pulled_ids), reverse=True)[:per_page + 1]
+
+    page_ids = post_ids[:per_page]
+    # Deleted posts (and any not ready) simply drop out of the page during hydration
+    posts = Post.query.options(*post_list_options()).filter(
+        Post.id.in_(page_ids), Post.media_status == 'ready').order_by(Post.id.desc()).all()
+
+    next_cursor = None
+    if len(post_ids) > per_page and posts:
+        next_cursor = encode_cursor(posts[-1].created_at, posts[-1].id)
+
+    return posts, next_cursor
@@ -0,0 +1,225 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import and_, func, or_, update
+from models import Story
+from models.media import TranscodeJob
+from models.reel import Reel
+from database import db  # Assuming database.py handles the DB session
+from utils.helpers import iter_query
+from utils.media_store import blob_dir, blob_key
+from utils.video import default_encoder, ladder_complete, transcode_video
+
+# Target -> (model, column holding the stored video)
+TRANSCODE_TARGETS = {
+    'reel': (Reel, 'video_file'),
+    'story': (Story, 'video'),
+}
+
+# ---------------------- Queueing ---------------------- #
+def hls_segment_seconds():
+    """HLS segment length, or None when HLS packaging is off."""
+    return current_app.config.get('HLS_SEGMENT_SECONDS', 4) if current_app.config.get('HLS_ENABLED', True) else None
+
+def video_complete(path):
+    """True once a stored video is transcoded (and packaged for HLS, when enabled)."""
+    key = blob_key(path)
+    return bool(key) and ladder_complete(os.path.join(current_app.config['MEDIA_ROOT'], blob_dir(key)), key,
+                                         hls=hls_segment_seconds() is not None)
+
+def queue_transcode(target, record):
+    """
+    Queue the rendition ladder for a record's stored video, in the caller's transaction. Video
+    that was transcoded before (the same upload, stored once) is marked ready right away.
+    Returns the new job, or None.
+    """
+    _, column = TRANSCODE_TARGETS[target]
+    path = getattr(record, column)
+    if not blob_key(path):
+        return None
+    if video_complete(path):
+        record.transcode_status = 'ready'
+        return None
+    job = TranscodeJob(target=target, record_id=record.id, source_path=path)
+    db.session.add(job)
+    record.transcode_status = 'queued'
+    return job
+
+def backfill_transcodes():
+    """
+    Queue every reel and story video that is not fully transcoded and packaged, e.g. videos
+    uploaded before HLS packaging was enabled. Returns the number of jobs queued.
+    """
+    pending = set(db.session.query(TranscodeJob.target, TranscodeJob.record_id)
+                  .filter(TranscodeJob.status.in_(('queued', 'running'))))
+    queued = 0
+    for target, (model, column) in TRANSCODE_TARGETS.items():
+        for record in iter_query(model.query.filter(getattr(model, column).isnot(None))):
+            if (target, record.id) not in pending and queue_transcode(target, record):
+                queued += 1
+        db.session.commit()
+    return queued
+
+def _set_record_status(job, status):
+    model, _ = TRANSCODE_TARGETS[job.target]
+    db.session.execute(update(model).where(model.id == job.record_id).values(transcode_status=status))
+
+# ---------------------- Claiming Jobs ---------------------- #
+def claim_jobs(limit, now=None):
+    """
+    Claim up to `limit` due jobs for this worker: queued jobs whose retry delay has passed, and
+    running jobs whose lease has not been renewed for TRANSCODE_LEASE_SECONDS (their worker
+    died). Each claim is a conditional UPDATE on the attempt count, so two workers never both
+    win. Returns the claimed jobs.
+    """
+    now = now or datetime.utcnow()
+    stale = now - timedelta(seconds=current_app.config.get('TRANSCODE_LEASE_SECONDS', 300))
+    candidates = TranscodeJob.query.filter(or_(
+        and_(TranscodeJob.status == 'queued', TranscodeJob.run_after <= now),
+        and_(TranscodeJob.status == 'running', TranscodeJob.heartbeat_at < stale)
+    )).order_by(TranscodeJob.id).limit(limit).all()
+
+    claimed = []
+    for job in candidates:
+        result = db.session.execute(
+            update(TranscodeJob).where(TranscodeJob.id == job.id, TranscodeJob.attempts == job.attempts)
+            .values(status='running', started_at=now, heartbeat_at=now, attempts=job.attempts + 1,
+                    wait_seconds=(now - job.run_after).total_seconds())
+        )
+        if result.rowcount == 1:
+            _set_record_status(job, 'running')
+            claimed.append(job.id)
+    db.session.commit()
+    return [db.session.get(TranscodeJob, job_id) for job_id in claimed]
+
+def renew_leases(job_ids, now=None):
+    """Renew the lease of this worker's running jobs, so no other worker claims them."""
+    if not job_ids:
+        return
+    db.session.execute(
+        update(TranscodeJob).where(TranscodeJob.id.in_(job_ids), TranscodeJob.status == 'running')
+        .values(heartbeat_at=now or datetime.utcnow())
+    )
+    db.session.commit()
+
+def _keep_leases(app, running, stop, interval):
+    """Lease renewal thread: runs beside the worker loop, which may be busy with an inline job."""
+    while not stop.wait(interval):
+        with app.app_context():
+            try:
+                renew_leases(list(running.values()))
+            except Exception:
+                db.session.rollback()
+                app.logger.exception("Renewing transcode job leases failed.")
+
+# ---------------------- Finishing Jobs ---------------------- #
+def finish_job(job_id, future):
+    """Record a job's outcome: done, queued again after a delay, or failed after TRANSCODE_MAX_ATTEMPTS."""
+    job = db.session.get(TranscodeJob, job_id)
+    now = datetime.utcnow()
+    try:
+        result = future.result()
+    except Exception as error:
+        job.error = f'{type(error).__name__}: {error}'[:2000]
+        if job.attempts >= current_app.config.get('TRANSCODE_MAX_ATTEMPTS', 3):
+            job.status, job.finished_at = 'failed', now
+            _set_record_status(job, 'failed')
+            current_app.logger.error("Transcode job %s failed for good: %s", job.id, job.error)
+        else:
+            # Exponential backoff: 1x, 2x, 4x... TRANSCODE_RETRY_SECONDS
+            delay = current_app.config.get('TRANSCODE_RETRY_SECONDS', 60) * 2 ** (job.attempts - 1)
+            job.status, job.run_after = 'queued', now + timedelta(seconds=delay)
+            _set_record_status(job, 'queued')
+            current_app.logger.warning("Transcode job %s failed (attempt %d), retrying in %ds: %s", job.id, job.attempts, delay, job.error)
+    else:
+        job.status, job.finished_at, job.error = 'done', now, None
+        job.heights = ','.join(str(height) for height in result['heights'])
+        job.encode_seconds = result['seconds']
+        _set_record_status(job, 'ready')
+        current_app.logger.info("Transcode job %s done: %sp in %.1fs after %.1fs queued.",
+                                job.id, job.heights, job.encode_seconds, job.wait_seconds or 0)
+    db.session.commit()
+
+# ---------------------- Worker ---------------------- #
+def run_worker(workers=None, once=False, poll_seconds=None):
+    """
+    Run transcode jobs until interrupted (or, with once=True, until none are due). Each job runs
+    an encoder process in a pool of `workers` processes (TRANSCODE_WORKERS); 0 runs jobs inline.
+    A thread renews the leases of the running jobs meanwhile. If an encoder process dies, the
+    pool breaks: its jobs fail (and are retried) through finish_job() and a new pool is started.
+    Returns the number of jobs finished.
+    """
+    config = current_app.config
+    workers = config.get('TRANSCODE_WORKERS', 2) if workers is None else workers
+    poll_seconds = config.get('TRANSCODE_POLL_SECONDS', 2) if poll_seconds is None else poll_seconds
+    encoder = config.get('TRANSCODE_ENCODER', 'auto')
+    encoder = default_encoder() if encoder == 'auto' else encoder
+    ladder = tuple(config.get('TRANSCODE_LADDER', ((720, 2800), (480, 1400), (360, 800))))
+    timeout = config.get('TRANSCODE_JOB_TIMEOUT', 1800)
+    segment_seconds = hls_segment_seconds()
+    media_root = config['MEDIA_ROOT']
+
+    def start_pool():
+        # Spawned, not forked, as in the media pipeline
+        return ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn')) if workers else None
+
+    executor = start_pool()
+    running = {}  # Future -> job id
+    finished = 0
+    stop = threading.Event()
+    lease_seconds = config.get('TRANSCODE_LEASE_SECONDS', 300)
+    threading.Thread(target=_keep_leases, args=(current_app._get_current_object(), running, stop, lease_seconds / 3),
+                     name='transcode-leases', daemon=True).start()
+    try:
+        while True:
+            for job in claim_jobs(max(workers, 1) - len(running)):
+                key = blob_key(job.source_path)
+                args = (os.path.join(media_root, job.source_path), os.path.join(media_root, blob_dir(key)), key, ladder, encoder, timeout, segment_seconds)
+                future = Future()
+                if executor:
+                    try:
+                        future = executor.submit(transcode_video, *args)
+                    except BrokenProcessPool as error:
+                        future.set_exception(error)  # Broke since the last wait; finished below
+                    running[future] = job.id
+                else:
+                    running[future] = job.id  # Registered first, so its lease is renewed while it runs
+                    try:
+                        future.set_result(transcode_video(*args))
+                    except Exception as error:
+                        future.set_exception(error)
+
+            if not running:
+                if once:
+                    return finished
+                time.sleep(poll_seconds)
+                continue
+            done, _ = wait(running, timeout=poll_seconds, return_when=FIRST_COMPLETED)
+            if any(isinstance(future.exception(), BrokenProcessPool) for future in done):
+                # Every job in a broken pool fails with it; collect them all before replacing it
+                current_app.logger.error("An encoder process died; starting a new transcode pool.")
+                done = wait(running).done
+                executor.shutdown(wait=False, cancel_futures=True)
+                executor = start_pool()
+            for future in done:
+                finish_job(running.pop(future), future)
+                finished += 1
+    finally:
+        stop.set()
+        if executor:
+            executor.shutdown(cancel_futures=True)
+
+# ---------------------- Metrics ---------------------- #
+def transcode_metrics():
+    """Per status: job count and average queue wait, encode time and attempts."""
+    rows = db.session.query(
+        TranscodeJob.status, func.count(TranscodeJob.id), func.avg(TranscodeJob.wait_seconds),
+        func.avg(TranscodeJob.encode_seconds), func.avg(TranscodeJob.attempts)
+    ).group_by(TranscodeJob.status)
+    return {status: {'jobs': count, 'avg_wait_seconds': wait_seconds, 'avg_encode_seconds': encode_seconds, 'avg_attempts': attempts}
+            for status, count, wait_seconds, encode_seconds, attempts in rows}
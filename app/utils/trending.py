@@ -0,0 +1,159 @@
+import calendar
+import heapq
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import update
+from models import Hashtag, HashtagTrendBucket, Post, PostHashtag
+from database import db  # Assuming database.py handles the DB session
+from utils.cache import get_or_set
+from utils.helpers import conflict_insert
+
+# Trending windows in seconds, by the name used in URLs and config
+TRENDING_WINDOWS = {'1h': 3600, '24h': 86400, '7d': 7 * 86400}
+
+# A use loses half its weight after this fraction of the window has passed
+HALF_LIFE_FRACTION = 0.25
+
+# How strongly growth (second half of the window versus the first) boosts a hashtag
+VELOCITY_WEIGHT = 1.0
+
+# ---------------------- Buckets ---------------------- #
+def bucket_seconds():
+    return current_app.config.get('TRENDING_BUCKET_SECONDS', 300)
+
+def bucket_start(timestamp, width=None):
+    """Start of the bucket containing a unix timestamp."""
+    width = width or bucket_seconds()
+    return int(timestamp) // width * width
+
+# ---------------------- Recording Uses ---------------------- #
+def record_hashtag_uses(hashtag_ids, timestamp=None):
+    """
+    Add one use per hashtag id to the current bucket, in the caller's transaction.
+
+    Uses an atomic INSERT ... ON CONFLICT DO UPDATE on SQLite and PostgreSQL, so concurrent
+    posts never lose increments; other databases fall back to UPDATE-then-INSERT.
+    """
+    counts = Counter(hashtag_ids)
+    if not counts:
+        return
+    start = bucket_start(time.time() if timestamp is None else timestamp)
+    rows = [{'hashtag_id': hashtag_id, 'bucket_start': start, 'count': count} for hashtag_id, count in counts.items()]
+
+    statement = conflict_insert(HashtagTrendBucket, db.session)
+    if statement is not None:
+        statement = statement.values(rows)
+        statement = statement.on_conflict_do_update(
+            index_elements=['hashtag_id', 'bucket_start'],
+            set_={'count': HashtagTrendBucket.count + statement.excluded['count']}
+        )
+        db.session.execute(statement)
+        return
+
+    for row in rows:
+        updated = db.session.execute(
+            update(HashtagTrendBucket)
+            .where(HashtagTrendBucket.hashtag_id == row['hashtag_id'], HashtagTrendBucket.bucket_start == start)
+            .values(count=HashtagTrendBucket.count + row['count'])
+        )
+        if updated.rowcount == 0:
+            db.session.add(HashtagTrendBucket(**row))
+
+# ---------------------- Scoring ---------------------- #
+def score_buckets(buckets, window, now):
+    """
+    Score hashtags from (hashtag_id, bucket_start, count) rows inside a window.
+
+    Each use decays exponentially with age, so recent uses dominate, and the total is boosted
+    by velocity: how much more the hashtag was used in the second half of the window than in
+    the first. Returns {hashtag_id: score}.
+    """
+    half_life = window * HALF_LIFE_FRACTION
+    midpoint = now - window / 2
+    decayed = defaultdict(float)
+    recent = Counter()
+    earlier = Counter()
+
+    for hashtag_id, start, count in buckets:
+        age = max(0, now - start)
+        decayed[hashtag_id] += count * 0.5 ** (age / half_life)
+        if start >= midpoint:
+            recent[hashtag_id] += count
+        else:
+            earlier[hashtag_id] += count
+
+    scores = {}
+    for hashtag_id, weight in decayed.items():
+        velocity = (recent[hashtag_id] - earlier[hashtag_id]) / max(earlier[hashtag_id], 1)
+        scores[hashtag_id] = weight * (1 + VELOCITY_WEIGHT * max(velocity, 0))
+    return scores
+
+def compute_trending(window_name, limit, now=None):
+    """Rank hashtags over a window from the bucket table. Returns [(hashtag_id, score)], best first."""
+    window = TRENDING_WINDOWS[window_name]
+    now = time.time() if now is None else now
+    buckets = db.session.query(HashtagTrendBucket.hashtag_id, HashtagTrendBucket.bucket_start, HashtagTrendBucket.count) \
+                        .filter(HashtagTrendBucket.bucket_start >= bucket_start(now - window))
+    scores = score_buckets(buckets, window, now)
+    return heapq.nlargest(limit, ((hashtag_id, round(score, 4)) for hashtag_id, score in scores.items()), key=lambda item: item[1])
+
+# ---------------------- Reading Trending Hashtags ---------------------- #
+def resolve_window(window_name):
+    """Return a known window name, falling back to TRENDING_DEFAULT_WINDOW."""
+    if window_name in TRENDING_WINDOWS:
+        return window_name
+    default = current_app.config.get('TRENDING_DEFAULT_WINDOW', '24h')
+    return default if default in TRENDING_WINDOWS else '24h'
+
+def get_trending_hashtags(window_name=None, limit=10):
+    """
+    Trending Hashtag objects for a window, best first, each with a `trend_score` attribute.
+
+    The ranking is computed from the bucket table at most once per TRENDING_REFRESH_SECONDS
+    and shared through the cache; requests only load the listed hashtags by id.
+    """
+    window_name = resolve_window(window_name)
+    ranked = get_or_set('trending_hashtags', [window_name, limit], lambda: compute_trending(window_name, limit),
+                        timeout=current_app.config.get('TRENDING_REFRESH_SECONDS', 60))
+    if not ranked:
+        return []
+
+    found = {hashtag.id: hashtag for hashtag in Hashtag.query.filter(Hashtag.id.in_([hashtag_id for hashtag_id, _ in ranked]))}
+    hashtags = []
+    for hashtag_id, score in ranked:
+        if hashtag_id in found:
+            found[hashtag_id].trend_score = score
+            hashtags.append(found[hashtag_id])
+    return hashtags
+
+# ---------------------- Maintenance ---------------------- #
+def prune_buckets(now=None):
+    """Delete buckets older than the longest window. Returns the number of rows deleted."""
+    now = time.time() if now is None else now
+    cutoff = bucket_start(now - max(TRENDING_WINDOWS.values()))
+    deleted = HashtagTrendBucket.query.filter(HashtagTrendBucket.bucket_start < cutoff).delete(synchronize_session=False)
+    db.session.commit()
+    return deleted
+
+def rebuild_buckets(now=None):
+    """Recreate the buckets of the longest window from posts and their hashtags (e.g. after deploying)."""
+    now = time.time() if now is None else now
+    since = datetime.utcfromtimestamp(now - max(TRENDING_WINDOWS.values()))  # created_at is stored in UTC
+    rows = db.session.query(PostHashtag.hashtag_id, Post.created_at) \
+                     .join(Post, Post.id == PostHashtag.post_id) \
+                     .filter(Post.created_at >= since) \
+                     .yield_per(1000)
+
+    counts = Counter()
+    for hashtag_id, created_at in rows:
+        counts[(hashtag_id, bucket_start(calendar.timegm(created_at.utctimetuple())))] += 1
+
+    HashtagTrendBucket.query.delete(synchronize_session=False)
+    if counts:
+        db.session.execute(HashtagTrendBucket.__table__.insert(), [
+            {'hashtag_id': hashtag_id, 'bucket_start': start, 'count': count} for (hashtag_id, start), count in counts.items()
+        ])
+    db.session.commit()
+    return len(counts)
@@ -0,0 +1,126 @@
+import os
+import uuid
+from flask import Request, current_app
+from models.media import UploadSession
+from database import db  # Assuming database.py handles the DB session
+from utils.media_store import HASH_CHUNK_SIZE, StagedFile, hash_file
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends to one upload are not serialized
+    fcntl = None
+
+class UploadOffsetMismatch(Exception):
+    """Raised when a chunk does not start where the upload currently ends."""
+
+    def __init__(self, offset):
+        super().__init__(f'Upload is at offset {offset}')
+        self.offset = offset
+
+class TooManyUploads(Exception):
+    """Raised when a user already has MEDIA_UPLOAD_MAX_OPEN resumable uploads open."""
+
+# ---------------------- Streaming Multipart ---------------------- #
+class UploadRequest(Request):
+    """
+    Request class that has the multipart parser write media files straight into
+    MEDIA_STAGING_DIR, hashing them as they arrive, instead of into a temporary file that is
+    copied again when saved. stage_upload() then claims the file where it is. Files nobody
+    claims are deleted when the request ends.
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        from utils.media_pipeline import media_kind
+        if filename and media_kind(filename):
+            staging_dir = current_app.config['MEDIA_STAGING_DIR']
+            os.makedirs(staging_dir, exist_ok=True)
+            extension = filename.rsplit('.', 1)[-1].lower()
+            return StagedFile(os.path.join(staging_dir, f'{uuid.uuid4().hex}.{extension}'))
+        return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+
+# ---------------------- Resumable Uploads ---------------------- #
+# The protocol, for files too large for one request:
+#   1. POST /uploads with the file name and size          -> upload id, offset 0
+#   2. PATCH /uploads/<id> with Upload-Offset and a chunk -> new offset (repeat)
+#   3. HEAD /uploads/<id> after a failure                 -> offset to resume from
+#   4. submit the form with upload_id instead of the file (e.g. /upload_reel)
+
+def part_path(upload_id):
+    return os.path.join(current_app.config['MEDIA_STAGING_DIR'], f'{upload_id}.part')
+
+def upload_offset(upload):
+    """Bytes received so far."""
+    try:
+        return os.path.getsize(part_path(upload.id))
+    except OSError:
+        return 0
+
+def start_upload(user_id, filename, size):
+    """
+    Open a resumable upload. Returns the UploadSession, or None if the file is not accepted.
+    Raises TooManyUploads when the user already has MEDIA_UPLOAD_MAX_OPEN uploads open, so one
+    account cannot reserve staging space without limit.
+    """
+    from utils.media_pipeline import media_kind
+    if not media_kind(filename or '') or not 0 < size <= current_app.config.get('MEDIA_UPLOAD_MAX_SIZE', 1024 ** 3):
+        return None
+    if UploadSession.query.filter_by(user_id=user_id).count() >= current_app.config.get('MEDIA_UPLOAD_MAX_OPEN', 5):
+        raise TooManyUploads()
+    upload = UploadSession(id=uuid.uuid4().hex, user_id=user_id, filename=filename, size=size)
+    os.makedirs(current_app.config['MEDIA_STAGING_DIR'], exist_ok=True)
+    open(part_path(upload.id), 'xb').close()
+    db.session.add(upload)
+    db.session.commit()
+    return upload
+
+def get_upload(upload_id, user_id):
+    """A user's upload in progress, or None."""
+    upload = db.session.get(UploadSession, upload_id)
+    return upload if upload and upload.user_id == user_id else None
+
+def append_chunk(upload, offset, stream, length):
+    """
+    Append `length` bytes from `stream` at `offset`, streaming them to disk in fixed-size
+    chunks. Returns the new offset. Raises UploadOffsetMismatch if the upload is not at
+    `offset` (a retried or out-of-order chunk). Bytes that arrive before the client
+    disconnects are kept, so the client resumes from the offset HEAD reports.
+    """
+    if offset + length > upload.size:
+        raise ValueError('Chunk runs past the announced size')
+    with open(part_path(upload.id), 'r+b') as part:
+        if fcntl:
+            fcntl.flock(part, fcntl.LOCK_EX)  # One append at a time per upload, across workers
+        current = part.seek(0, os.SEEK_END)
+        if current != offset:
+            raise UploadOffsetMismatch(current)
+        while length > 0:
+            chunk = stream.read(min(HASH_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            part.write(chunk)
+            length -= len(chunk)
+        return part.tell()
+
+def upload_complete(upload):
+    return upload_offset(upload) == upload.size
+
+def finish_upload(upload):
+    """
+    Turn a complete upload into a staged file, as stage_upload() does for a form upload.
+    The file is renamed, not copied. Returns (staged path, sha256 hex digest, size).
+    """
+    extension = upload.filename.rsplit('.', 1)[-1].lower()
+    staged_path = os.path.join(current_app.config['MEDIA_STAGING_DIR'], f'{upload.id}.{extension}')
+    os.replace(part_path(upload.id), staged_path)
+    db.session.delete(upload)  # Committed with the record the file is attached to
+    digest, size = hash_file(staged_path)
+    return staged_path, digest, size
+
+def expire_uploads(cutoff):
+    """Forget uploads started before `cutoff` whose part file is gone (swept as stale by the garbage collector)."""
+    expired = [upload for upload in UploadSession.query.filter(UploadSession.created_at < cutoff)
+               if not os.path.exists(part_path(upload.id))]
+    for upload in expired:
+        db.session.delete(upload)
+    db.session.commit()
+    return len(expired)
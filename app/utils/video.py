@@ -0,0 +1,222 @@
+import json
+import os
+import shutil
+import subprocess
+import time
+
+# Like utils/images.py, the functions in this module run in worker processes: they only read
+# and write files and never touch Flask or the database.
+
+# Poster frame position in seconds (earlier for clips shorter than twice this)
+POSTER_SECOND = 1.0
+
+# Every rendition gets a keyframe at this interval, so HLS segments (a multiple of it long)
+# start at the same moments in every rendition and players can switch between them
+KEYFRAME_SECONDS = 2
+
+# ---------------------- Output Names ---------------------- #
+def rendition_name(stem, height):
+    return f'{stem}_{height}p.mp4'
+
+def poster_name(stem):
+    return f'{stem}_poster.jpg'
+
+def playlist_name(stem, height=None):
+    """The HLS master playlist of a video, or the media playlist of one rendition."""
+    return f'{stem}_{height}p.m3u8' if height else f'{stem}.m3u8'
+
+def segment_pattern(stem, height):
+    return f'{stem}_{height}p_%05d.ts'
+
+def ladder_complete(output_dir, stem, hls=True):
+    """
+    True once a video's renditions, and its HLS packaging when `hls`, are all written: the poster
+    is written after the renditions and the master playlist after the segments.
+    """
+    return os.path.exists(os.path.join(output_dir, poster_name(stem))) and \
+        (not hls or os.path.exists(os.path.join(output_dir, playlist_name(stem))))
+
+# ---------------------- Probing ---------------------- #
+def probe_video(path):
+    """(width, height, duration in seconds) of a video's first video stream (as displayed), via ffprobe."""
+    output = subprocess.run(
+        ['ffprobe', '-v', 'error', '-select_streams', 'v:0', '-show_entries', 'stream=width,height:format=duration',
+         '-of', 'json', path],
+        capture_output=True, check=True, timeout=60
+    ).stdout
+    info = json.loads(output)
+    stream = info['streams'][0]
+    return int(stream['width']), int(stream['height']), float(info.get('format', {}).get('duration') or 0)
+
+def ladder_for(ladder, source_size):
+    """
+    The rungs of a (height, kbps) ladder worth producing: no upscaling, but always at least the
+    lowest rung. A rung's "height" is the short side, so portrait reels are not shrunk to a
+    landscape rung's height.
+    """
+    rungs = [(height, kbps) for height, kbps in ladder if height <= min(source_size)]
+    return rungs or [min(ladder)]
+
+def scale_filter(source_size, short_side):
+    """ffmpeg scale filter bringing the short side of a video to `short_side`, keeping the aspect ratio."""
+    width, height = source_size
+    return f'scale={short_side}:-2' if height > width else f'scale=-2:{short_side}'
+
+# ---------------------- Encoders ---------------------- #
+def ffmpeg_encode(source_path, output_dir, stem, ladder, timeout):
+    """
+    Encode every rung of the ladder as H.264/AAC MP4 plus a JPEG poster in one ffmpeg run, so
+    the source is decoded once. Bitrates are capped (maxrate/bufsize) to keep playback smooth
+    on constrained connections, and the moov atom is moved to the front so playback starts
+    before the download ends. Returns the heights produced.
+    """
+    width, height, duration = probe_video(source_path)
+    source_size = (width, height)
+    rungs = ladder_for(ladder, source_size)
+    command = ['ffmpeg', '-v', 'error', '-y', '-i', source_path]
+    temporary_paths = []
+    for height, kbps in rungs:
+        path = os.path.join(output_dir, rendition_name(stem, height))
+        temporary_paths.append((f'{path}.tmp', path))
+        command += ['-map', '0:v:0', '-map', '0:a:0?', '-vf', scale_filter(source_size, height),
+                    '-c:v', 'libx264', '-preset', 'veryfast', '-profile:v', 'main', '-pix_fmt', 'yuv420p',
+                    '-force_key_frames', f'expr:gte(t,n_forced*{KEYFRAME_SECONDS})', '-sc_threshold', '0',
+                    '-b:v', f'{kbps}k', '-maxrate', f'{int(kbps * 1.07)}k', '-bufsize', f'{int(kbps * 1.5)}k',
+                    '-c:a', 'aac', '-b:a', '128k', '-ac', '2', '-movflags', '+faststart', '-f', 'mp4', f'{path}.tmp']
+    poster = os.path.join(output_dir, poster_name(stem))
+    poster_second = POSTER_SECOND if duration >= 2 * POSTER_SECOND else 0
+    command += ['-map', '0:v:0', '-ss', str(poster_second), '-frames:v', '1', '-vf', scale_filter(source_size, rungs[0][0]),
+                '-q:v', '3', '-f', 'image2', f'{poster}.tmp']
+    temporary_paths.append((f'{poster}.tmp', poster))
+
+    try:
+        subprocess.run(command, capture_output=True, check=True, timeout=timeout)
+        for temporary_path, path in temporary_paths:
+            os.replace(temporary_path, path)  # Poster last: it marks the ladder complete
+    finally:
+        for temporary_path, _ in temporary_paths:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+    return [height for height, _ in rungs]
+
+def stub_encode(source_path, output_dir, stem, ladder, timeout):
+    """
+    Stand-in encoder for machines without ffmpeg (development, tests): copies the source as
+    every rendition and draws a plain poster, producing the same files as ffmpeg_encode().
+    """
+    from PIL import Image
+    heights = [height for height, _ in ladder]
+    for height in heights:
+        shutil.copyfile(source_path, os.path.join(output_dir, rendition_name(stem, height)))
+    Image.new('RGB', (max(heights) * 9 // 16, max(heights)), (32, 32, 32)).save(os.path.join(output_dir, poster_name(stem)), 'JPEG')
+    return heights
+
+# Encoder name -> function(source path, output dir, stem, ladder, timeout) returning the heights produced
+ENCODERS = {
+    'ffmpeg': ffmpeg_encode,
+    'stub': stub_encode,
+}
+
+# ---------------------- HLS Packaging ---------------------- #
+def ffmpeg_segment(output_dir, stem, height, segment_seconds, timeout):
+    """
+    Cut one rendition into MPEG-TS segments with its media playlist. The streams are copied,
+    not re-encoded; the keyframes forced at encoding line the segments up across renditions.
+    Returns the rendition's (width, height) for the master playlist.
+    """
+    source = os.path.join(output_dir, rendition_name(stem, height))
+    subprocess.run(
+        ['ffmpeg', '-v', 'error', '-y', '-i', source, '-c', 'copy', '-f', 'hls',
+         '-hls_time', str(segment_seconds), '-hls_playlist_type', 'vod', '-hls_flags', 'independent_segments',
+         '-hls_segment_filename', os.path.join(output_dir, segment_pattern(stem, height)),
+         os.path.join(output_dir, playlist_name(stem, height))],
+        capture_output=True, check=True, timeout=timeout
+    )
+    width, rendition_height, _ = probe_video(source)
+    return width, rendition_height
+
+def stub_segment(output_dir, stem, height, segment_seconds, timeout):
+    """Stand-in for ffmpeg_segment(): splits the rendition's bytes into fixed-size "segments"."""
+    source = os.path.join(output_dir, rendition_name(stem, height))
+    lines = ['#EXTM3U', '#EXT-X-VERSION:3', f'#EXT-X-TARGETDURATION:{segment_seconds}', '#EXT-X-PLAYLIST-TYPE:VOD']
+    with open(source, 'rb') as file:
+        for index, chunk in enumerate(iter(lambda: file.read(64 * 1024), b'')):
+            name = segment_pattern(stem, height) % index
+            with open(os.path.join(output_dir, name), 'wb') as segment:
+                segment.write(chunk)
+            lines += [f'#EXTINF:{segment_seconds:.3f},', name]
+    lines.append('#EXT-X-ENDLIST')
+    with open(os.path.join(output_dir, playlist_name(stem, height)), 'w') as playlist:
+        playlist.write('\n'.join(lines) + '\n')
+    return None
+
+# Encoder name -> function(output dir, stem, height, segment seconds, timeout) returning (width, height) or None
+SEGMENTERS = {
+    'ffmpeg': ffmpeg_segment,
+    'stub': stub_segment,
+}
+
+def playlist_bandwidth(output_dir, playlist):
+    """(peak, average) bits per second of a media playlist, measured from its segment files."""
+    peak = total_bits = total_seconds = 0
+    duration = None
+    with open(os.path.join(output_dir, playlist)) as file:
+        for line in file:
+            line = line.strip()
+            if line.startswith('#EXTINF:'):
+                duration = float(line[len('#EXTINF:'):].split(',')[0])
+            elif line and not line.startswith('#') and duration:
+                bits = os.path.getsize(os.path.join(output_dir, line)) * 8
+                peak = max(peak, bits / duration)
+                total_bits += bits
+                total_seconds += duration
+    return int(peak), int(total_bits / total_seconds) if total_seconds else 0
+
+def h264_codecs(height):
+    """CODECS attribute for a Main-profile H.264/AAC rendition (level 3.0, 3.1 or 4.0 by size)."""
+    level = '28' if height >= 1080 else '1f' if height >= 720 else '1e'
+    return f'avc1.4d40{level},mp4a.40.2'
+
+def package_hls(output_dir, stem, heights, segment_seconds, encoder='ffmpeg', timeout=1800):
+    """
+    Package the renditions of a video for HLS: segments and a media playlist per rendition,
+    then the master playlist listing them by bandwidth, written last (atomically) since its
+    presence means the video is packaged. Playlists use relative URIs, so the files work from
+    the app's media endpoint and from any static directory or CDN alike.
+    """
+    entries = []
+    for height in heights:
+        size = SEGMENTERS[encoder](output_dir, stem, height, segment_seconds, timeout)
+        peak, average = playlist_bandwidth(output_dir, playlist_name(stem, height))
+        attributes = f'BANDWIDTH={peak},AVERAGE-BANDWIDTH={average},CODECS="{h264_codecs(height)}"'
+        if size:
+            attributes += f',RESOLUTION={size[0]}x{size[1]}'
+        entries.append((peak, attributes, playlist_name(stem, height)))
+
+    lines = ['#EXTM3U', '#EXT-X-VERSION:3', '#EXT-X-INDEPENDENT-SEGMENTS']
+    for _, attributes, playlist in sorted(entries, reverse=True):  # Highest first; players pick by bandwidth
+        lines += [f'#EXT-X-STREAM-INF:{attributes}', playlist]
+    master = os.path.join(output_dir, playlist_name(stem))
+    with open(f'{master}.tmp', 'w') as file:
+        file.write('\n'.join(lines) + '\n')
+    os.replace(f'{master}.tmp', master)
+
+def default_encoder():
+    """'ffmpeg' when ffmpeg and ffprobe are installed, else 'stub'."""
+    return 'ffmpeg' if shutil.which('ffmpeg') and shutil.which('ffprobe') else 'stub'
+
+# ---------------------- Transcoding ---------------------- #
+def transcode_video(source_path, output_dir, stem, ladder, encoder='ffmpeg', timeout=1800, segment_seconds=None):
+    """
+    Produce the rendition ladder and poster for a stored video, then package it for HLS in
+    `segment_seconds` segments (None skips packaging). Steps already done for the same content
+    are skipped. Returns {'heights', 'seconds'}.
+    """
+    started = time.monotonic()
+    if os.path.exists(os.path.join(output_dir, poster_name(stem))):
+        heights = [height for height, _ in ladder if os.path.exists(os.path.join(output_dir, rendition_name(stem, height)))]
+    else:
+        heights = ENCODERS[encoder](source_path, output_dir, stem, tuple(ladder), timeout)
+    if segment_seconds and not ladder_complete(output_dir, stem, hls=True):
+        package_hls(output_dir, stem, heights, segment_seconds, encoder, timeout)
+    return {'heights': heights, 'seconds': time.monotonic() - started}
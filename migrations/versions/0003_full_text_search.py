@@ -0,0 +1,53 @@
+"""Full-text search tables
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 19:41:08.215364
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+# (FTS5 table, source table, indexed column). External-content tables store only the index;
+# the text stays in the source table and triggers keep the two in sync.
+FTS_TABLES = (
+    ('post_fts', 'post', 'content'),
+    ('reel_fts', 'reel', 'caption'),
+    ('message_fts', 'message', 'content'),
+)
+
+
+def upgrade():
+    # FTS5 is SQLite-only; other databases use the LIKE search backend
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    for fts, source, column in FTS_TABLES:
+        # prefix='2 3' keeps extra indexes so short `word*` queries do not scan the term list
+        op.execute(f"CREATE VIRTUAL TABLE {fts} USING fts5({column}, content='{source}', content_rowid='id', "
+                   f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')")
+        op.execute(f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {source} BEGIN "
+                   f"INSERT INTO {fts}(rowid, {column}) VALUES (new.id, new.{column}); END")
+        op.execute(f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {source} BEGIN "
+                   f"INSERT INTO {fts}({fts}, rowid, {column}) VALUES ('delete', old.id, old.{column}); END")
+        op.execute(f"CREATE TRIGGER {fts}_au AFTER UPDATE OF {column} ON {source} BEGIN "
+                   f"INSERT INTO {fts}({fts}, rowid, {column}) VALUES ('delete', old.id, old.{column}); "
+                   f"INSERT INTO {fts}(rowid, {column}) VALUES (new.id, new.{column}); END")
+        op.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")  # Index existing rows
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    for fts, source, column in FTS_TABLES:
+        for suffix in ('ai', 'ad', 'au'):
+            op.execute(f"DROP TRIGGER IF EXISTS {fts}_{suffix}")
+        op.execute(f"DROP TABLE IF EXISTS {fts}")
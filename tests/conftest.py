@@ -0,0 +1,53 @@
+import os
+import sys
+import tempfile
+import pytest
+
+# The app imports its packages as top-level modules (models, utils, config, database)
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in ('app/database', 'app/config', 'app', ''):
+    sys.path.insert(0, os.path.join(ROOT, path))
+
+# Keep config.py's module-level defaults away from the real database and media folder
+_scratch = tempfile.mkdtemp(prefix='instaclone-tests-')
+os.environ.setdefault('DATABASE_PATH', os.path.join(_scratch, 'app.db'))
+os.environ.setdefault('MEDIA_ROOT', os.path.join(_scratch, 'media'))
+
+@pytest.fixture
+def app(tmp_path):
+    from app import create_app
+    from config import TestingConfig
+    from database import db
+
+    class Config(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'test.db'}"
+        MEDIA_ROOT = str(tmp_path / 'media')
+        MEDIA_STAGING_DIR = str(tmp_path / 'staging')
+        CACHE_TYPE = 'null'
+        TIMELINE_ENABLED = False
+        LIKE_BUFFER_FLUSH_INTERVAL = 0  # Write likes through, no flusher thread
+        WTF_CSRF_ENABLED = False
+
+    app = create_app(Config)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def login(app, monkeypatch):
+    """Log a user into a test client. User has no UserMixin, so the Flask-Login attributes are supplied here."""
+    from models import User
+    monkeypatch.setattr(User, 'is_authenticated', True, raising=False)
+    monkeypatch.setattr(User, 'is_active', True, raising=False)
+    monkeypatch.setattr(User, 'is_anonymous', False, raising=False)
+    monkeypatch.setattr(User, 'get_id', lambda user: str(user.id), raising=False)
+
+    def log_in(client, user_id):
+        with client.session_transaction() as session:
+            session['_user_id'] = str(user_id)
+            session['_fresh'] = True
+            session['user_id'] = user_id
+        return client
+    return log_in
@@ -0,0 +1,31 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cumulative seconds `import app` may take, mostly Flask and SQLAlchemy themselves. Generous
+# for slow CI machines; loading the models and controllers as well would add about as much again.
+IMPORT_BUDGET_SECONDS = 2.0
+
+REPORT_LOADED = (
+    "import sys; import app; "
+    "print(' '.join(sorted(name for name in sys.modules if name.split('.')[0] in ('models', 'controllers'))))"
+)
+
+def run_python(*args):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(os.path.join(ROOT, path) for path in ('', 'app', 'app/config', 'app/database')))
+    return subprocess.run([sys.executable, *args], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+
+def test_importing_app_loads_no_models_or_controllers():
+    assert run_python('-c', REPORT_LOADED).stdout.split() == []
+
+def test_importing_app_stays_within_budget():
+    # -X importtime reports "self | cumulative | module" per import, in microseconds
+    report = run_python('-X', 'importtime', '-c', 'import app').stderr
+    cumulative = next(int(line.split('|')[1]) for line in report.splitlines() if line.split('|')[-1].strip() == 'app')
+    assert cumulative / 1e6 < IMPORT_BUDGET_SECONDS
+
+def test_create_app_registers_every_blueprint(app):
+    from app import BLUEPRINTS
+    assert {attribute[:-len('_bp')] for _, attribute in BLUEPRINTS} <= set(app.blueprints)
@@ -0,0 +1,42 @@
+import threading
+import time
+import pytest
+
+@pytest.fixture
+def indexes(app, monkeypatch):
+    """utils.autocomplete with no index built yet in this worker."""
+    import utils.autocomplete as autocomplete
+    monkeypatch.setattr(autocomplete, '_indexes', {})
+    return autocomplete
+
+# ---------------------- Prefix Index ---------------------- #
+def test_labels_differing_in_case_are_separate_entries():
+    from utils.autocomplete import PrefixIndex
+    index = PrefixIndex([('Bob', 5, 1), ('bob', 3, 2), ('bobby', 1, 3)])
+    assert index.search('bo') == [('Bob', 5, 1), ('bob', 3, 2), ('bobby', 1, 3)]
+
+    index.bump('bob', 10, 2)
+    index.add('BOB', 0, 4)
+    assert [entry_id for _, _, entry_id in index.search('bob')] == [2, 1, 3, 4]
+
+# ---------------------- Rebuilds ---------------------- #
+def test_stale_index_is_rebuilt_in_the_background(app, indexes, monkeypatch):
+    app.config['AUTOCOMPLETE_REBUILD_SECONDS'] = 0
+    old = indexes.get_index('users')
+    release, built = threading.Event(), threading.Event()
+
+    def slow_entries():
+        release.wait(5)
+        built.set()
+        return [('newcomer', 0, 1)]
+    monkeypatch.setitem(indexes._sources, 'users', slow_entries)
+
+    assert indexes.get_index('users') is old  # Served right away while the rebuild waits
+    assert indexes.get_index('users') is old  # Only one rebuild at a time
+    release.set()
+    assert built.wait(5)
+    for _ in range(100):
+        if indexes._indexes['users'] is not old:
+            break
+        time.sleep(0.01)
+    assert indexes._indexes['users'].search('new') == [('newcomer', 0, 1)]
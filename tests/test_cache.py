@@ -0,0 +1,57 @@
+import pytest
+
+@pytest.fixture
+def cache(app):
+    """The app's cache on an in-memory backend (the test config disables caching)."""
+    from extensions import cache
+    cache.init_app(app, config={'CACHE_TYPE': 'SimpleCache'})
+    return cache
+
+def make_post(tag=None):
+    from database import db
+    from models import Post, User
+    from models.hashtag import add_hashtags_to_post
+    author = User.query.first()
+    if author is None:
+        author = User(username='author', email='author@example.com', password='x')
+        db.session.add(author)
+        db.session.commit()
+    post = Post(content='post', user_id=author.id)
+    db.session.add(post)
+    db.session.commit()
+    if tag:
+        add_hashtags_to_post(post.id, [tag])
+    return post.id
+
+# ---------------------- Like Invalidation ---------------------- #
+def test_flushed_likes_invalidate_the_post_page(app, cache):
+    from models import Like, Post
+    from utils.cache import build_key, on_post_engagement
+    from utils.like_buffer import LikeBuffer
+    post_id = make_post()
+    buffer = LikeBuffer(Like, Post, 'post_id', flush_interval=3600, on_written=on_post_engagement)
+    buffer._thread = object()  # No background flusher: the test flushes by hand
+
+    buffer.set_liked(1, post_id, True)
+    key = build_key('post', ['/post'], scope=post_id)  # A page cached before the flush...
+    buffer.flush()
+    assert build_key('post', ['/post'], scope=post_id) != key  # ...is not served after it
+
+# ---------------------- Hashtag Pages ---------------------- #
+def test_hashtag_pages_are_bounded_and_cover_every_post(app, cache):
+    from controllers.explore_controller import hashtag_page
+    app.config['POSTS_PER_PAGE'] = 3
+    post_ids = [make_post('#Sunset') for _ in range(7)]
+
+    with app.test_request_context():
+        seen, cursor = [], None
+        while True:
+            posts, cursor = hashtag_page('sunset', cursor)
+            assert len(posts) <= 3
+            seen += [post.id for post in posts]
+            if not cursor:
+                break
+        assert seen == post_ids[::-1]
+
+        make_post('#sunset')  # Tagging invalidates the cached first page
+        assert hashtag_page('#SUNSET')[0][0].id == max(post_ids) + 1
@@ -0,0 +1,114 @@
+import pytest
+
+@pytest.fixture
+def post_id(app):
+    from database import db
+    from models import Post, User
+    author = User(username='author', email='author@example.com', password='x')
+    db.session.add(author)
+    db.session.flush()
+    post = Post(content='post', user_id=author.id)
+    db.session.add(post)
+    db.session.commit()
+    return post.id
+
+@pytest.fixture
+def viewer_id(app):
+    from database import db
+    from models import User
+    viewer = User(username='viewer', email='viewer@example.com', password='x')
+    db.session.add(viewer)
+    db.session.commit()
+    return viewer.id
+
+@pytest.fixture
+def client(app, login, viewer_id):
+    return login(app.test_client(), viewer_id)
+
+def comment_count(post_id):
+    from database import db
+    from models import Comment, Post
+    db.session.expire_all()
+    return db.session.get(Post, post_id).comment_count, Comment.query.filter_by(post_id=post_id).count()
+
+# ---------------------- Comment Counter ---------------------- #
+@pytest.mark.parametrize('url, field', [('/comment_post/{}', 'comment'), ('/comment/{}', 'comment_text')])
+def test_comment_routes_maintain_comment_count(app, client, post_id, url, field):
+    with app.app_context():
+        response = client.post(url.format(post_id), data={field: 'nice'})
+    assert response.status_code == 302
+    assert comment_count(post_id) == (1, 1)
+
+# ---------------------- Like Buffer ---------------------- #
+@pytest.fixture
+def buffer(app):
+    from models import Like, Post
+    from utils.like_buffer import LikeBuffer
+    buffer = LikeBuffer(Like, Post, 'post_id', flush_interval=3600)
+    buffer._thread = object()  # No background flusher: the tests flush by hand
+    return buffer
+
+def test_pending_like_overlay_is_never_written_back(app, buffer, post_id, viewer_id):
+    from database import db
+    from models import Post
+    buffer.set_liked(viewer_id, post_id, True)
+
+    post = db.session.get(Post, post_id)
+    post.liked_by_viewer = False
+    buffer.apply_pending([post], viewer_id)
+    assert (post.display_like_count, post.liked_by_viewer) == (1, True)
+    db.session.commit()  # A commit later in the same request must not persist the overlay
+
+    assert buffer.flush() == 1
+    db.session.expire_all()
+    assert db.session.get(Post, post_id).like_count == 1
+
+def test_intents_stay_visible_until_committed(app, buffer, post_id, viewer_id, monkeypatch):
+    buffer.set_liked(viewer_id, post_id, True)
+    seen_during_write = []
+    write = buffer._write
+
+    def failing_write(batch):
+        seen_during_write.append(buffer.pending_state(viewer_id, post_id))
+        raise RuntimeError('database down')
+    monkeypatch.setattr(buffer, '_write', failing_write)
+    assert buffer.flush() == 0
+    assert seen_during_write == [True]
+    assert buffer.pending_state(viewer_id, post_id) is True  # Kept for the next flush
+
+    monkeypatch.setattr(buffer, '_write', write)
+    assert buffer.flush() == 0  # Waits out the backoff
+    assert buffer.flush(force=True) == 1
+    assert buffer.pending_state(viewer_id, post_id) is None
+
+def test_inline_flush_leaves_the_request_session_alone(app, buffer, post_id, viewer_id):
+    from database import db
+    from models import Post
+    buffer.flush_interval = 0  # Write through, on the request thread
+    post = db.session.get(Post, post_id)
+    post.content = 'edited, not committed'
+
+    buffer.set_liked(viewer_id, post_id, True)
+    db.session.rollback()  # The request changes its mind; the like was still written
+    db.session.expire_all()
+    post = db.session.get(Post, post_id)
+    assert post.like_count == 1 and post.content != 'edited, not committed'
+
+def test_full_buffer_refuses_intents_while_flushes_fail(app, buffer, post_id, viewer_id, monkeypatch):
+    from utils.like_buffer import LikeBufferFull
+    buffer.max_pending = 2
+    attempts = []
+
+    def failing_write(batch):
+        attempts.append(len(batch))
+        raise RuntimeError('database down')
+    monkeypatch.setattr(buffer, '_write', failing_write)
+    buffer.set_liked(1, post_id, True)
+    buffer.set_liked(2, post_id, True)
+    with pytest.raises(LikeBufferFull):
+        buffer.set_liked(3, post_id, True)  # One inline attempt fails...
+    with pytest.raises(LikeBufferFull):
+        buffer.set_liked(4, post_id, True)  # ...and the next request does not retry it
+    buffer.set_liked(1, post_id, False)  # Intents already pending can still change
+    assert attempts == [2]
+    assert len(buffer._pending) == 2
@@ -0,0 +1,47 @@
+import sqlite3
+import threading
+import pytest
+
+@pytest.fixture
+def raw_db(app, tmp_path, monkeypatch):
+    """The raw SQL helpers on a scratch database file, with fresh per-process pools."""
+    import database
+    monkeypatch.setattr(database, 'DATABASE', str(tmp_path / 'raw.db'))
+    monkeypatch.setattr(database, '_pools_pid', None)
+    with app.app_context():
+        database.execute_query('CREATE TABLE note (id INTEGER PRIMARY KEY, body TEXT)', commit=True)
+    yield database
+    database.close_pools()
+
+def write_from_another_thread(app, database):
+    """Insert a row on another thread, which needs the process's single write connection."""
+    done = []
+
+    def run():
+        with app.app_context():
+            try:
+                database.execute_insert('INSERT INTO note (body) VALUES (?)', ('other',))
+                done.append(True)
+            except sqlite3.OperationalError:
+                pass  # Timed out waiting for the write connection
+    thread = threading.Thread(target=run)
+    thread.start()
+    thread.join(5)
+    return bool(done)
+
+# ---------------------- Write Connection ---------------------- #
+def test_write_connection_is_released_after_commit(app, raw_db, monkeypatch):
+    monkeypatch.setattr(raw_db.get_pools()['write'], 'timeout', 1)
+    with app.app_context():
+        raw_db.execute_insert('INSERT INTO note (body) VALUES (?)', ('mine',))
+        # The context is still open (slow work would go here), yet other writers get through
+        assert write_from_another_thread(app, raw_db)
+
+def test_write_connection_is_held_for_a_transaction(app, raw_db, monkeypatch):
+    monkeypatch.setattr(raw_db.get_pools()['write'], 'timeout', 0.2)
+    with app.app_context():
+        with raw_db.transaction():
+            raw_db.execute_insert('INSERT INTO note (body) VALUES (?)', ('mine',))
+            assert not write_from_another_thread(app, raw_db)  # Waits for our commit, then times out
+        assert write_from_another_thread(app, raw_db)
+        assert [row['body'] for row in raw_db.fetch_all('SELECT body FROM note ORDER BY id')] == ['mine', 'other']
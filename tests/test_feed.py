@@ -0,0 +1,59 @@
+import pytest
+
+@pytest.fixture
+def timeline(app, monkeypatch):
+    """Push-mode timelines in this process, with no store selected yet."""
+    import utils.timeline as timeline
+    monkeypatch.setattr(timeline, '_store', None)
+    monkeypatch.setattr(timeline, '_store_selected', False)
+    app.config.update(TIMELINE_ENABLED=True, TIMELINE_REDIS_URL=None, TIMELINE_MEMORY_STORE=True)
+    return timeline
+
+def make_users():
+    from database import db
+    from models import User
+    author = User(username='author', email='author@example.com', password='x')
+    reader = User(username='reader', email='reader@example.com', password='x')
+    db.session.add_all([author, reader])
+    db.session.flush()
+    author.followers.append(reader)
+    db.session.commit()
+    return author.id, reader.id
+
+def make_post(author_id, media_status):
+    from database import db
+    from models import Post
+    post = Post(content=media_status, user_id=author_id, media_status=media_status)
+    db.session.add(post)
+    db.session.commit()
+    return post.id
+
+# ---------------------- Media Status ---------------------- #
+def test_listings_only_show_posts_with_ready_media(app):
+    from utils.feed import get_feed_page
+    from utils.filters import FilterSpec
+    from utils.query_options import posts_by_ids
+    from models import Post
+    author_id, reader_id = make_users()
+    ids = {status: make_post(author_id, status) for status in ('processing', 'failed', 'ready')}
+
+    assert [post.id for post in get_feed_page(reader_id)[0]] == [ids['ready']]
+    assert [post.id for post in FilterSpec().add('user', author_id).page(Post.query)[0]] == [ids['ready']]
+    assert [post.id for post in posts_by_ids(list(ids.values()))] == [ids['ready']]
+
+def test_posts_are_fanned_out_once_their_media_is_ready(app, timeline, tmp_path):
+    from utils.media_pipeline import MediaPipeline
+    author_id, reader_id = make_users()
+    post_id = make_post(author_id, 'processing')
+    store = timeline.get_timeline_store()
+    assert store.range(reader_id) == []
+
+    # An upload of a file processed before: the stored files are reused and the post is ready at once
+    staged = tmp_path / 'staged.jpg'
+    staged.write_bytes(b'upload')
+    digest = 'ab' * 32
+    pipeline = MediaPipeline(app, workers=0)
+    assert pipeline.reserve()
+    pipeline.submit('post', post_id, str(staged), 'image', digest, ready_path=f'{digest}.webp')
+    assert store.range(reader_id) == [post_id]
+    assert [post.id for post in timeline.get_timeline_page(reader_id)[0]] == [post_id]
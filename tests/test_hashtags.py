@@ -0,0 +1,25 @@
+def make_post():
+    from database import db
+    from models import Post, User
+    author = User(username='author', email='author@example.com', password='x')
+    db.session.add(author)
+    db.session.flush()
+    post = Post(content='post', user_id=author.id)
+    db.session.add(post)
+    db.session.commit()
+    return post.id
+
+# ---------------------- Tagging ---------------------- #
+def test_retagging_counts_only_new_tags(app):
+    from sqlalchemy import func
+    from database import db
+    from models.hashtag import Hashtag, HashtagTrendBucket, PostHashtag, add_hashtags_to_post
+    post_id = make_post()
+
+    add_hashtags_to_post(post_id, ['#sun', '#sea'])
+    add_hashtags_to_post(post_id, ['#sun', '#sea', '#sand'])  # Saving the post again adds one tag
+
+    uses = dict(db.session.query(Hashtag.hashtag, func.sum(HashtagTrendBucket.count))
+                .join(HashtagTrendBucket, HashtagTrendBucket.hashtag_id == Hashtag.id).group_by(Hashtag.hashtag))
+    assert uses == {'sun': 1, 'sea': 1, 'sand': 1}
+    assert PostHashtag.query.filter_by(post_id=post_id).count() == 3
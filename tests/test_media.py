@@ -0,0 +1,84 @@
+import io
+import os
+import pytest
+
+def test_media_defaults_are_outside_the_static_folder(tmp_path):
+    from app import create_app
+    from config import TestingConfig
+
+    class Config(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'test.db'}"
+        MEDIA_ROOT = None
+        MEDIA_STAGING_DIR = None
+
+    app = create_app(Config)
+    static_folder = os.path.join(os.path.abspath(app.static_folder), '')
+    for setting in ('MEDIA_ROOT', 'MEDIA_STAGING_DIR'):
+        path = os.path.abspath(app.config[setting])
+        assert path.startswith(os.path.join(app.instance_path, ''))
+        assert not path.startswith(static_folder)
+
+def test_staged_uploads_are_not_served(app):
+    # Even when configured inside MEDIA_ROOT, the staging area is refused by the media endpoint
+    app.config['MEDIA_STAGING_DIR'] = os.path.join(app.config['MEDIA_ROOT'], 'staging')
+    os.makedirs(app.config['MEDIA_STAGING_DIR'])
+    for directory in (app.config['MEDIA_ROOT'], app.config['MEDIA_STAGING_DIR']):
+        with open(os.path.join(directory, 'upload.jpg'), 'wb') as file:
+            file.write(b'raw upload')
+
+    client = app.test_client()
+    assert client.get('/media/upload.jpg').status_code == 200
+    assert client.get('/media/staging/upload.jpg').status_code == 404
+
+# ---------------------- Edit Uploads ---------------------- #
+class FakePipeline:
+    """Records what is queued instead of processing it, checking the blob is committed first."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.committed = []
+
+    def reserve(self):
+        return True
+
+    def release(self):
+        pass
+
+    def submit(self, target, record_id, staged_path, kind, digest, ready_path):
+        # The pipeline works on its own session, so the blob row must be visible from another connection
+        from sqlalchemy import text
+        with self.engine.connect() as connection:
+            self.committed.append(connection.execute(
+                text('SELECT ref_count FROM media_blob WHERE sha256 = :sha256'), {'sha256': digest}).scalar())
+
+@pytest.fixture
+def pipeline(app, monkeypatch):
+    import utils.media_pipeline
+    from database import db
+    pipeline = FakePipeline(db.engine)
+    monkeypatch.setattr(utils.media_pipeline, 'get_media_pipeline', lambda: pipeline)
+    return pipeline
+
+@pytest.mark.parametrize('route', ['post', 'story', 'settings'])
+def test_edit_uploads_commit_the_blob_before_queueing(app, login, pipeline, route):
+    from database import db
+    from models import Post, Story, User
+    user = User(username='author', email='author@example.com', password='x')
+    db.session.add(user)
+    db.session.flush()
+    post = Post(content='post', user_id=user.id)
+    story = Story(content='story', user_id=user.id)
+    db.session.add_all([post, story])
+    db.session.commit()
+    url, form = {
+        'post': (f'/edit_post/{post.id}', {'caption': 'edited'}),
+        'story': (f'/edit_story/{story.id}', {'story_text': 'edited'}),
+        'settings': ('/settings', {'name': 'Author'}),
+    }[route]
+    client = login(app.test_client(), user.id)
+
+    with app.app_context():
+        form['media' if route != 'settings' else 'profile_picture'] = (io.BytesIO(b'not really a jpeg'), 'picture.jpg')
+        response = client.post(url, data=form, content_type='multipart/form-data')
+    assert response.status_code == 302
+    assert pipeline.committed == [1]
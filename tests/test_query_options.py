@@ -0,0 +1,144 @@
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+import pytest
+from flask import render_template_string
+from sqlalchemy import event
+
+# Each test renders a page with one item, then with 50, and expects the same number of SQL
+# statements: list pages must not issue a query per post, comment or reel.
+
+# Stand-ins for the page templates, touching what a list page shows for each item
+POST_LIST = '''
+{% for post in posts %}{{ post.user.username }} {{ post.display_like_count }} {{ post.comment_count }} {{ post.liked_by_viewer }}
+{% for tag in post.tags %}{{ tag.name }}{% endfor %}{% for comment in post.comment_preview %}{{ comment.user.username }}{% endfor %}
+{% endfor %}'''
+POST_PAGE = '''
+{{ post.user.username }} {% for tag in post.tags %}{{ tag.name }}{% endfor %}
+{% for comment in comments %}{{ comment.user.username }}: {{ comment.content }}{% endfor %}'''
+REEL_LIST = '''
+{% for reel in reels %}{{ reel.user.username }} {{ reel.display_like_count }} {{ reel.liked_by_viewer }}{% endfor %}'''
+EXPLORE = '''
+{% for posts in (trending_posts, following_posts) %}''' + POST_LIST + '''{% endfor %}'''
+TEMPLATES = {'feed.html': POST_LIST, 'view_post.html': POST_PAGE, 'view_reels.html': REEL_LIST, 'explore.html': EXPLORE}
+
+pytestmark = pytest.mark.usefixtures('render')
+
+@pytest.fixture
+def render(monkeypatch):
+    """Render the stand-in templates instead of the real pages."""
+    import controllers.explore_controller
+    import controllers.post_controller
+    import models.reel
+
+    def render_template(name, **context):
+        return render_template_string(TEMPLATES[name], **context)
+    monkeypatch.setattr(controllers.explore_controller, 'render_template', render_template)
+    monkeypatch.setattr(controllers.post_controller, 'render_template', render_template)
+    monkeypatch.setattr(models.reel, 'render_template', render_template)
+
+@contextmanager
+def count_statements():
+    from database import db
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+
+def statements_for(client, url):
+    # A fresh app context gives the request its own session and `g`, as in production
+    with client.application.app_context(), count_statements() as statements:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(statements)
+
+# ---------------------- Test Data ---------------------- #
+def make_users(prefix, count):
+    from database import db
+    from models import User
+    users = [User(username=f'{prefix}{i}', email=f'{prefix}{i}@example.com', password='x') for i in range(count)]
+    db.session.add_all(users)
+    db.session.commit()
+    return [user.id for user in users]
+
+def follow(follower_id, followed_ids):
+    from database import db
+    from models.user import followers
+    db.session.execute(followers.insert(), [{'follower_id': follower_id, 'followed_id': followed_id} for followed_id in followed_ids])
+    db.session.commit()
+
+def make_posts(author_id, commenter_ids, count):
+    """`count` posts by the author, each with a tag and a comment by every commenter. Returns their ids."""
+    from database import db
+    from models import Comment, Post, Tag
+    posts = [Post(content=f'post {i}', user_id=author_id, created_at=datetime.utcnow() - timedelta(minutes=i)) for i in range(count)]
+    db.session.add_all(posts)
+    db.session.flush()
+    for post in posts:
+        db.session.add(Tag(name='tag', post_id=post.id))
+        db.session.add_all(Comment(content='nice', post_id=post.id, user_id=user_id) for user_id in commenter_ids)
+    db.session.commit()
+    return [post.id for post in posts]
+
+def make_comments(post_id, commenter_ids):
+    from database import db
+    from models import Comment
+    db.session.add_all(Comment(content='more', post_id=post_id, user_id=user_id) for user_id in commenter_ids)
+    db.session.commit()
+
+def make_reels(creator_ids, count):
+    from database import db
+    from models.reel import Reel
+    db.session.add_all(Reel(user_id=creator_ids[i % len(creator_ids)], video_file='reel.mp4', caption=f'reel {i}') for i in range(count))
+    db.session.commit()
+
+# ---------------------- Statement Counts ---------------------- #
+def test_feed_statements_do_not_grow_with_posts(app, login):
+    viewer_id, = make_users('viewer', 1)
+    author_ids = make_users('author', 2)
+    commenter_ids = make_users('commenter', 3)
+    follow(viewer_id, author_ids)
+    make_posts(author_ids[0], commenter_ids, 1)
+    app.config['POSTS_PER_PAGE'] = 50
+    client = login(app.test_client(), viewer_id)
+    one = statements_for(client, '/feed')
+
+    make_posts(author_ids[1], commenter_ids, 49)
+    assert statements_for(client, '/feed') == one
+
+def test_explore_statements_do_not_grow_with_posts(app, login):
+    viewer_id, = make_users('viewer', 1)
+    author_ids = make_users('author', 2)
+    commenter_ids = make_users('commenter', 3)
+    follow(viewer_id, author_ids)
+    make_posts(author_ids[0], commenter_ids, 1)
+    app.config['POSTS_PER_PAGE'] = 50
+    client = login(app.test_client(), viewer_id)
+    one = statements_for(client, '/explore')
+
+    make_posts(author_ids[1], commenter_ids, 49)
+    assert statements_for(client, '/explore') == one
+
+def test_view_post_statements_do_not_grow_with_comments(app, login):
+    viewer_id, author_id = make_users('user', 2)
+    post_id, = make_posts(author_id, make_users('commenter', 1), 1)
+    client = login(app.test_client(), viewer_id)
+    one = statements_for(client, f'/post/{post_id}')
+
+    make_comments(post_id, make_users('more', 49))
+    assert statements_for(client, f'/post/{post_id}') == one
+
+def test_reels_statements_do_not_grow_with_reels(app, login):
+    viewer_id, = make_users('viewer', 1)
+    creator_ids = make_users('creator', 3)
+    make_reels(creator_ids[:1], 1)
+    app.config['REELS_PER_PAGE'] = 50
+    client = login(app.test_client(), viewer_id)
+    one = statements_for(client, '/reels')
+
+    make_reels(creator_ids, 49)
+    assert statements_for(client, '/reels') == one
@@ -0,0 +1,79 @@
+from datetime import datetime
+import pytest
+
+@pytest.fixture
+def cache(app):
+    """The app's cache on an in-memory backend (the test config disables caching)."""
+    from extensions import cache
+    cache.init_app(app, config={'CACHE_TYPE': 'SimpleCache'})
+    return cache
+
+def make_reels(like_counts):
+    from database import db
+    from models import User
+    from models.reel import Reel
+    creator = User(username='creator', email='creator@example.com', password='x')
+    viewer = User(username='viewer', email='viewer@example.com', password='x')
+    db.session.add_all([creator, viewer])
+    db.session.flush()
+    now = datetime.utcnow()
+    reels = [Reel(user_id=creator.id, video_file='reel.mp4', like_count=count, timestamp=now) for count in like_counts]
+    db.session.add_all(reels)
+    db.session.commit()
+    return viewer.id, [reel.id for reel in reels]
+
+# ---------------------- Paging ---------------------- #
+def test_reels_are_not_repeated_when_their_score_drops(app, cache):
+    from database import db
+    from models.reel import Reel
+    from utils.reels_feed import get_reels_page
+    viewer_id, reel_ids = make_reels([400, 300, 200, 100])
+
+    reels, cursor = get_reels_page(viewer_id, per_page=2)
+    assert [reel.id for reel in reels] == reel_ids[:2]
+    served = [reel.id for reel in reels]
+
+    # The top reel loses its likes and now ranks behind the cursor
+    Reel.query.filter_by(id=reel_ids[0]).update({'like_count': 0})
+    db.session.commit()
+    while cursor:
+        reels, cursor = get_reels_page(viewer_id, cursor=cursor, per_page=2)
+        served += [reel.id for reel in reels]
+    assert sorted(served) == sorted(reel_ids)
+
+# ---------------------- Seen Set ---------------------- #
+def test_watched_reels_leave_the_feed(app, login):
+    from utils.reels_feed import get_reels_page
+    viewer_id, reel_ids = make_reels([300, 200, 100])
+    client = login(app.test_client(), viewer_id)
+
+    for reel_id in reel_ids[:2]:
+        with app.app_context():
+            assert client.post(f'/reels/{reel_id}/watched').status_code == 204
+    reels, _ = get_reels_page(viewer_id, per_page=10)
+    assert [reel.id for reel in reels] == reel_ids[2:]
+
+def test_first_watch_joins_a_row_created_concurrently(app, monkeypatch):
+    import utils.reels_feed
+    from sqlalchemy import text
+    from database import db
+    from utils.bloom import BloomFilter
+    from utils.reels_feed import load_seen_filters, mark_reels_watched
+    viewer_id, reel_ids = make_reels([100])
+
+    class RacingBloomFilter(BloomFilter):
+        """Another request creates the viewer's row while this one builds its empty filter."""
+        raced = False
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            if RacingBloomFilter.raced:
+                return
+            RacingBloomFilter.raced = True
+            with db.engine.begin() as connection:
+                connection.execute(text('INSERT OR IGNORE INTO reel_seen_filter (user_id, current, current_count) '
+                                        'VALUES (:user_id, :current, 0)'), {'user_id': viewer_id, 'current': self.to_bytes()})
+    monkeypatch.setattr(utils.reels_feed, 'BloomFilter', RacingBloomFilter)
+
+    mark_reels_watched(viewer_id, reel_ids)
+    assert reel_ids[0] in load_seen_filters(viewer_id)[0]
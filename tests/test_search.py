@@ -0,0 +1,74 @@
+import importlib.util
+import os
+import pytest
+from conftest import ROOT
+
+@pytest.fixture
+def fts(app):
+    """The app's database with migration 0003's FTS5 tables and triggers (create_all leaves them out)."""
+    from alembic.migration import MigrationContext
+    from alembic.operations import Operations
+    from database import db
+    spec = importlib.util.spec_from_file_location(
+        'full_text_search', os.path.join(ROOT, 'migrations', 'versions', '0003_full_text_search.py'))
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    with db.engine.begin() as connection, Operations.context(MigrationContext.configure(connection)):
+        migration.upgrade()
+    app.config['SEARCH_BACKEND'] = 'fts5'
+    from utils.search import FTS5Backend, get_backend
+    assert isinstance(get_backend(), FTS5Backend)
+    return get_backend()
+
+def make_posts(contents):
+    from database import db
+    from models import Post, User
+    author = User.query.filter_by(username='author').first()
+    if author is None:
+        author = User(username='author', email='author@example.com', password='x')
+        db.session.add(author)
+        db.session.flush()
+    posts = [Post(content=content, user_id=author.id) for content in contents]
+    db.session.add_all(posts)
+    db.session.commit()
+    return [post.id for post in posts]
+
+# ---------------------- FTS5 Backend ---------------------- #
+def test_results_are_ranked_by_bm25(fts):
+    from utils.search import search
+    sparse, dense, other = make_posts([
+        'sunset over a long quiet stretch of the northern beach today',
+        'sunset sunset sunset',
+        'nothing to see here',
+    ])
+    results, next_cursor = search('posts', 'sunset')
+    assert [post.id for post in results] == [dense, sparse]
+    assert next_cursor is None
+    assert [post.id for post in search('posts', 'sun*')[0]] == [dense, sparse]
+
+def test_pages_follow_the_score_keyset(fts):
+    from utils.search import decode_cursor, parse_query
+    make_posts([' '.join(['tide'] * repeats + ['filler'] * 5) for repeats in (1, 2, 3, 1, 2, 3, 1)])
+    terms = parse_query('tide')
+    everything, _ = fts.search('posts', terms, 100)
+
+    paged, cursor = [], None
+    while True:
+        ids, cursor = fts.search('posts', terms, 3, decode_cursor(cursor))
+        paged += ids
+        if cursor is None:
+            break
+    assert paged == everything and len(paged) == 7
+
+def test_triggers_keep_the_index_in_sync(fts):
+    from database import db
+    from models import Post
+    from utils.search import search
+    kept, edited, deleted = make_posts(['harbor lights', 'harbor fog', 'harbor boats'])
+
+    db.session.get(Post, edited).content = 'mountain fog'
+    db.session.delete(db.session.get(Post, deleted))
+    added, = make_posts(['harbor seals'])
+
+    assert sorted(post.id for post in search('posts', 'harbor')[0]) == [kept, added]
+    assert [post.id for post in search('posts', 'mountain')[0]] == [edited]
@@ -0,0 +1,49 @@
+from datetime import datetime, timedelta
+
+SHARED, SOLE = 'a' * 64, 'b' * 64
+
+def make_stories():
+    """One live story and five expired ones by an author the viewer follows, sharing a stored image."""
+    from database import db
+    from models import MediaBlob, Story, User
+    author = User(username='author', email='author@example.com', password='x')
+    viewer = User(username='viewer', email='viewer@example.com', password='x')
+    db.session.add_all([author, viewer])
+    db.session.flush()
+    author.followers.append(viewer)
+
+    now = datetime.utcnow()
+    live = Story(content='live', user_id=author.id, image=f'aa/aa/{SHARED}.webp', expiration_time=now + timedelta(hours=1))
+    expired = [Story(content=f'old {i}', user_id=author.id, image=f'aa/aa/{SHARED}.webp', expiration_time=now - timedelta(minutes=i + 1))
+               for i in range(5)]
+    expired[0].video = f'bb/bb/{SOLE}.mp4'
+    db.session.add_all([live, *expired])
+    db.session.add_all([MediaBlob(sha256=SHARED, kind='image', size=1, ref_count=6),
+                        MediaBlob(sha256=SOLE, kind='video', size=1, ref_count=1)])
+    db.session.commit()
+    return viewer.id, live.id
+
+# ---------------------- Story Tray ---------------------- #
+def test_tray_leaves_out_expired_stories_not_yet_reaped(app):
+    from utils.stories import get_story_tray
+    viewer_id, live_id = make_stories()
+    tray = get_story_tray(viewer_id)
+    assert [[story.id for story in entry['stories']] for entry in tray] == [[live_id]]
+
+# ---------------------- Story Reaper ---------------------- #
+def test_reaper_deletes_in_batches_and_releases_media(app):
+    from database import db
+    from models import MediaBlob, Story
+    from utils.stories import reap_expired_stories
+    make_stories()
+
+    assert reap_expired_stories(batch_size=2, max_batches=2) == 4  # Two batches of two
+    assert Story.query.count() == 2
+    assert db.session.get(MediaBlob, SHARED).ref_count == 2
+
+    assert reap_expired_stories(batch_size=2) == 1  # The rest, then an empty batch ends the run
+    assert [story.content for story in Story.query] == ['live']
+    db.session.expire_all()
+    shared, sole = db.session.get(MediaBlob, SHARED), db.session.get(MediaBlob, SOLE)
+    assert shared.ref_count == 1 and shared.released_at is None  # Still used by the live story
+    assert sole.ref_count == 0 and sole.released_at is not None  # Left to the garbage collector
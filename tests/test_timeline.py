@@ -0,0 +1,35 @@
+import pytest
+
+@pytest.fixture
+def timeline(app, monkeypatch):
+    """utils.timeline with no store selected yet, and timelines enabled without Redis."""
+    import utils.timeline as timeline
+    monkeypatch.setattr(timeline, '_store', None)
+    monkeypatch.setattr(timeline, '_store_selected', False)
+    app.config.update(TIMELINE_ENABLED=True, TIMELINE_REDIS_URL=None, TIMELINE_MEMORY_STORE=False)
+    return timeline
+
+def make_post():
+    from database import db
+    from models import Post, User
+    author = User(username='author', email='author@example.com', password='x')
+    reader = User(username='reader', email='reader@example.com', password='x')
+    db.session.add_all([author, reader])
+    db.session.flush()
+    author.followers.append(reader)
+    post = Post(content='post', user_id=author.id)
+    db.session.add(post)
+    db.session.commit()
+    return post, reader.id
+
+# ---------------------- Store Selection ---------------------- #
+def test_feed_is_pulled_without_a_shared_store(timeline):
+    post, reader_id = make_post()
+    assert timeline.get_timeline_store() is None
+    assert timeline.fan_out_post(post) is False
+    posts, _ = timeline.get_timeline_page(reader_id)
+    assert [p.id for p in posts] == [post.id]
+
+def test_in_process_store_only_when_allowed(app, timeline):
+    app.config['TIMELINE_MEMORY_STORE'] = True
+    assert isinstance(timeline.get_timeline_store(), timeline.MemoryTimelineStore)
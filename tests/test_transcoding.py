@@ -0,0 +1,59 @@
+import os
+from datetime import datetime, timedelta
+import pytest
+
+SOURCE = 'ab/cd/' + 'ab' * 32 + '.mp4'
+CRASHING_SOURCE = 'cd/ef/' + 'cd' * 32 + '.mp4'
+
+def fake_transcode(source_path, *args):
+    """Stands in for utils.video.transcode_video in the worker's encoder processes."""
+    if source_path.endswith(os.path.basename(CRASHING_SOURCE)):
+        os._exit(1)  # An encoder process dying mid-job
+    return {'heights': [360], 'seconds': 0.0}
+
+def make_job(source_path, **values):
+    from database import db
+    from models import User
+    from models.media import TranscodeJob
+    from models.reel import Reel
+    user = User.query.first() or User(username='creator', email='creator@example.com', password='x')
+    reel = Reel(user=user, video_file=source_path, caption='reel')
+    db.session.add(reel)
+    db.session.flush()
+    job = TranscodeJob(target='reel', record_id=reel.id, source_path=source_path, **values)
+    db.session.add(job)
+    db.session.commit()
+    return job.id
+
+def job_state(job_id):
+    from database import db
+    from models.media import TranscodeJob
+    db.session.expire_all()
+    job = db.session.get(TranscodeJob, job_id)
+    return job.status, job.attempts, job.error
+
+# ---------------------- Crashed Encoders ---------------------- #
+def test_worker_survives_a_crashed_encoder(app, monkeypatch):
+    import utils.transcoding
+    monkeypatch.setattr(utils.transcoding, 'transcode_video', fake_transcode)
+    crashing = make_job(CRASHING_SOURCE)
+    healthy = make_job(SOURCE)
+
+    # One process: the crash breaks the pool, the healthy job runs in its replacement
+    assert utils.transcoding.run_worker(workers=1, once=True) == 2
+    status, attempts, error = job_state(crashing)
+    assert (status, attempts) == ('queued', 1) and error.startswith('BrokenProcessPool')
+    assert job_state(healthy)[0] == 'done'
+
+# ---------------------- Leases ---------------------- #
+def test_running_jobs_are_reclaimed_only_once_their_lease_lapses(app):
+    from utils.transcoding import claim_jobs, renew_leases
+    now = datetime.utcnow()
+    lease = timedelta(seconds=app.config['TRANSCODE_LEASE_SECONDS'])
+    job_id = make_job(SOURCE, status='running', attempts=1, started_at=now - 10 * lease, heartbeat_at=now - lease / 2)
+
+    # Started long ago, but its worker still renews the lease: a long job, not a dead worker
+    assert claim_jobs(1, now=now) == []
+    renew_leases([job_id], now=now)
+    assert claim_jobs(1, now=now + lease / 2) == []
+    assert [job.id for job in claim_jobs(1, now=now + 2 * lease)] == [job_id]
@@ -0,0 +1,61 @@
+import pytest
+
+@pytest.fixture
+def user_id(app):
+    from database import db
+    from models import User
+    user = User(username='uploader', email='uploader@example.com', password='x')
+    db.session.add(user)
+    db.session.commit()
+    return user.id
+
+@pytest.fixture
+def client(app, login, user_id):
+    return login(app.test_client(), user_id)
+
+def start(client, size=10, filename='clip.mp4'):
+    return client.post('/uploads', json={'filename': filename, 'size': size})
+
+def patch(client, upload_id, offset, body):
+    return client.patch(f'/uploads/{upload_id}', data=body, headers={'Upload-Offset': str(offset)})
+
+# ---------------------- Resumable Protocol ---------------------- #
+def test_chunks_append_at_the_reported_offset(app, client):
+    response = start(client)
+    assert response.status_code == 201
+    upload_id = response.get_json()['upload_id']
+    assert response.get_json()['offset'] == 0
+
+    assert patch(client, upload_id, 0, b'01234').get_json()['offset'] == 5
+    assert client.head(f'/uploads/{upload_id}').headers['Upload-Offset'] == '5'
+
+    stale = patch(client, upload_id, 0, b'01234')  # A retried chunk that already arrived
+    assert stale.status_code == 409
+    assert stale.get_json()['offset'] == 5
+
+    assert patch(client, upload_id, 5, b'56789AB').status_code == 400  # Past the announced size
+    assert patch(client, upload_id, 5, b'56789').get_json()['offset'] == 10
+    assert client.head(f'/uploads/{upload_id}').headers['Upload-Offset'] == '10'
+
+def test_incomplete_uploads_are_not_accepted(app, client, user_id):
+    from database import db
+    from utils.media_pipeline import accept_resumable_upload
+    from utils.uploads import get_upload
+    upload_id = start(client).get_json()['upload_id']
+    patch(client, upload_id, 0, b'01234')
+
+    def create_record(kind):
+        raise AssertionError('No record for an incomplete upload')
+    assert accept_resumable_upload(get_upload(upload_id, user_id), 'reel', create_record) is None
+    assert accept_resumable_upload(None, 'reel', create_record) is None
+    db.session.expire_all()
+    assert get_upload(upload_id, user_id) is not None  # Still open, to be resumed
+
+def test_open_uploads_are_capped_per_user(app, client):
+    app.config['MEDIA_UPLOAD_MAX_OPEN'] = 2
+    first = start(client).get_json()['upload_id']
+    assert start(client).status_code == 201
+    assert start(client).status_code == 429
+
+    assert client.delete(f'/uploads/{first}').status_code == 204  # Cancelling frees a slot
+    assert start(client).status_code == 201